@@ -0,0 +1,730 @@
+"""
+pymtheg benchmarks
+------------------
+
+offline benchmarks for pymtheg, fixtures are generated locally using ffmpeg lavfi sources
+so that no network access is needed
+
+usage:
+  python benchmark.py probe [-n ITERATIONS] [--fixtures DIR] [--short]
+  python benchmark.py stages [-n ITERATIONS] [--fixtures DIR] [--short]
+  python benchmark.py encode [-n ITERATIONS] [--fixtures DIR]
+  python benchmark.py scale [-n ITERATIONS] [--fixtures DIR]
+  python benchmark.py energy [-n ITERATIONS] [--fixtures DIR] [--short]
+  python benchmark.py windows [-n ITERATIONS] [--fixtures DIR]
+  python benchmark.py e2e [-n ITERATIONS] [--fixtures DIR] [--songs 1,10,100]
+  python benchmark.py startup [-n ITERATIONS] [--budget MS | --budget-ratio RATIO]
+
+every benchmark can save its results with -o/--output FILE, and compare them against a
+previous run with --compare FILE, exiting non-zero if anything is slower by more than
+--threshold percent. startup always exits non-zero when over its budget, by default a
+multiple of the bare interpreter's startup measured in the same run
+"""
+
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from tempfile import TemporaryDirectory
+from pathlib import Path
+from statistics import median
+from time import perf_counter, time
+from json import dumps, loads
+import subprocess
+import platform
+import sys
+import os
+
+from rich.console import Console
+
+import pymtheg
+
+
+class Fixture(NamedTuple):
+    """
+    benchmark fixture named tuple
+
+    name: str
+        file name of fixture
+    codec: str
+        ffmpeg audio encoder used
+    duration: int
+        duration in seconds
+    cover: bool = False
+        whether the fixture has an attached picture
+    source: str = "sine"
+        lavfi audio source, "sine" or "noise"
+    cover_size: int = 1000
+        width and height of the attached picture
+    """
+
+    name: str
+    codec: str
+    duration: int
+    cover: bool = False
+    source: str = "sine"
+    cover_size: int = 1000
+
+
+# ffmpeg audio encoders of every suffix pymtheg accepts
+ENCODERS: Dict[str, str] = {
+    ".m4a": "aac",
+    ".ogg": "libvorbis",
+    ".flac": "flac",
+    ".mp3": "libmp3lame",
+    ".wav": "pcm_s16le",
+    ".opus": "libopus",
+}
+
+# suffixes ffmpeg can write an attached picture to
+COVER_SUFFIXES: List[str] = [".m4a", ".flac", ".mp3"]
+
+# startup budget as a multiple of `python -c pass`, so that it holds on slower machines
+STARTUP_BUDGET_RATIO: float = 6.0
+
+# maximum cover size (-ms) compared against no limit by the scale benchmark
+SCALE_SIZE: int = 1080
+
+SHORT_DURATION: int = 215
+LONG_DURATION: int = 2 * 60 * 60
+
+# modules pymtheg should only import when they are needed, not on startup
+LAZY_MODULES: List[str] = [
+    "rich",
+    "http.server",
+    "asyncio",
+    "sqlite3",
+    "concurrent.futures",
+    "csv",
+    "uuid",
+    "pymtheg_placeholder",
+]
+
+FIXTURES: List[Fixture] = [
+    *[
+        Fixture(f"sine{suffix}", ENCODERS[suffix], SHORT_DURATION)
+        for suffix in pymtheg.SONG_SUFFIXES
+    ],
+    *[
+        Fixture(f"noise{suffix}", ENCODERS[suffix], SHORT_DURATION, source="noise")
+        for suffix in pymtheg.SONG_SUFFIXES
+    ],
+    *[
+        Fixture(f"cover{suffix}", ENCODERS[suffix], SHORT_DURATION, cover=True)
+        for suffix in COVER_SUFFIXES
+    ],
+    # pcm is left out as hours of it would take gigabytes, see generate() for sample rate
+    *[
+        Fixture(f"long{suffix}", ENCODERS[suffix], LONG_DURATION)
+        for suffix in pymtheg.SONG_SUFFIXES
+        if suffix != ".wav"
+    ],
+]
+
+
+def generate(fixture: Fixture, directory: Path) -> Path:
+    """generates a fixture into a directory if it does not exist, returns its path"""
+    path = directory.joinpath(fixture.name)
+
+    if path.exists():
+        return path
+
+    source = (
+        f"anoisesrc=color=pink:amplitude=0.5:duration={fixture.duration}"
+        if fixture.source == "noise"
+        else f"sine=frequency=440:duration={fixture.duration}"
+    )
+    args = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"]
+    args += ["-f", "lavfi", "-i", source]
+
+    if fixture.cover:
+        # a single frame, as limiting output frames would also cut the audio short
+        size = f"{fixture.cover_size}x{fixture.cover_size}"
+        args += ["-f", "lavfi", "-i", f"testsrc=size={size}:duration=0.04"]
+        args += ["-map", "0:a", "-map", "1:v", "-c:v", "mjpeg"]
+        args += ["-disposition:v", "attached_pic"]
+
+    args += ["-ac", "2"]  # stereo, like most songs
+
+    if fixture.duration > SHORT_DURATION:
+        args += ["-ar", "16000"]  # multi-hour fixtures are slow to encode at full rate
+
+    # written under a partial name so an interrupted run does not leave a broken fixture
+    partial_path = path.with_name(f"partial.{fixture.name}")
+    subprocess.run(args + ["-c:a", fixture.codec, str(partial_path)], check=True)
+    partial_path.replace(path)
+    return path
+
+
+def fixtures(short: bool) -> List[Fixture]:
+    """returns the fixtures to benchmark, leaving out multi-hour fixtures if short"""
+    return [
+        fixture
+        for fixture in FIXTURES
+        if not (short and fixture.duration > SHORT_DURATION)
+    ]
+
+
+def timed(function: Callable[[], object], iterations: int) -> float:
+    """returns the mean time of a function call in milliseconds"""
+    start = perf_counter()
+    for _ in range(iterations):
+        function()
+    return (perf_counter() - start) / iterations * 1000
+
+
+@contextmanager
+def fresh_cache(directory: Path) -> Iterator[Path]:
+    """points the pymtheg cache at a new empty directory, so that caches start cold"""
+    previous = os.environ.get("PYMTHEG_CACHE_DIR")
+
+    with TemporaryDirectory(dir=directory) as _cache:
+        os.environ["PYMTHEG_CACHE_DIR"] = _cache
+        try:
+            yield Path(_cache)
+        finally:
+            if previous is None:
+                del os.environ["PYMTHEG_CACHE_DIR"]
+            else:
+                os.environ["PYMTHEG_CACHE_DIR"] = previous
+
+
+def bench_probe(
+    directory: Path, iterations: int, console: Console, short: bool
+) -> Dict[str, float]:
+    """compares native container header reading against ffprobe"""
+    results: Dict[str, float] = {}
+    console.print(
+        f"{'fixture':<12} {'native (ms)':>12} {'ffprobe (ms)':>13} {'agrees':>7}"
+    )
+
+    for fixture in fixtures(short):
+        path = generate(fixture, directory)
+        native = pymtheg.read_song_info(path)
+        ffprobe = pymtheg.probe_ffprobe(path)
+
+        native_ms = timed(lambda: pymtheg.read_song_info(path), iterations)
+        ffprobe_ms = timed(lambda: pymtheg.probe_ffprobe(path), iterations)
+        results[f"probe/{fixture.name}/native"] = native_ms
+        results[f"probe/{fixture.name}/ffprobe"] = ffprobe_ms
+
+        console.print(
+            f"{fixture.name:<12} {native_ms:>12.3f} {ffprobe_ms:>13.3f} "
+            f"{'yes' if native == ffprobe else 'no':>7}"
+        )
+
+    return results
+
+
+def bench_stages(
+    directory: Path, iterations: int, console: Console, short: bool
+) -> Dict[str, float]:
+    """
+    times every stage of creating a default clip of each fixture with cold caches:
+    probing, getting album art, encoding the video of the cover and creating the clip
+    """
+    # stages as named in create_clip(), and their column headers
+    stages = {
+        "probe": "probe (ms)",
+        "get album art": "cover (ms)",
+        "encode video": "video (ms)",
+        "create clip": "clip (ms)",
+    }
+    results: Dict[str, float] = {}
+    console.print(
+        f"{'fixture':<12}" + "".join(f" {stages[stage]:>12}" for stage in stages)
+    )
+
+    for fixture in fixtures(short):
+        path = generate(fixture, directory)
+        times: Dict[str, List[float]] = {stage: [] for stage in stages}
+
+        @contextmanager
+        def status(stage: str) -> Iterator[None]:
+            start = perf_counter()
+            yield
+            times[stage].append((perf_counter() - start) * 1000)
+
+        for _ in range(iterations):
+            with fresh_cache(directory), TemporaryDirectory(dir=directory) as _opdir:
+                opdir = Path(_opdir)
+                job = pymtheg.ClipJob(path, dir=opdir)
+                clip_start, clip_end = job.windows()[0]
+
+                with status("probe"):
+                    info = pymtheg.probe(path)
+
+                start, end = pymtheg.parse_timestamps(clip_start, clip_end, info.duration)
+                pymtheg.create_clip(
+                    job=job,
+                    song_path=path,
+                    song_info=info,
+                    start=start,
+                    end=end,
+                    out_path=opdir.joinpath("clip.mp4"),
+                    opdir=opdir,
+                    status=status,
+                )
+
+        row = f"{fixture.name:<12}"
+        for stage in stages:
+            if len(times[stage]) == 0:  # stage was skipped
+                row += f" {'-':>12}"
+                continue
+
+            results[f"stages/{fixture.name}/{stage}"] = median(times[stage])
+            row += f" {median(times[stage]):>12.1f}"
+
+        console.print(row)
+
+    return results
+
+
+def bench_encode(directory: Path, iterations: int, console: Console) -> Dict[str, float]:
+    """
+    compares encode profiles by the time taken to create a clip with cold caches, and
+    the size of the clip, for songs with and without album covers
+    """
+    results: Dict[str, float] = {}
+    console.print(f"{'profile':<12} {'fixture':<12} {'clip (ms)':>10} {'size (KiB)':>11}")
+
+    for name in pymtheg.ENCODE_PROFILES:
+        ffargs = tuple(pymtheg.encode_profile(name).split())
+
+        for fixture in FIXTURES:
+            if fixture.name not in ("cover.mp3", "cover.m4a", "noise.flac"):
+                continue
+
+            path = generate(fixture, directory)
+            times: List[float] = []
+            size = 0
+
+            for _ in range(iterations):
+                with fresh_cache(directory), TemporaryDirectory(dir=directory) as _opdir:
+                    job = pymtheg.ClipJob(path, dir=Path(_opdir), ffargs=ffargs)
+                    start = perf_counter()
+                    result = job.run()[0]
+                    times.append((perf_counter() - start) * 1000)
+                    size = result.path.stat().st_size
+
+            results[f"encode/{name}/{fixture.name}"] = median(times)
+            results[f"encode/{name}/{fixture.name}/bytes"] = size
+            console.print(
+                f"{name:<12} {fixture.name:<12} {median(times):>10.1f} {size / 1024:>11.1f}"
+            )
+
+    return results
+
+
+def bench_scale(directory: Path, iterations: int, console: Console) -> Dict[str, float]:
+    """
+    compares creating a clip of songs with large (3000x3000) album covers as-is against
+    downscaling their covers to fit within SCALE_SIZE first (-ms), by the time taken
+    with cold caches and the size of the clip
+    """
+    results: Dict[str, float] = {}
+    sizes = {"none": 0, str(SCALE_SIZE): SCALE_SIZE}
+    console.print(f"{'fixture':<14} {'max size':>8} {'clip (ms)':>10} {'size (KiB)':>11}")
+
+    for suffix in COVER_SUFFIXES:
+        fixture = Fixture(
+            f"large{suffix}",
+            ENCODERS[suffix],
+            SHORT_DURATION,
+            cover=True,
+            cover_size=3000,
+        )
+        path = generate(fixture, directory)
+
+        for name, max_size in sizes.items():
+            times: List[float] = []
+            size = 0
+
+            for _ in range(iterations):
+                with fresh_cache(directory), TemporaryDirectory(dir=directory) as _opdir:
+                    job = pymtheg.ClipJob(path, dir=Path(_opdir), max_size=max_size)
+                    start = perf_counter()
+                    result = job.run()[0]
+                    times.append((perf_counter() - start) * 1000)
+                    size = result.path.stat().st_size
+
+            results[f"scale/{fixture.name}/{name}"] = median(times)
+            results[f"scale/{fixture.name}/{name}/bytes"] = size
+            console.print(
+                f"{fixture.name:<14} {name:>8} {median(times):>10.1f} "
+                f"{size / 1024:>11.1f}"
+            )
+
+    return results
+
+
+def bench_energy(
+    directory: Path, iterations: int, console: Console, short: bool
+) -> Dict[str, float]:
+    """
+    times finding the most energetic 15 seconds of each fixture ("^" clip starts) with
+    cold caches, and how many times faster than real time the analysis is
+    """
+    results: Dict[str, float] = {}
+    console.print(
+        f"{'fixture':<12} {'analyse (ms)':>13} {'window (ms)':>12} {'realtime':>9} "
+        f"{'start':>6}"
+    )
+
+    for fixture in fixtures(short):
+        path = generate(fixture, directory)
+        analyse_ms = timed(lambda: pymtheg.energy_envelope(path), iterations)
+        envelope = pymtheg.energy_envelope(path)
+        window_ms = timed(
+            lambda: pymtheg.best_window(envelope, 15, fixture.duration), iterations
+        )
+        start = pymtheg.best_window(envelope, 15, fixture.duration)
+        results[f"energy/{fixture.name}/analyse"] = analyse_ms
+        results[f"energy/{fixture.name}/window"] = window_ms
+
+        console.print(
+            f"{fixture.name:<12} {analyse_ms:>13.1f} {window_ms:>12.3f} "
+            f"{fixture.duration * 1000 / analyse_ms:>8.0f}x {start:>6}"
+        )
+
+    return results
+
+
+def bench_windows(directory: Path, iterations: int, console: Console) -> Dict[str, float]:
+    """
+    compares creating several clips of a song with one job, sharing probing, album art
+    and a single ffmpeg invocation, against a job per clip, with cold caches
+    """
+    results: Dict[str, float] = {}
+    starts = ["0:30", "1:10", "2:00"]
+    console.print(f"{'fixture':<12} {'one job (ms)':>13} {'job per clip (ms)':>18}")
+
+    for fixture in FIXTURES:
+        if fixture.name not in ("cover.mp3", "cover.m4a", "noise.flac"):
+            continue
+
+        path = generate(fixture, directory)
+        jobs: Dict[str, List[List[str]]] = {
+            "one job": [starts],
+            "job per clip": [[start] for start in starts],
+        }
+        times: Dict[str, List[float]] = {name: [] for name in jobs}
+
+        for _ in range(iterations):
+            for name, windows in jobs.items():
+                with fresh_cache(directory), TemporaryDirectory(dir=directory) as _opdir:
+                    start = perf_counter()
+                    for window in windows:
+                        pymtheg.ClipJob(
+                            path, clip_start=",".join(window), dir=Path(_opdir)
+                        ).run()
+                    times[name].append((perf_counter() - start) * 1000)
+
+        for name in jobs:
+            results[f"windows/{fixture.name}/{name}"] = median(times[name])
+
+        console.print(
+            f"{fixture.name:<12} {median(times['one job']):>13.1f} "
+            f"{median(times['job per clip']):>18.1f}"
+        )
+
+    return results
+
+
+def bench_e2e(
+    directory: Path, iterations: int, console: Console, songs: List[int]
+) -> Dict[str, float]:
+    """
+    times the pymtheg command line end to end, clipping a number of local songs sharing
+    an album cover non-interactively (-ud -y) with cold caches
+    """
+    results: Dict[str, float] = {}
+    song = generate(
+        Fixture("cover.mp3", ENCODERS[".mp3"], SHORT_DURATION, cover=True), directory
+    )
+    console.print(f"{'songs':>6} {'total (ms)':>12} {'songs/s':>9}")
+
+    for count in songs:
+        times: List[float] = []
+
+        for _ in range(iterations):
+            with fresh_cache(directory), TemporaryDirectory(dir=directory) as _opdir:
+                song_paths: List[str] = []
+                for n in range(count):
+                    song_paths.append(str(Path(_opdir).joinpath(f"song {n:03}.mp3")))
+                    os.link(song, song_paths[-1])
+
+                start = perf_counter()
+                subprocess.run(
+                    [sys.executable, pymtheg.__file__, *song_paths, "-ud", "-y"]
+                    + ["-d", _opdir],
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                )
+                times.append((perf_counter() - start) * 1000)
+
+        results[f"e2e/{count}"] = median(times)
+        console.print(
+            f"{count:>6} {median(times):>12.1f} {count / median(times) * 1000:>9.2f}"
+        )
+
+    return results
+
+
+def bench_startup(
+    directory: Path,
+    iterations: int,
+    console: Console,
+    budget: Optional[float],
+    budget_ratio: float = STARTUP_BUDGET_RATIO,
+) -> Dict[str, float]:
+    """
+    times pymtheg startup, from interpreter start until arguments are parsed for a single
+    local song with -ud and -y, and lists the slowest imports and any lazily imported
+    modules that were imported
+    """
+    song = directory.joinpath("startup.mp3")
+    song.touch()
+
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).parent.absolute()))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # measure with cached bytecode, as installed
+    code = "import pymtheg; pymtheg.get_args(pymtheg.LazyConsole(terminal=False))"
+    startup = [sys.executable, "-c", code, str(song), "-ud", "-y"]
+
+    def wall(args: List[str]) -> float:
+        """returns the median wall time of running a command in milliseconds"""
+        subprocess.run(args, env=env, check=True)  # warm up, and write bytecode
+        times = []
+        for _ in range(iterations):
+            start = perf_counter()
+            subprocess.run(args, env=env, check=True)
+            times.append((perf_counter() - start) * 1000)
+        return median(times)
+
+    results: Dict[str, float] = {
+        "startup/interpreter": wall([sys.executable, "-c", "pass"]),
+        "startup/pymtheg": wall(startup),
+    }
+
+    # -X importtime lines are "import time: self [us] | cumulative | name"
+    imports: Dict[str, int] = {}
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", *startup[1:]],
+        env=env,
+        check=True,
+        capture_output=True,
+        universal_newlines=True,
+    ).stderr
+    for line in stderr.splitlines()[1:]:
+        _, microseconds, name = line.split("|")
+        if name.startswith("   ") and not name.startswith("     "):  # direct imports
+            imports[name.strip()] = int(microseconds)
+
+    console.print(f"{'interpreter (ms)':<28} {results['startup/interpreter']:>8.1f}")
+    console.print(f"{'startup (ms)':<28} {results['startup/pymtheg']:>8.1f}")
+    console.print("slowest imports by pymtheg (ms):")
+    for name, cumulative in sorted(imports.items(), key=lambda item: -item[1])[:8]:
+        console.print(f"  {name:<26} {cumulative / 1000:>8.1f}")
+
+    imported = [
+        name
+        for name in LAZY_MODULES
+        if any(line.split("|")[-1].strip() == name for line in stderr.splitlines())
+    ]
+    results["startup/lazy imports"] = len(imported)
+
+    if len(imported) > 0:
+        console.print(f"[red]imported on startup:[/] {', '.join(imported)}")
+
+    total = results["startup/pymtheg"]
+    limit = (
+        budget if budget is not None else results["startup/interpreter"] * budget_ratio
+    )
+    results["startup/budget"] = limit
+    console.print(
+        f"budget: {total:.1f}ms of {limit:.1f}ms"
+        + ("" if budget is not None else f" ({budget_ratio:g}x interpreter)")
+        + (", [green]ok[/]" if total <= limit else ", [red]over budget[/]")
+    )
+
+    return results
+
+
+def compare(
+    results: Dict[str, float],
+    previous: Dict[str, float],
+    threshold: float,
+    console: Console,
+) -> bool:
+    """
+    compares results against the results of a previous run, returning whether nothing
+    got slower by more than threshold percent
+    """
+    ok = True
+    console.print(f"\n{'result':<40} {'before':>10} {'after':>10} {'change':>9}")
+
+    for name, after in results.items():
+        if name not in previous:
+            continue
+
+        before = previous[name]
+        change = (after - before) / before * 100 if before > 0 else 0.0
+        slower = change > threshold
+        ok = ok and not slower
+
+        console.print(
+            f"{name:<40} {before:>10.3f} {after:>10.3f} "
+            + (f"[red]{change:>+8.1f}%[/]" if slower else f"{change:>+8.1f}%")
+        )
+
+    return ok
+
+
+def environment() -> Dict[str, str]:
+    """returns information about the benchmarking environment, saved with results"""
+    ffmpeg = subprocess.run(
+        ["ffmpeg", "-version"], capture_output=True, universal_newlines=True
+    ).stdout
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ffmpeg": ffmpeg.splitlines()[0] if ffmpeg else "",
+        "cpus": str(os.cpu_count()),
+    }
+
+
+def main() -> None:
+    """benchmark entry point"""
+    parser = ArgumentParser(prog="benchmark.py", description="offline pymtheg benchmarks")
+    parser.add_argument(
+        "benchmark",
+        choices=[
+            "probe",
+            "stages",
+            "encode",
+            "scale",
+            "energy",
+            "windows",
+            "e2e",
+            "startup",
+        ],
+        help="benchmark to run",
+    )
+    parser.add_argument(
+        "-n",
+        "--iterations",
+        type=int,
+        default=None,
+        help="iterations per measurement, defaults to 10 for probe and startup, else 3",
+    )
+    parser.add_argument(
+        "--fixtures",
+        type=Path,
+        default=None,
+        help="directory to generate fixtures in and reuse, defaults to a tmpdir",
+    )
+    parser.add_argument(
+        "--short", action="store_true", help="leave out multi-hour fixtures"
+    )
+    parser.add_argument(
+        "--songs",
+        type=lambda value: [int(count) for count in value.split(",")],
+        default=[1, 10, 100],
+        help="song counts to time end to end, defaults to 1,10,100",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="startup budget in milliseconds, exits non-zero if exceeded",
+    )
+    parser.add_argument(
+        "--budget-ratio",
+        type=float,
+        default=STARTUP_BUDGET_RATIO,
+        help=(
+            "startup budget as a multiple of bare interpreter startup, used without "
+            f"--budget, defaults to {STARTUP_BUDGET_RATIO:g}"
+        ),
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, default=None, help="file to save results to as json"
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        default=None,
+        help="results file of a previous run to compare against",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="percent slower than --compare results to fail at, defaults to 10",
+    )
+    args = parser.parse_args()
+    console = Console(highlight=False)
+    iterations: int = args.iterations or (
+        10 if args.benchmark in ("probe", "startup") else 3
+    )
+    ok = True
+
+    with TemporaryDirectory() as _tmpdir:
+        directory: Path = args.fixtures or Path(_tmpdir)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        if args.benchmark == "probe":
+            results = bench_probe(directory, iterations, console, args.short)
+
+        elif args.benchmark == "stages":
+            results = bench_stages(directory, iterations, console, args.short)
+
+        elif args.benchmark == "encode":
+            results = bench_encode(directory, iterations, console)
+
+        elif args.benchmark == "scale":
+            results = bench_scale(directory, iterations, console)
+
+        elif args.benchmark == "energy":
+            results = bench_energy(directory, iterations, console, args.short)
+
+        elif args.benchmark == "windows":
+            results = bench_windows(directory, iterations, console)
+
+        elif args.benchmark == "e2e":
+            results = bench_e2e(directory, iterations, console, args.songs)
+
+        else:
+            results = bench_startup(
+                directory, iterations, console, args.budget, args.budget_ratio
+            )
+            ok = (
+                results["startup/lazy imports"] == 0
+                and results["startup/pymtheg"] <= results["startup/budget"]
+            )
+
+    if args.compare is not None:
+        previous = loads(args.compare.read_text(encoding="utf-8"))
+        ok = compare(results, previous["results"], args.threshold, console) and ok
+
+    if args.output is not None:
+        args.output.write_text(
+            dumps(
+                {
+                    "benchmark": args.benchmark,
+                    "time": time(),
+                    "iterations": iterations,
+                    "environment": environment(),
+                    "results": results,
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -23,19 +23,60 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 For more information, please refer to <http://unlicense.org/>
 """
 
-from typing import Iterable, List, Literal, NamedTuple, Optional, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    ContextManager,
+    Callable,
+    Deque,
+    Dict,
+    IO,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+)
 
 from argparse import ArgumentParser, RawTextHelpFormatter
-from tempfile import TemporaryDirectory
-from datetime import datetime
-from base64 import b85decode
-from random import randint
+from collections import deque
+from tempfile import TemporaryDirectory, gettempdir, mkdtemp
+from contextlib import ExitStack, contextmanager, nullcontext
+from threading import (
+    Condition,
+    Event,
+    Lock,
+    RLock,
+    Thread,
+    current_thread,
+    get_ident,
+    local,
+)
+from functools import lru_cache, partial
 from pathlib import Path
-from shutil import move
-from json import loads
+from urllib.parse import parse_qs, urlparse
+from shutil import copyfile, copyfileobj, disk_usage, move, rmtree
+from json import dumps, loads
+from time import perf_counter, sleep, time
 import subprocess
+import struct
+import sys
+import os
+import re
 
-from rich.console import Console
+# rich, and modules only needed by some modes or paths (e.g. serve, manifests, caching),
+# are imported where they are used to keep startup fast, see `python benchmark.py startup`
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+    from queue import Queue
+    from rich.console import Console
 
 
 FFARGS: str = (
@@ -46,11 +87,291 @@ OUT: str = "{artists} - {title}"
 TIMESTAMP_FORMAT: str = " ({cs}{cer})"
 CLIP_START: str = "0"
 CLIP_END: str = "+15"
+COVER_LOOP_FILTER: str = "loop=loop=-1:size=1:start=0,setpts=N/({rate}*TB),fps={rate}"
+COVER_FRAME_RATE: str = "25"
+
+# with -ms, --max-size, covers are downscaled once to fit within that many pixels before
+# being encoded, keeping their aspect ratio with even dimensions. covers that already fit
+# are only rounded down to even dimensions. MAX_SIZE is the default, 0 for no limit, so
+# that covers are encoded at their own size unless asked otherwise
+MAX_SIZE: int = 0
+COVER_SCALE_FILTER: str = (
+    "scale=w='if(gte(iw,ih),trunc(min(iw,{size})/2)*2,-2)'"
+    ":h='if(gte(iw,ih),-2,trunc(min(ih,{size})/2)*2)':flags=lanczos"
+)
+
+# "^" clip starts are found in an rms envelope of the song, decoded at a low sample rate
+ENERGY_SAMPLE_RATE: int = 8000
+ENERGY_FRAME_RATE: int = 10
+ENERGY_ONSET_WEIGHT: float = 0.5
+PIPE_CHUNK_SIZE: int = 64 * 1024
+
+# programs are killed after going this many seconds without writing any output (ffmpeg
+# writes its progress as clips are created), see -dt and -et
+DOWNLOAD_TIMEOUT: float = 600
+ENCODE_TIMEOUT: float = 600
+KILL_GRACE: float = 5
+OUTPUT_LIMIT: int = 1024 * 1024
+
+# watched songs, and songs spotDL reports as downloaded while it is still downloading
+# others, are clipped once their size and modification time haven't changed for
+# WATCH_SETTLE seconds. without inotify, directories are polled every WATCH_INTERVAL
+WATCH_SETTLE: float = 2
+WATCH_INTERVAL: float = 5
+
+# songs whose programs failed are retried after this many seconds, doubled for every
+# retry, see -rt and -rb
+RETRY_BACKOFF: float = 2
+
+# ffmpeg arguments added to FFARGS by encode profile, see -pe, --profile-encode. looped
+# covers are read and encoded at the -r frame rate, so a low one saves most of the work
+ENCODE_PROFILES: Dict[str, str] = {
+    "compatible": "",
+    "fast": "-preset ultrafast -r 1 -g 300",
+    "balanced": "-preset veryfast -r 2 -g 300 -crf 23",
+    "small": "-b:a 96k -preset veryslow -r 1 -g 300 -crf 34",
+    "audio": "-b:a 256k -preset veryfast -r 1 -g 300 -crf 30",
+}
+AUDIO_CODEC_OPTIONS: Tuple[str, ...] = ("-c:a", "-acodec", "-codec:a")
+AUDIO_FILTER_OPTIONS: Tuple[str, ...] = ("-af", "-filter:a")
+AUDIO_ENCODE_OPTIONS: Tuple[str, ...] = ("-b:a", "-ab", "-q:a", "-aq", "-ar", "-ac")
+VIDEO_OPTIONS: Tuple[str, ...] = (
+    "-c:v",
+    "-vcodec",
+    "-codec:v",
+    "-vf",
+    "-filter:v",
+    "-pix_fmt",
+    "-tune",
+    "-preset",
+    "-crf",
+    "-profile:v",
+    "-level",
+    "-g",
+    "-r",
+    "-b:v",
+    "-maxrate",
+    "-bufsize",
+    "-x264-params",
+    "-x264opts",
+    "-s",
+    "-aspect",
+)
+SPOTDL_DONE: Tuple[str, ...] = ("Downloaded", "Skipping")
+SONG_SUFFIXES: Tuple[str, ...] = (".m4a", ".ogg", ".flac", ".mp3", ".wav", ".opus")
+
+# audio codec names of ffmpeg encoders
+ENCODER_CODECS: Dict[str, str] = {
+    "aac": "aac",
+    "libfdk_aac": "aac",
+    "libmp3lame": "mp3",
+    "libopus": "opus",
+    "opus": "opus",
+    "libvorbis": "vorbis",
+    "vorbis": "vorbis",
+    "flac": "flac",
+    "alac": "alac",
+}
+
+# audio codecs that can be stream copied into a container, by file extension
+CONTAINER_CODECS: Dict[str, Tuple[str, ...]] = {
+    "mp4": ("aac", "mp3", "alac"),
+    "m4v": ("aac", "mp3", "alac"),
+    "mov": ("aac", "mp3", "alac"),
+    "mkv": ("aac", "mp3", "alac", "opus", "vorbis", "flac"),
+    "webm": ("opus", "vorbis"),
+}
+
+STORE_INDEX: str = ".pymtheg-store.json"
+BUILD_INDEX: str = ".pymtheg-build.json"
+WATCH_INDEX: str = ".pymtheg-watch.json"
+MANIFEST_FIELDS: Tuple[str, ...] = ("query", "start", "end", "out")
+MANIFEST_DONE: Tuple[str, ...] = ("processed", "skipped", "invalid")
+SERVE_JOB_LIMIT: int = 1000
+PROFILE_PERCENTILES: Tuple[int, ...] = (50, 90, 99)
+MARKUP_TAG: "re.Pattern[str]" = re.compile(r"(\\*)\[([a-z#/@][^[]*?)]")
+PROBE_CACHE_LIMIT: int = 10000
+ENVELOPE_CACHE_LIMIT: int = 32 * 1024 * 1024
+COVER_CACHE_LIMIT: int = 256 * 1024 * 1024
+VIDEO_CACHE_LIMIT: int = 512 * 1024 * 1024
+WORKDIR_RAM: Path = Path("/dev/shm")
+WORKDIR_MIN_FREE: int = 256 * 1024 * 1024
+
+# audio codec names of mp4 sample entry formats, "mp4a" is checked further
+MP4_CODECS: Dict[bytes, str] = {
+    b"mp4a": "aac",
+    b"alac": "alac",
+    b"Opus": "opus",
+    b"fLaC": "flac",
+    b".mp3": "mp3",
+}
+
+# mp3 layer iii bitrates in kbps by bitrate index, for mpeg 1 and mpeg 2/2.5
+MP3_BITRATES: Tuple[Tuple[int, ...], ...] = (
+    (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+)
+
+# mp3 sample rates by version (3: mpeg 1, 2: mpeg 2, 0: mpeg 2.5) and rate index
+MP3_SAMPLE_RATES: Dict[int, Tuple[int, ...]] = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+
+# ffmpeg codec names of wav format tags and bits per sample
+WAV_CODECS: Dict[Tuple[int, int], str] = {
+    (1, 8): "pcm_u8",
+    (1, 16): "pcm_s16le",
+    (1, 24): "pcm_s24le",
+    (1, 32): "pcm_s32le",
+    (3, 32): "pcm_f32le",
+    (3, 64): "pcm_f64le",
+}
 
 premsg_info = "[dim]pymtheg: [/dim][bold cyan]info[/bold cyan][dim]:[/]"
 premsg_error = "[dim]pymtheg: [/dim][bold red]error[/bold red][dim]:[/]"
 
 
+class PymthegError(Exception):
+    """base class of errors raised by pymtheg"""
+
+
+class InvocationError(PymthegError):
+    """
+    raised when a program could not be invocated or returned non-zero
+
+    message: str
+        error message
+    invocation: List[str]
+        program and arguments invocated
+    returncode: Optional[int] = None
+        exit code of the program, or None if it could not be invocated
+    stdout: str = ""
+        captured stdout of the program, if captured
+    stderr: str = ""
+        captured stderr of the program, if captured
+    errcode: int = -1
+        exit code for the command line to use if the program could not be invocated
+    """
+
+    def __init__(
+        self,
+        message: str,
+        invocation: List[str],
+        returncode: Optional[int] = None,
+        stdout: str = "",
+        stderr: str = "",
+        errcode: int = -1,
+    ) -> None:
+        super().__init__(message)
+        self.invocation = invocation
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.errcode = errcode
+
+
+class ProbeError(PymthegError):
+    """raised when a song could not be probed"""
+
+
+class TimestampError(PymthegError):
+    """raised when clip timestamps are invalid, or are not within a songs duration"""
+
+
+class LazyConsole:
+    """
+    console for printing rich markup, printing plain text with markup stripped unless
+    output is a terminal, so that rich is only imported when its colours and status
+    spinners can actually be shown
+
+    terminal: Optional[bool] = None
+        whether to print with rich, defaults to whether stdout is a terminal
+    """
+
+    def __init__(self, terminal: Optional[bool] = None) -> None:
+        self.terminal = sys.stdout.isatty() if terminal is None else terminal
+        self._rich: Optional["Console"] = None
+        self._lock = Lock()
+
+    def rich(self) -> "Console":
+        """returns the rich console, importing rich if needed"""
+        with self._lock:
+            if self._rich is None:
+                from rich.console import Console
+
+                self._rich = Console()
+
+        return self._rich
+
+    def print(
+        self,
+        *objects: object,
+        end: str = "\n",
+        markup: bool = True,
+        emoji: bool = True,
+        highlight: bool = True,
+    ) -> None:
+        """prints objects, see rich.console.Console.print()"""
+        if self.terminal:
+            self.rich().print(
+                *objects, end=end, markup=markup, emoji=emoji, highlight=highlight
+            )
+            return
+
+        text = " ".join(str(obj) for obj in objects)
+        sys.stdout.write((strip_markup(text) if markup else text) + end)
+        sys.stdout.flush()
+
+    def status(self, status: str, spinner: str = "arc") -> Any:
+        """
+        returns a status spinner context manager, or one that does nothing if output
+        is not a terminal, see rich.console.Console.status()
+        """
+        if self.terminal:
+            return self.rich().status(status, spinner=spinner)
+
+        return NoStatus()
+
+    def print_exception(self) -> None:
+        """prints the exception being handled, see rich.console.Console.print_exception()"""
+        if self.terminal:
+            self.rich().print_exception()
+        else:
+            from traceback import print_exc
+
+            print_exc(file=sys.stdout)
+
+
+class NoStatus:
+    """status spinner that does nothing, see LazyConsole.status()"""
+
+    def __enter__(self) -> "NoStatus":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        pass
+
+    def update(self, *_: object, **__: object) -> None:
+        """does nothing"""
+
+
+def strip_markup(text: str) -> str:
+    """removes rich markup tags from text, keeping escaped brackets as-is"""
+
+    def replace(match: "re.Match[str]") -> str:
+        backslashes, tag = match.group(1), match.group(2)
+
+        # an odd number of backslashes escapes the tag
+        if len(backslashes) % 2 == 1:
+            return backslashes[:-1] + f"[{tag}]"
+
+        return backslashes
+
+    return MARKUP_TAG.sub(replace, text)
+
+
 class Timestamp(NamedTuple):
     """
     timestamp named tuple
@@ -63,422 +384,4718 @@ class Timestamp(NamedTuple):
         is timestamp random
     relative: bool = False
         is timestamp relative
+    energetic: bool = False
+        is timestamp the start of the most energetic part of a song
     """
 
     type: Union[Literal[0], Literal[1]]
     ss: int
     random: bool = False
     relative: bool = False
+    energetic: bool = False
 
     def __str__(self) -> str:
+        if self.energetic:
+            return "^"
         return "*" if self.random else (("+" if self.relative else "") + str(self.ss))
 
 
-class Behaviour(NamedTuple):
-    """typed command line argument tuple"""
+class SongInfo(NamedTuple):
+    """
+    probed song information named tuple
 
-    song_queries: List[str]
-    song_paths: List[Path]
-    dir: Path
-    out: str
-    save_music: bool
-    save_music_dir: Path
-    no_timestamp: bool
-    timestamp_format: str
-    ext: str
-    sdargs: List[str]
-    ffargs: List[str]
-    clip_start: Timestamp
-    clip_end: Timestamp
-    image: Optional[Path]
-    use_defaults: bool
-    yes: bool
+    duration: int
+        song duration in seconds
+    codec: str
+        codec name of the first audio stream, e.g. "aac"
+    cover: bool
+        whether the song has an attached picture (album cover)
+    """
 
+    duration: int
+    codec: str
+    cover: bool
 
-def main() -> None:
-    """pymtheg entry point"""
-    console = Console()
-    bev = get_args(console)
 
-    # make tempdir
-    with TemporaryDirectory() as _tmpdir:
-        tmpdir = Path(_tmpdir)
+class ProbeCache:
+    """
+    persistent song probe cache backed by sqlite, entries are keyed by the absolute path,
+    size, modification time and inode of a song so that changed songs are probed again
+
+    path: Path
+        path to cache database
+    limit: int = PROBE_CACHE_LIMIT
+        maximum number of probes, least recently used probes are evicted first
+    envelope_limit: int = ENVELOPE_CACHE_LIMIT
+        maximum size of energy envelopes in bytes, as they are much larger than probes,
+        least recently used envelopes are evicted first
+    """
 
-        # download songs
-        stdout: str = ""
-        stderr: str = ""
-        if len(bev.song_queries) > 0:
-            with console.status(f"[dim]downloading songs...[/]", spinner="arc"):
-                spotdl_proc = invocate(
-                    console=console,
-                    name="spotdl",
-                    args=bev.song_queries
-                    + ["--path-template", f"{bev.out}.{{ext}}"]
-                    + bev.sdargs,
-                    cwd=tmpdir,
-                    errcode=2,
-                    capture_output=True,
+    def __init__(
+        self,
+        path: Path,
+        limit: int = PROBE_CACHE_LIMIT,
+        envelope_limit: int = ENVELOPE_CACHE_LIMIT,
+    ) -> None:
+        import sqlite3
+
+        self.limit = limit
+        self.envelope_limit = envelope_limit
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._db = sqlite3.connect(
+            str(path), timeout=10, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS probes ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, inode INTEGER, "
+            "duration INTEGER, codec TEXT, cover INTEGER, used REAL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS envelopes ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, inode INTEGER, "
+            "rate INTEGER, envelope BLOB, used REAL)"
+        )
+
+    @staticmethod
+    def key(song_path: Path) -> Tuple[str, int, int, int]:
+        """returns the cache key of a song, (absolute path, size, mtime, inode)"""
+        stat = song_path.stat()
+        return (str(song_path.absolute()), stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+    def get(self, song_path: Path) -> Optional[SongInfo]:
+        """returns cached song information, or None if not cached or outdated"""
+        path, size, mtime, inode = self.key(song_path)
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT duration, codec, cover FROM probes "
+                "WHERE path = ? AND size = ? AND mtime = ? AND inode = ?",
+                (path, size, mtime, inode),
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._db.execute("UPDATE probes SET used = ? WHERE path = ?", (time(), path))
+
+        return SongInfo(duration=row[0], codec=row[1], cover=bool(row[2]))
+
+    def put(self, song_path: Path, info: SongInfo) -> None:
+        """caches song information, evicting least recently used entries over the limit"""
+        path, size, mtime, inode = self.key(song_path)
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, size, mtime, inode, info.duration, info.codec, info.cover, time()),
+            )
+            self._db.execute(
+                "DELETE FROM probes WHERE path IN (SELECT path FROM probes "
+                "ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.limit,),
+            )
+
+    def get_envelope(self, song_path: Path) -> Optional[List[float]]:
+        """returns a cached energy envelope, or None if not cached or outdated"""
+        from array import array
+
+        path, size, mtime, inode = self.key(song_path)
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT envelope FROM envelopes "
+                "WHERE path = ? AND size = ? AND mtime = ? AND inode = ? AND rate = ?",
+                (path, size, mtime, inode, ENERGY_FRAME_RATE),
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            self._db.execute(
+                "UPDATE envelopes SET used = ? WHERE path = ?", (time(), path)
+            )
+
+        envelope = array("f")
+        envelope.frombytes(row[0])
+        return envelope.tolist()
+
+    def put_envelope(self, song_path: Path, envelope: List[float]) -> None:
+        """
+        caches an energy envelope, evicting least recently used envelopes while their
+        total size is over the envelope limit
+        """
+        from array import array
+
+        path, size, mtime, inode = self.key(song_path)
+        data = array("f", envelope).tobytes()
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO envelopes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, size, mtime, inode, ENERGY_FRAME_RATE, data, time()),
+            )
+            (total,) = self._db.execute(
+                "SELECT COALESCE(SUM(LENGTH(envelope)), 0) FROM envelopes"
+            ).fetchone()
+
+            if total <= self.envelope_limit:
+                return
+
+            evicted: List[Tuple[str]] = []
+            for used_path, length in self._db.execute(
+                "SELECT path, LENGTH(envelope) FROM envelopes ORDER BY used"
+            ).fetchall():
+                if total <= self.envelope_limit:
+                    break
+                evicted.append((used_path,))
+                total -= length
+
+            self._db.executemany("DELETE FROM envelopes WHERE path = ?", evicted)
+
+
+_probe_cache: Optional[ProbeCache] = None
+_probe_cache_lock = Lock()
+
+
+def get_probe_cache() -> Optional[ProbeCache]:
+    """returns the process-wide probe cache, or None if it could not be opened"""
+    global _probe_cache
+    import sqlite3
+
+    with _probe_cache_lock:
+        if _probe_cache is None:
+            try:
+                _probe_cache = ProbeCache(cache_dir().joinpath("probes.sqlite3"))
+            except (OSError, sqlite3.Error):
+                return None
+
+    return _probe_cache
+
+
+class Span(NamedTuple):
+    """
+    profiled span named tuple, see Profiler
+
+    name: str
+        song name, stage or program name
+    category: str
+        "song", "stage" or "invocation"
+    song: str
+        name of the song the span belongs to, or "" if none
+    thread: str
+        name of the thread the span ran in
+    start: float
+        seconds since profiling started
+    duration: float
+        wall time in seconds
+    cpu: float
+        cpu time (user and system) of invocated programs in seconds
+    rss: int
+        peak resident set size of invocated programs in bytes
+    """
+
+    name: str
+    category: str
+    song: str
+    thread: str
+    start: float
+    duration: float
+    cpu: float
+    rss: int
+
+
+class Profiler:
+    """
+    collects spans of songs, their stages and program invocations along with the cpu
+    time and peak memory usage of invocated programs, see -tr, --trace
+    """
+
+    def __init__(self) -> None:
+        self.start = perf_counter()
+        self.spans: List[Span] = []
+        self._lock = Lock()
+        self._local = local()
+
+    @contextmanager
+    def span(self, name: str, category: str) -> Iterator[Dict[str, float]]:
+        """
+        times a span, yielding a dictionary to set the cpu time ("cpu") and peak resident
+        set size ("rss") of an invocated program in. both are totalled (rss as a maximum)
+        into the span enclosing it on the same thread
+        """
+        stack: List[Dict[str, float]] = self._local.__dict__.setdefault("stack", [])
+        song: str = getattr(self._local, "song", "")
+        usage = {"cpu": 0.0, "rss": 0.0}
+
+        if category == "song":
+            self._local.song = name
+
+        stack.append(usage)
+        start = perf_counter()
+
+        try:
+            yield usage
+
+        finally:
+            end = perf_counter()
+            stack.pop()
+            self._local.song = song
+
+            if len(stack) > 0:
+                stack[-1]["cpu"] += usage["cpu"]
+                stack[-1]["rss"] = max(stack[-1]["rss"], usage["rss"])
+
+            with self._lock:
+                self.spans.append(
+                    Span(
+                        name=name,
+                        category=category,
+                        song=name if category == "song" else song,
+                        thread=current_thread().name,
+                        start=start - self.start,
+                        duration=end - start,
+                        cpu=usage["cpu"],
+                        rss=int(usage["rss"]),
+                    )
                 )
-                stdout = spotdl_proc.stdout
-                stderr = spotdl_proc.stderr
 
-        # process songs
-        processed = 0
+    def trace(self) -> Dict[str, object]:
+        """
+        returns the spans as a chrome trace event file, which can be opened with
+        chrome://tracing or https://ui.perfetto.dev
+        """
+        with self._lock:
+            spans = list(self.spans)
+
+        pid = os.getpid()
+        threads = {
+            name: tid for tid, name in enumerate(dict.fromkeys(s.thread for s in spans))
+        }
+        events: List[Dict[str, object]] = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for name, tid in threads.items()
+        ]
+
+        for span in sorted(spans, key=lambda span: span.start):
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round(span.start * 1e6),
+                    "dur": round(span.duration * 1e6),
+                    "pid": pid,
+                    "tid": threads[span.thread],
+                    "args": {
+                        "song": span.song,
+                        "cpu_ms": round(span.cpu * 1000, 3),
+                        "peak_rss_mib": round(span.rss / 1024 / 1024, 3),
+                    },
+                }
+            )
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def summary(self) -> List[Tuple[str, List[Span]]]:
+        """
+        returns spans grouped by category and name, with every song grouped as "song",
+        in order of songs, stages and invocations
+        """
+        groups: Dict[Tuple[int, str], List[Span]] = {}
+        order = {"song": 0, "stage": 1, "invocation": 2}
+
+        with self._lock:
+            for span in self.spans:
+                name = "song" if span.category == "song" else span.name
+                groups.setdefault((order.get(span.category, 3), name), []).append(span)
+
+        return [(name, groups[(rank, name)]) for rank, name in sorted(groups)]
+
+
+_profiler: Optional[Profiler] = None
+
+
+def profile(name: str, category: str) -> ContextManager[Optional[Dict[str, float]]]:
+    """
+    returns a profiled span (see Profiler.span()) if profiling, else a no-op context
+    manager yielding None
+
+    name: str
+        song name, stage or program name
+    category: str
+        "song", "stage" or "invocation"
+    """
+    return nullcontext() if _profiler is None else _profiler.span(name, category)
+
+
+def percentile(values: List[float], percent: int) -> float:
+    """returns the nearest-rank percentile of a non-empty list of values"""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, -(-len(ordered) * percent // 100) - 1))]
+
+
+class ThreadBudget:
+    """
+    process-wide budget of cpus for ffmpeg encodes, so that concurrent clips share the
+    cpus instead of each encode starting threads for all of them. at most one encode
+    per cpu (or per worker, if fewer) runs at once, each given an equal share of threads
+
+    cpus: int
+        number of cpus to use
+    workers: int = 1
+        number of songs processed at once, e.g. -j, --jobs
+    """
+
+    def __init__(self, cpus: int, workers: int = 1) -> None:
+        self.cpus = max(1, cpus)
+        self.slots = max(1, min(workers, self.cpus))
+        self.threads = max(1, self.cpus // self.slots)
+        self.running = 0
+        self._condition = Condition()
+
+    @contextmanager
+    def encode(self) -> Iterator[int]:
+        """
+        waits for an encode slot, yielding the number of threads the encode may use, to
+        be passed to ffmpeg as -filter_threads and as an output option, -threads. ffargs
+        placed after them take precedence
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.running < self.slots)
+            self.running += 1
+
+        try:
+            yield self.threads
+
+        finally:
+            with self._condition:
+                self.running -= 1
+                self._condition.notify()
+
+
+_thread_budget: Optional[ThreadBudget] = None
+_thread_budget_lock = Lock()
+
+
+def get_thread_budget() -> ThreadBudget:
+    """
+    returns the process-wide thread budget, of every available cpu for one song at a time
+    unless set with set_thread_budget()
+    """
+    global _thread_budget
+
+    with _thread_budget_lock:
+        if _thread_budget is None:
+            _thread_budget = ThreadBudget(available_cpus())
+
+    return _thread_budget
+
+
+def set_thread_budget(cpus: Optional[int], workers: int) -> None:
+    """
+    sets the process-wide thread budget
+
+    cpus: Optional[int]
+        number of cpus to use, or None for every available cpu (see available_cpus())
+    workers: int
+        number of songs processed at once
+    """
+    global _thread_budget
+
+    with _thread_budget_lock:
+        _thread_budget = ThreadBudget(cpus or available_cpus(), workers)
+
+
+@lru_cache(maxsize=None)
+def available_cpus() -> int:
+    """
+    returns the number of cpus pymtheg may use, respecting its cpu affinity and cgroup
+    cpu quota (e.g. of a container)
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on every platform
+        cpus = os.cpu_count() or 1
+
+    quota = cgroup_cpu_quota()
+
+    if quota is not None:
+        cpus = min(cpus, quota)
+
+    return max(1, cpus)
+
+
+def cgroup_cpu_quota() -> Optional[int]:
+    """
+    returns the cpu quota of the cgroup (v2, or v1) pymtheg is in, rounded up to whole
+    cpus, or None if there is none or it can't be read
+    """
+    try:
+        # cgroup v2, the unified hierarchy, is listed as "0::<path>"
+        paths = [
+            Path("/sys/fs/cgroup" + line[3:].strip(), "cpu.max")
+            for line in Path("/proc/self/cgroup").read_text().splitlines()
+            if line.startswith("0::")
+        ]
+    except OSError:
+        paths = []
+
+    for path in paths + [Path("/sys/fs/cgroup/cpu.max")]:
+        try:
+            quota, period = path.read_text().split()[:2]
+        except (OSError, ValueError):
+            continue
+
+        if quota == "max":
+            return None
+
+        return -(-int(quota) // int(period))
+
+    try:
+        quota = Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text().strip()
+        period = Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text().strip()
+    except OSError:
+        return None
+
+    if int(quota) <= 0:  # -1 if unlimited
+        return None
+
+    return -(-int(quota) // int(period))
+
+
+class MusicStore:
+    """
+    persistent downloaded music store, songs are saved into a directory with their spotDL
+    names and indexed by track identity (see track_key()) in an index file, so that
+    repeat queries are served from disk without invoking spotDL. identical songs
+    (by sha256) share a single file
+
+    directory: Path
+        directory to save songs to, the index file (STORE_INDEX) is kept here
+    limit: int = 0
+        size limit in bytes, least recently used songs are evicted first. 0 for no limit
+    """
+
+    def __init__(self, directory: Path, limit: int = 0) -> None:
+        self.directory = directory
+        self.limit = limit
+        self.index_path = directory.joinpath(STORE_INDEX)
+        self.tracks: Dict[str, Dict[str, Union[str, int, float]]] = {}
+
+        try:
+            self.tracks = loads(self.index_path.read_text(encoding="utf-8"))["tracks"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def save(self) -> None:
+        """atomically writes the index file"""
+        partial_path = self.index_path.with_name(f"{STORE_INDEX}.{os.getpid()}")
+        partial_path.write_text(
+            dumps({"version": 1, "tracks": self.tracks}, indent=2), encoding="utf-8"
+        )
+        os.replace(partial_path, self.index_path)
+
+    def get(self, key: str) -> Optional[Path]:
+        """returns the path of a stored song, or None if not stored or missing"""
+        track = self.tracks.get(key)
+
+        if track is None:
+            return None
+
+        path = self.directory.joinpath(str(track["file"]))
+
+        if not path.is_file() or path.stat().st_size != track["size"]:
+            del self.tracks[key]
+            return None
+
+        track["used"] = time()
+        return path
+
+    def put(self, key: str, song_path: Path) -> Path:
+        """
+        stores a downloaded song, returning its path in the store. a song identical to
+        an already stored song reuses the stored file
+        """
+        digest = file_hash(song_path)
+        size = song_path.stat().st_size
+        name = next(
+            (
+                str(track["file"])
+                for track in self.tracks.values()
+                if track["sha256"] == digest
+                and self.directory.joinpath(str(track["file"])).is_file()
+            ),
+            None,
+        )
+
+        if name is None:
+            name = self.copy(song_path).name
+
+        self.tracks[key] = {"file": name, "sha256": digest, "size": size, "used": time()}
+        return self.directory.joinpath(name)
+
+    def copy(self, song_path: Path) -> Path:
+        """
+        copies a song into the store directory without indexing it, returns its path.
+        a different song with the same name is not overwritten
+        """
+        digest = file_hash(song_path)
+        path = self.directory.joinpath(song_path.name)
+        count = 1
+
+        while path.exists() and file_hash(path) != digest:
+            path = self.directory.joinpath(
+                f"{song_path.stem} ({count}){song_path.suffix}"
+            )
+            count += 1
+
+        if not path.exists():
+            partial_path = path.with_name(f".{path.name}.{os.getpid()}.partial")
+            copyfile(song_path, partial_path)
+            os.replace(partial_path, path)
+
+        return path
+
+    def evict(self) -> List[Path]:
+        """
+        deletes least recently used songs until the store is under its size limit,
+        returns deleted paths
+        """
+        deleted: List[Path] = []
+
+        if self.limit <= 0:
+            return deleted
+
+        files: Dict[str, Tuple[float, int]] = {}
+        for track in self.tracks.values():
+            used, size = files.get(str(track["file"]), (0.0, 0))
+            files[str(track["file"])] = (
+                max(used, float(track["used"])),
+                int(track["size"]),
+            )
+
+        total = sum(size for _, size in files.values())
+
+        for name, (_, size) in sorted(files.items(), key=lambda item: item[1][0]):
+            if total <= self.limit:
+                break
+
+            self.remove(name)
+            deleted.append(self.directory.joinpath(name))
+            total -= size
+
+        return deleted
+
+    def verify(self) -> Tuple[int, List[str]]:
+        """
+        checks every stored song against its recorded sha256, pruning missing or
+        mismatched songs from the store
+
+        returns number of verified songs and keys of pruned songs
+        """
+        verified = 0
+        pruned: List[str] = []
+        digests: Dict[str, Optional[str]] = {}
+
+        for key, track in list(self.tracks.items()):
+            name = str(track["file"])
+
+            if name not in digests:
+                path = self.directory.joinpath(name)
+                digests[name] = file_hash(path) if path.is_file() else None
+
+            if digests[name] == track["sha256"]:
+                verified += 1
+
+            else:
+                pruned.append(key)
+                self.remove(name)
+
+        return verified, pruned
+
+    def remove(self, name: str) -> None:
+        """removes a stored song file and every index entry referring to it"""
+        for key in [key for key, track in self.tracks.items() if track["file"] == name]:
+            del self.tracks[key]
+
+        try:
+            os.remove(self.directory.joinpath(name))
+        except OSError:
+            pass
+
+
+class BuildCache:
+    """
+    index of the clips created in a directory by their fingerprint (see
+    clip_fingerprint()) in an index file, so that clips already created from the same
+    song, timestamps and options are skipped instead of being created again. songs are
+    only hashed again if their path, size or modification time changed
+
+    directory: Path
+        directory of the clips, the index file (BUILD_INDEX) is kept here
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.index_path = directory.joinpath(BUILD_INDEX)
+        self.clips: Dict[str, Dict[str, Any]] = {}
+        self._lock = Lock()
+
+        try:
+            self.clips = loads(self.index_path.read_text(encoding="utf-8"))["clips"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def save(self) -> None:
+        """atomically writes the index file"""
+        with self._lock:
+            partial_path = self.index_path.with_name(
+                f"{BUILD_INDEX}.{os.getpid()}.{get_ident()}"
+            )
+            partial_path.write_text(
+                dumps({"version": 1, "clips": self.clips}, indent=2), encoding="utf-8"
+            )
+            os.replace(partial_path, self.index_path)
+
+    def source_hash(self, clip_path: Path, song_path: Path) -> str:
+        """
+        returns the sha256 hash of the song of a clip, as recorded when the clip was
+        created if the song is unchanged since
+        """
+        clip = self.clips.get(clip_path.name, {})
+
+        if clip.get("source") == file_stat(song_path):
+            return str(clip["source_sha256"])
+
+        return file_hash(song_path)
+
+    def fresh(self, clip_path: Path, fingerprint: str) -> bool:
+        """returns whether a clip was created with a fingerprint and is unchanged since"""
+        clip = self.clips.get(clip_path.name)
+
+        if clip is None or clip.get("fingerprint") != fingerprint:
+            return False
+
+        try:
+            return clip.get("clip") == file_stat(clip_path)
+        except OSError:
+            return False
+
+    def put(self, clip_path: Path, fingerprint: str, song_path: Path) -> None:
+        """indexes a created clip"""
+        with self._lock:
+            self.clips[clip_path.name] = {
+                "fingerprint": fingerprint,
+                "clip": file_stat(clip_path),
+                "source": file_stat(song_path),
+                "source_sha256": file_hash(song_path),
+            }
+
+
+_build_caches: Dict[Path, BuildCache] = {}
+_build_caches_lock = Lock()
+
+
+def get_build_cache(directory: Path) -> BuildCache:
+    """returns the process-wide build cache of a directory, loading it if needed"""
+    directory = directory.absolute()
+
+    with _build_caches_lock:
+        if directory not in _build_caches:
+            _build_caches[directory] = BuildCache(directory)
+
+        return _build_caches[directory]
+
+
+def clip_fingerprint(job: "ClipJob", source_hash: str, start: int, end: int) -> str:
+    """
+    returns the fingerprint of a clip, the sha256 hash of everything its content depends
+    on: its song (by hash), timestamps, clip creation arguments, custom image (by hash),
+    maximum cover size and extension
+
+    job: ClipJob
+        clip job, for its clip creation options
+    source_hash: str
+        sha256 hash of the song, see BuildCache.source_hash()
+    start: int
+        clip start in seconds
+    end: int
+        clip end in seconds
+    """
+    from hashlib import sha256
+
+    return sha256(
+        dumps(
+            [
+                source_hash,
+                start,
+                end,
+                list(job.ffargs),
+                job.stream_copy,
+                None if job.image is None else file_hash(job.image),
+                job.max_size,
+                job.ext,
+            ]
+        ).encode()
+    ).hexdigest()
+
+
+def clip_up_to_date(
+    job: "ClipJob", song_path: Path, start: int, end: int, out_path: Path
+) -> bool:
+    """
+    returns whether a clip was already created with the same fingerprint, see
+    BuildCache. always False if the job is forced to create its clips
+    """
+    if job.force or not out_path.exists():
+        return False
+
+    cache = get_build_cache(out_path.parent)
+    return cache.fresh(
+        out_path,
+        clip_fingerprint(job, cache.source_hash(out_path, song_path), start, end),
+    )
+
+
+def track_key(query: str) -> Optional[str]:
+    """
+    returns the track identity of a query, e.g. "spotify:track:<id>" or "youtube:<id>", or
+    None if the query does not refer to a single track (text queries, albums, playlists)
+
+    query: str
+        song query (see querying)
+    """
+    if "|" in query:
+        keys = [track_key(part) for part in query.split("|")]
+        return "|".join(key for key in keys if key) if all(keys) else None
+
+    url = urlparse(query.strip())
+    host = url.netloc.lower()
+    parts = [part for part in url.path.split("/") if part != ""]
+
+    for prefix in ("www.", "m.", "music."):
+        if host.startswith(prefix):
+            host = host[len(prefix) :]
+
+    if host == "open.spotify.com":
+        if len(parts) > 0 and parts[0].startswith("intl-"):
+            parts = parts[1:]
+
+        if len(parts) >= 2 and parts[0] == "track":
+            return f"spotify:track:{parts[1]}"
+
+    elif host == "youtube.com" and url.path == "/watch":
+        video = parse_qs(url.query).get("v")
+
+        if video:
+            return f"youtube:{video[0]}"
+
+    elif host == "youtu.be" and len(parts) == 1:
+        return f"youtube:{parts[0]}"
+
+    return None
+
+
+class ClipResult(NamedTuple):
+    """
+    clip result named tuple
+
+    path: Path
+        path to the created clip
+    song: Path
+        path to the song the clip was created from, songs downloaded by ClipJob.run()
+        are deleted once it returns
+    start: int
+        clip start in seconds
+    end: int
+        clip end in seconds
+    audio_copied: bool
+        whether the songs audio was stream copied instead of transcoded
+    cached: bool = False
+        whether the clip was already created with the same fingerprint and was skipped,
+        see BuildCache
+    """
+
+    path: Path
+    song: Path
+    start: int
+    end: int
+    audio_copied: bool
+    cached: bool = False
+
+
+class ClipJob(NamedTuple):
+    """
+    clip job named tuple, for using pymtheg from python without its command line
+
+    source: Union[str, Path]
+        path to a song, or a song query to download with spotDL (see querying)
+    clip_start: Union[str, Timestamp, Tuple[Timestamp, ...]] = CLIP_START
+        clip start, e.g. "1:02", "*" or "^", or a comma-separated list of them to create
+        a clip of each, e.g. "0:30,1:10,2:00"
+    clip_end: Union[str, Timestamp, Tuple[Timestamp, ...]] = CLIP_END
+        clip end, e.g. "+15" or "-10", or a list of them paired with clip starts
+    dir: Path = Path("")
+        directory to output to
+    name: Optional[str] = None
+        output file name (without timestamp or extension), defaults to the songs name
+    timestamp_format: Optional[str] = TIMESTAMP_FORMAT
+        timestamp format appended to output file names, None for no timestamp
+    ext: str = "mp4"
+        clip file extension
+    ffargs: Tuple[str, ...] = tuple(FFARGS.split())
+        ffmpeg arguments for clip creation, e.g. tuple(encode_profile("fast").split())
+    out: str = OUT
+        spotDL file name format for downloaded songs
+    sdargs: Tuple[str, ...] = ()
+        additional spotDL arguments
+    image: Optional[Path] = None
+        custom image to use instead of the album cover
+    single_pass: bool = False
+        see -sp, --single-pass
+    stream_copy: bool = True
+        stream copy audio if possible, see -nsc, --no-stream-copy
+    probe_cache: bool = True
+        see -npc, --no-probe-cache
+    video_cache: bool = True
+        see -nvc, --no-video-cache
+    cover_cache: bool = True
+        keep album art in the cover cache instead of the workdir, see -nc, --no-cache
+    overwrite: bool = True
+        overwrite existing clips, else PymthegError is raised
+    force: bool = False
+        create clips even if they were already created with the same fingerprint, see
+        -f, --force
+    workdir: Optional[Path] = None
+        directory for intermediates, see -wd, --workdir and work_dir()
+    pipe: bool = False
+        see -pi, --pipe
+    max_size: int = MAX_SIZE
+        largest width and height of the cover, 0 for no limit, see -ms, --max-size
+
+    e.g.
+        results = ClipJob("06 VERTIGO.flac", clip_start="1:02").run()
+        results = ClipJob("06 VERTIGO.flac", clip_start="0:30,1:10,2:00").run()
+        results = await ClipJob("https://open.spotify.com/track/...").arun()
+    """
+
+    source: Union[str, Path]
+    clip_start: Union[str, Timestamp, Tuple[Timestamp, ...]] = CLIP_START
+    clip_end: Union[str, Timestamp, Tuple[Timestamp, ...]] = CLIP_END
+    dir: Path = Path("")
+    name: Optional[str] = None
+    timestamp_format: Optional[str] = TIMESTAMP_FORMAT
+    ext: str = "mp4"
+    ffargs: Tuple[str, ...] = tuple(FFARGS.split())
+    out: str = OUT
+    sdargs: Tuple[str, ...] = ()
+    image: Optional[Path] = None
+    single_pass: bool = False
+    stream_copy: bool = True
+    probe_cache: bool = True
+    video_cache: bool = True
+    cover_cache: bool = True
+    overwrite: bool = True
+    force: bool = False
+    workdir: Optional[Path] = None
+    pipe: bool = False
+    max_size: int = MAX_SIZE
+
+    def windows(self) -> List[Tuple[Timestamp, Timestamp]]:
+        """
+        returns the clip start and end of every clip, raising TimestampError if they are
+        invalid, see pair_timestamps()
+        """
+        starts = (
+            [self.clip_start]
+            if isinstance(self.clip_start, Timestamp)
+            else check_timestamps(0, self.clip_start)
+            if isinstance(self.clip_start, str)
+            else list(self.clip_start)
+        )
+        ends = (
+            [self.clip_end]
+            if isinstance(self.clip_end, Timestamp)
+            else check_timestamps(1, self.clip_end)
+            if isinstance(self.clip_end, str)
+            else list(self.clip_end)
+        )
+
+        if starts is None:
+            raise TimestampError(f'invalid clip start "{self.clip_start}"')
+
+        if ends is None:
+            raise TimestampError(f'invalid clip end "{self.clip_end}"')
+
+        windows = pair_timestamps(starts, ends)
+
+        if windows is None:
+            raise TimestampError(
+                f'number of clip starts "{self.clip_start}" and ends "{self.clip_end}" '
+                "differ"
+            )
+
+        if len(windows) > 1 and self.timestamp_format is None:
+            raise TimestampError("several clips need a timestamp format to be named by")
+
+        check_energetic(windows)
+        return windows
+
+    def run(self) -> List[ClipResult]:
+        """
+        creates clips of the source, downloading it with spotDL first if it is not a
+        path. queries can resolve to more than one song (e.g. albums), so a result is
+        returned for every song
+
+        raises a PymthegError (InvocationError, ProbeError, TimestampError) on failure
+        """
+        self.windows()
+
+        with TemporaryDirectory(dir=work_dir(self.workdir, ram=False)) as _tmpdir:
+            tmpdir = Path(_tmpdir)
+            songs = [Path(self.source)]
+
+            if not songs[0].is_file():
+                dldir = tmpdir.joinpath("downloads")
+                dldir.mkdir()
+                invocate(
+                    name="spotdl",
+                    args=spotdl_args([str(self.source)], self.out, list(self.sdargs)),
+                    cwd=dldir,
+                    errcode=2,
+                    capture_output=True,
+                )
+                songs = scan_songs(dldir)
+
+                if len(songs) == 0:
+                    raise PymthegError(f'no songs were downloaded for "{self.source}"')
+
+            return [result for song in songs for result in self.clips(song, opdir=tmpdir)]
+
+    async def arun(self, executor: Optional["Executor"] = None) -> List[ClipResult]:
+        """runs the job in an executor, the event loops default one if not given"""
+        from asyncio import get_running_loop
+
+        return await get_running_loop().run_in_executor(executor, self.run)
+
+    def clips(self, song_path: Path, opdir: Path) -> List[ClipResult]:
+        """
+        creates the clips of an already downloaded song
+
+        song_path: Path
+            path to song
+        opdir: Path
+            an operation directory for intermediates, usually a tmpdir
+        """
+        windows = self.windows()
+        cache = get_probe_cache() if self.probe_cache else None
+        song_info = probe(song_path, cache=cache)
+        clips: List[Tuple[int, int, Path]] = []
+
+        for start, end in parse_windows(windows, song_info.duration, song_path, cache):
+            if start > song_info.duration or end <= start:
+                raise TimestampError(
+                    f"clip {to_timestamp(start)} -> {to_timestamp(end)} is not within "
+                    f"{song_path.name} ({to_timestamp(song_info.duration)})"
+                )
+
+            out_path = clip_path(
+                self.dir,
+                self.name or song_path.stem,
+                self.timestamp_format,
+                start,
+                end,
+                self.ext,
+            )
+
+            if (
+                out_path.exists()
+                and not self.overwrite
+                and not clip_up_to_date(self, song_path, start, end, out_path)
+            ):
+                raise PymthegError(f'"{out_path}" already exists')
+
+            clips.append((start, end, out_path))
+
+        return create_clips(self, song_path, song_info, clips, opdir)
+
+
+class ManifestRow(NamedTuple):
+    """
+    manifest row named tuple
+
+    row: int
+        row number, starting from 1 and excluding the csv header
+    query: str
+        song query (see querying)
+    clip_start: Optional[List[Timestamp]]
+        clip starts, or None if invalid
+    clip_end: Optional[List[Timestamp]]
+        clip ends, or None if invalid
+    out: Optional[str] = None
+        output file name (without timestamp or extension), defaults to the songs name
+    error: Optional[str] = None
+        reason the row is invalid, if it is
+    """
+
+    row: int
+    query: str
+    clip_start: Optional[List[Timestamp]]
+    clip_end: Optional[List[Timestamp]]
+    out: Optional[str] = None
+    error: Optional[str] = None
+
+
+class SongOutcome(NamedTuple):
+    """
+    outcome of processing a song, or of downloading a query, see retried()
+
+    source: str
+        song file name or query
+    done: bool
+        whether the song was clipped (not skipped) or the query was downloaded
+    error: Optional[Exception] = None
+        error the song or query failed with, if it did
+    attempts: int = 1
+        number of attempts made
+    clips: Tuple[ClipResult, ...] = ()
+        clips of the song, see pymtheg()
+    """
+
+    source: str
+    done: bool
+    error: Optional[Exception] = None
+    attempts: int = 1
+    clips: Tuple[ClipResult, ...] = ()
+
+
+class ServeOptions(NamedTuple):
+    """
+    serve mode options named tuple
+
+    host: str
+        address to listen on
+    port: int
+        port to listen on
+    workers: int
+        number of jobs to process at once
+    queue_size: int
+        maximum number of queued jobs, further jobs are rejected
+    """
+
+    host: str
+    port: int
+    workers: int
+    queue_size: int
+
+
+class Behaviour(NamedTuple):
+    """typed command line argument tuple"""
+
+    song_queries: List[str]
+    song_paths: List[Path]
+    dir: Path
+    out: str
+    save_music: bool
+    save_music_dir: Path
+    save_music_limit: int
+    save_music_verify: bool
+    no_timestamp: bool
+    timestamp_format: str
+    ext: str
+    sdargs: List[str]
+    ffargs: List[str]
+    clip_start: List[Timestamp]
+    clip_end: List[Timestamp]
+    image: Optional[Path]
+    use_defaults: bool
+    yes: bool
+    jobs: int
+    single_pass: bool
+    stream_copy: bool
+    probe_cache: bool
+    video_cache: bool
+    manifest: Optional[Path]
+    cpus: Optional[int] = None
+    workdir: Optional[Path] = None
+    pipe: bool = False
+    download_timeout: Optional[float] = DOWNLOAD_TIMEOUT
+    encode_timeout: Optional[float] = ENCODE_TIMEOUT
+    retries: int = 0
+    retry_backoff: float = RETRY_BACKOFF
+    force: bool = False
+    watch: Optional[Path] = None
+    max_size: int = MAX_SIZE
+    cover_cache: bool = True
+    trace: Optional[Path] = None
+    serve: Optional[ServeOptions] = None
+
+    def job(self, source: Union[str, Path]) -> ClipJob:
+        """returns a clip job of a source with these options"""
+        return ClipJob(
+            source=source,
+            clip_start=tuple(self.clip_start),
+            clip_end=tuple(self.clip_end),
+            dir=self.dir,
+            timestamp_format=None if self.no_timestamp else self.timestamp_format,
+            ext=self.ext,
+            ffargs=tuple(self.ffargs),
+            out=str(self.out),
+            sdargs=tuple(self.sdargs),
+            image=self.image,
+            single_pass=self.single_pass,
+            stream_copy=self.stream_copy,
+            probe_cache=self.probe_cache,
+            video_cache=self.video_cache,
+            cover_cache=self.cover_cache,
+            force=self.force,
+            workdir=self.workdir,
+            pipe=self.pipe,
+            max_size=self.max_size,
+        )
+
+
+def main() -> None:
+    """pymtheg entry point"""
+    console = LazyConsole()
+
+    try:
+        cli(console)
+    except PymthegError as err:
+        exit(report_error(console, err))
+
+
+def report_error(console: LazyConsole, err: PymthegError) -> int:
+    """prints an error of a command line run, returning the exit code to exit with"""
+    invocation_err = err if isinstance(err, InvocationError) else err.__cause__
+
+    if isinstance(invocation_err, InvocationError):
+        # program output and arguments are printed as-is, not as rich markup
+        for output, name in (
+            (invocation_err.stdout, "stdout"),
+            (invocation_err.stderr, "stderr"),
+        ):
+            if output != "":
+                console.print(f"\n{premsg_error} invocation {name}:")
+                console.print(output, markup=False, emoji=False, highlight=False)
+
+        console.print("\n[bold red]invocation:[/] ", end="")
+        console.print(
+            f'"{" ".join(invocation_err.invocation)}"',
+            markup=False,
+            emoji=False,
+            highlight=False,
+        )
+
+    console.print(f"\n{premsg_error} {err}")
+    return exit_code(err)
+
+
+def exit_code(err: Exception) -> int:
+    """returns the exit code for the command line to exit with for an error"""
+    invocation_err = err if isinstance(err, InvocationError) else err.__cause__
+
+    if isinstance(invocation_err, InvocationError) and invocation_err.errcode > 0:
+        return invocation_err.errcode
+
+    return 1
+
+
+def report_failures(
+    console: LazyConsole, outcomes: List[SongOutcome], processed: int
+) -> int:
+    """
+    prints the songs and queries that failed in a command line run, returning the exit
+    code to exit with, that of the first failure
+    """
+    failures = [outcome for outcome in outcomes if outcome.error is not None]
+    console.print(
+        f"\n{premsg_error} {len(failures)} failure(s), {processed} song(s) processed:"
+    )
+
+    for failure in failures:
+        assert failure.error is not None
+        console.print(
+            f"- {failure.source}: {failure.error}"
+            + (f" ({failure.attempts} attempts)" if failure.attempts > 1 else ""),
+            markup=False,
+            emoji=False,
+            highlight=False,
+        )
+
+        # the last line a failed program wrote is usually why
+        invocation_err = (
+            failure.error
+            if isinstance(failure.error, InvocationError)
+            else failure.error.__cause__
+        )
+        if isinstance(invocation_err, InvocationError):
+            lines = (invocation_err.stderr or invocation_err.stdout).strip().splitlines()
+            if len(lines) > 0:
+                console.print(
+                    f"  {lines[-1]}", markup=False, emoji=False, highlight=False
+                )
+
+    return exit_code(failures[0].error or PymthegError())
+
+
+def cli(console: LazyConsole) -> None:
+    """
+    runs pymtheg from the command line, or its job server if the first argument is the
+    serve command (a query of "serve" is given after "--" instead)
+    """
+    if sys.argv[1:2] == ["serve"]:
+        serve(console, get_args(console, serve=True))
+        return
+
+    bev = get_args(console)
+    run = clip_queries if bev.watch is None else watch
+
+    if bev.trace is None:
+        run(console, bev)
+        return
+
+    global _profiler
+    _profiler = Profiler()
+
+    try:
+        run(console, bev)
+
+    finally:
+        write_profile(console, _profiler, bev.trace)
+
+
+def clip_queries(console: LazyConsole, bev: Behaviour) -> None:
+    """
+    downloads and clips the songs of the parsed command line, or of a manifest
+
+    console: LazyConsole
+        console used for printing
+    bev: Behaviour
+        behaviour object
+    """
+    store: Optional[MusicStore] = None
+    set_thread_budget(
+        bev.cpus,
+        workers=bev.jobs
+        if bev.manifest is not None or (bev.use_defaults and bev.yes)
+        else 1,
+    )
+    set_timeouts(bev.download_timeout, bev.encode_timeout)
+
+    if bev.save_music:
+        store = MusicStore(bev.save_music_dir, limit=bev.save_music_limit)
+
+        if bev.save_music_verify:
+            with console.status("[dim]verifying saved music...[/]", spinner="arc"):
+                verified, pruned = store.verify()
+                store.save()
+
+            console.print(
+                f"{premsg_info} saved music: {verified} song(s) verified, "
+                f"{len(pruned)} pruned"
+            )
+            for pruned_key in pruned:
+                console.print(f"[dim]- {pruned_key}[/]")
+
+            if len(bev.song_queries) + len(bev.song_paths) == 0:
+                return
+
+        # serve repeat queries from the store
+        queries: List[str] = []
+        for query in bev.song_queries:
+            key = track_key(query)
+            path = None if key is None else store.get(key)
+
+            if path is None:
+                queries.append(query)
+            else:
+                bev.song_paths.append(path)
+
+        if len(queries) < len(bev.song_queries):
+            console.print(
+                f"{premsg_info} saved music: serving "
+                f"{len(bev.song_queries) - len(queries)} song(s) from "
+                f'"{bev.save_music_dir}"\n'
+            )
+            bev = bev._replace(song_queries=queries)
+
+    # make tempdir
+    workdir = work_dir(bev.workdir, ram=False)
+
+    if bev.workdir is not None and workdir != bev.workdir:
+        console.print(
+            f"{premsg_info} working directory is short on space, using "
+            f'"{workdir or gettempdir()}" instead\n'
+        )
+
+    with TemporaryDirectory(dir=workdir) as _tmpdir:
+        tmpdir = Path(_tmpdir)
+        dldir = tmpdir.joinpath("downloads")
+        dldir.mkdir()
+        downloads = spotdl_batches(bev, dldir, store is not None)
+
+        stdout: str = ""
+        stderr: str = ""
+        outcomes: List[SongOutcome] = []
+
+        if bev.manifest is not None:
+            outcomes = pymtheg_manifest(
+                bev=bev, manifest=bev.manifest, opdir=tmpdir, store=store, console=console
+            )
+
+        elif bev.use_defaults and bev.yes:
+            # nothing to prompt for, so songs can be processed concurrently and while
+            # other songs are still being downloaded
+            outcomes, stdout, stderr = pymtheg_pool(
+                bev=bev, opdir=tmpdir, dldir=dldir, downloads=downloads, console=console
+            )
+
+        else:
+
+            def download(queries: List[str], directory: Path) -> bool:
+                """downloads songs with spotDL"""
+                nonlocal stdout, stderr
+                spotdl_proc = invocate(
+                    name="spotdl",
+                    args=spotdl_args(queries, bev.out, bev.sdargs),
+                    cwd=directory,
+                    errcode=2,
+                    capture_output=True,
+                )
+                stdout += spotdl_proc.stdout
+                stderr += spotdl_proc.stderr
+                return True
+
+            # download songs, processing whatever was downloaded if some failed
+            if len(downloads) > 0:
+                with console.status(f"[dim]downloading songs...[/]", spinner="arc"):
+                    for queries, directory in downloads:
+                        outcome = retried(
+                            " ".join(queries),
+                            bev,
+                            console,
+                            lambda: download(queries, directory),
+                        )
+                        if outcome.error is not None:
+                            outcomes.append(outcome)
+
+            # process songs
+            songs = scan_songs(dldir) + bev.song_paths
+
+            if len(songs) > 0:
+                print_header(console, bev)
+
+            for song in songs:
+                outcomes.append(clip_song(song, bev=bev, opdir=tmpdir, console=console))
+
+        if store is not None:
+            save_music(console, bev, store, downloads)
+
+    processed = sum(outcome.done for outcome in outcomes)
+    up_to_date = sum(clip.cached for outcome in outcomes for clip in outcome.clips)
+
+    if bev.probe_cache and _probe_cache is not None:
+        console.print(
+            f"\n{premsg_info} probe cache: {_probe_cache.hits} hit(s), "
+            f"{_probe_cache.misses} miss(es)"
+        )
+
+    if up_to_date > 0:
+        console.print(
+            f"\n{premsg_info} skipped {up_to_date} up-to-date clip(s), "
+            "use -f to create them anyway"
+        )
+
+    if any(outcome.error is not None for outcome in outcomes):
+        exit(report_failures(console, outcomes, processed))
+
+    if processed > 0 or up_to_date > 0:
+        console.print(
+            f"\n{premsg_info} all operations successful. have a great {part_of_day()}."
+        )
+
+    else:
+        error = False
+        if stdout != "":
+            console.print(f"\n{premsg_error} invocation stdout:\n{stdout}")
+            error = True
+        if stderr != "":
+            console.print(f"\n{premsg_error} invocation stderr:\n{stderr}")
+            error = True
+
+        if error:
+            console.print(
+                f"{premsg_error} invalid link/query, nothing to do. (see above for more information)"
+            )
+            exit(1)
+
+
+def write_profile(console: LazyConsole, profiler: Profiler, path: Path) -> None:
+    """
+    writes a chrome trace event file of a profiler, and prints a summary of its spans
+
+    console: LazyConsole
+        console used for printing
+    profiler: Profiler
+        profiler to write
+    path: Path
+        path of trace event file
+    """
+    path.write_text(dumps(profiler.trace()), encoding="utf-8")
+
+    header = "".join(f" {f'p{percent}':>7}" for percent in PROFILE_PERCENTILES)
+    console.print(
+        f'\n{premsg_info} trace written to "{path}", times in seconds\n'
+        f"[dim]{'span':<16} {'count':>5}{header} {'total':>8} {'cpu':>8} "
+        f"{'rss MiB':>8}[/]"
+    )
+
+    for name, spans in profiler.summary():
+        durations = [span.duration for span in spans]
+        console.print(
+            f"{name[:16]:<16} {len(spans):>5}"
+            + "".join(
+                f" {percentile(durations, percent):>7.2f}"
+                for percent in PROFILE_PERCENTILES
+            )
+            + f" {sum(durations):>8.2f} {sum(span.cpu for span in spans):>8.2f} "
+            f"{max(span.rss for span in spans) / 1024 / 1024:>8.1f}",
+            markup=False,
+        )
+
+
+def print_header(console: LazyConsole, bev: Behaviour) -> None:
+    """prints the timestamp format/using defaults message shown before the first song"""
+    if bev.manifest is not None:
+        # every row has its own clip start and end
+        console.print(
+            f"{premsg_info} clipping manifest rows, empty clip starts default to "
+            f'"{format_timestamps(bev.clip_start)}" and empty clip ends to '
+            f'"{format_timestamps(bev.clip_end)}"\n'
+        )
+
+    elif bev.use_defaults:
+        console.print(
+            f"{premsg_info} using defaults, clip start is "
+            f'"{format_timestamps(bev.clip_start)}" and clip end is '
+            f'"{format_timestamps(bev.clip_end)}"\n'
+        )
+
+    else:
+        console.print(f"{premsg_info} enter timestamps in format \[hh:mm:]ss")
+        console.print('               timestamps can be "*" for random')
+        console.print(
+            '               start timestamp can be "^" for the most energetic part,'
+        )
+        console.print(
+            '               paired with a start-relative end (e.g. "+15") for its length'
+        )
+        console.print(
+            "               timestamps can be comma-separated lists, for a clip of each"
+        )
+        console.print('               timestamps can be end-relative, prefix with "-"')
+        console.print(
+            '               end timestamp can be start-relative, prefix with "+"'
+        )
+        console.print(
+            f"               press enter to use given defaults "
+            f'("{format_timestamps(bev.clip_start)}", '
+            f'"{format_timestamps(bev.clip_end)}")\n'
+        )
+
+
+def spotdl_args(queries: List[str], out: str, sdargs: List[str]) -> List[str]:
+    """returns spotDL arguments to download song queries with"""
+    return queries + ["--path-template", f"{out}.{{ext}}"] + sdargs
+
+
+def spotdl_batches(
+    bev: Behaviour, dldir: Path, store: bool
+) -> List[Tuple[List[str], Path]]:
+    """
+    returns spotDL invocations as a list of song queries and their download directory
+
+    bev: Behaviour
+        behaviour object
+    dldir: Path
+        directory to download songs to
+    store: bool
+        whether songs will be saved to a music store, in which case single track queries
+        are downloaded into their own directory so that songs can be told apart
+    """
+    if len(bev.song_queries) == 0:
+        return []
+
+    if not store:
+        return [(bev.song_queries, dldir)]
+
+    batches: List[Tuple[List[str], Path]] = []
+    rest: List[str] = []
+
+    for query in bev.song_queries:
+        if track_key(query) is None:
+            rest.append(query)
+        else:
+            batches.append(([query], dldir.joinpath(str(len(batches)))))
+
+    if len(rest) > 0:
+        batches.append((rest, dldir.joinpath("rest")))
+
+    for _, directory in batches:
+        directory.mkdir()
+
+    return batches
+
+
+def save_music(
+    console: LazyConsole,
+    bev: Behaviour,
+    store: MusicStore,
+    downloads: List[Tuple[List[str], Path]],
+) -> None:
+    """
+    saves downloaded songs, songs of single track queries are added to the music store
+    while other songs are copied into the save directory as-is
+
+    console: LazyConsole
+        console used for printing
+    bev: Behaviour
+        behaviour object
+    store: MusicStore
+        music store to save songs to
+    downloads: List[Tuple[List[str], Path]]
+        spotDL invocations, see spotdl_batches()
+    """
+    saved = 0
+
+    for queries, directory in downloads:
+        songs = scan_songs(directory)
+        key = track_key(queries[0]) if len(queries) == 1 else None
+
+        for song in songs:
+            if key is not None and len(songs) == 1:
+                store.put(key, song)
+            else:
+                store.copy(song)
+            saved += 1
+
+    for path in store.evict():
+        console.print(f"[dim]- evicted {path.name} from saved music[/]")
+
+    try:
+        store.save()
+    except OSError as err:
+        console.print(f"{premsg_error} could not save music store index ({err})")
+
+    if saved > 0:
+        console.print(f'\n{premsg_info} saved {saved} song(s) to "{bev.save_music_dir}"')
+
+
+def scan_songs(dldir: Path) -> List[Path]:
+    """
+    returns songs downloaded by spotDL in a directory, ignoring hidden files and
+    directories (e.g. spotDL temporary files)
+    """
+    return [
+        song
+        for song in dldir.rglob("*")
+        # ensure that file was export of spotDL (list from spotdl -h)
+        if song.suffix in SONG_SUFFIXES
+        and not any(part.startswith(".") for part in song.relative_to(dldir).parts)
+    ]
+
+
+def unique_name(song_path: Path, names: Dict[str, int]) -> Optional[str]:
+    """
+    returns the output name of a song processed alongside songs sharing its name (e.g.
+    "a.m4a" and "a.wav"), suffixed with its count ("a (2)") so that their clips don't
+    overwrite each other, else None for the songs own name
+
+    song_path: Path
+        path to song
+    names: Dict[str, int]
+        number of songs by (case-insensitive) name so far in the run, updated
+    """
+    key = song_path.stem.casefold()
+    names[key] = names.get(key, 0) + 1
+
+    if names[key] == 1:
+        return None
+
+    # a suffixed name can be some other songs name too, e.g. "a (2).mp3"
+    name = f"{song_path.stem} ({names[key]})"
+    while names.get(name.casefold(), 0) > 0:
+        names[key] += 1
+        name = f"{song_path.stem} ({names[key]})"
+
+    names[name.casefold()] = 1
+    return name
+
+
+def retried(
+    source: str, bev: Behaviour, console: LazyConsole, run: Callable[[], bool]
+) -> SongOutcome:
+    """
+    runs the processing of a song or the download of a query, retrying it up to
+    `bev.retries` times with exponential backoff if a program failed or timed out, and
+    returns its outcome, capturing the error it failed with instead of raising it so
+    that one song can't stop the others
+
+    source: str
+        song file name or query, to report it with
+    bev: Behaviour
+        behaviour object
+    console: LazyConsole
+        console used for printing
+    run: Callable[[], bool]
+        processes the song or downloads the query, returning whether it was done
+    """
+    attempt = 1
+
+    while True:
+        try:
+            return SongOutcome(source=source, done=run(), attempts=attempt)
+
+        except (PymthegError, OSError) as err:
+            # programs that couldn't be invocated, and songs that couldn't be probed
+            # or clipped (e.g. corrupt files), won't do any better the next time
+            if (
+                attempt > bev.retries
+                or not isinstance(err, InvocationError)
+                or isinstance(err.__cause__, OSError)
+            ):
+                console.print(f"{premsg_error} {source}: {err}")
+                return SongOutcome(source=source, done=False, error=err, attempts=attempt)
+
+            backoff = bev.retry_backoff * 2 ** (attempt - 1)
+            console.print(f"{premsg_info} {source}: {err}, retrying in {backoff:g}s")
+            sleep(backoff)
+            attempt += 1
+
+
+def clip_song(
+    song_path: Path,
+    bev: Behaviour,
+    opdir: Path,
+    console: LazyConsole,
+    spinner: bool = True,
+    name: Optional[str] = None,
+) -> SongOutcome:
+    """processes a song with pymtheg(), see retried()"""
+    clips: List[ClipResult] = []
+
+    def run() -> bool:
+        clips[:] = pymtheg(song_path, bev, opdir, console, spinner=spinner, name=name)
+        return any(not clip.cached for clip in clips)
+
+    return retried(song_path.name, bev, console, run)._replace(clips=tuple(clips))
+
+
+def pymtheg_pool(
+    bev: Behaviour,
+    opdir: Path,
+    dldir: Path,
+    downloads: List[Tuple[List[str], Path]],
+    console: LazyConsole,
+) -> Tuple[List[SongOutcome], str, str]:
+    """
+    processes songs concurrently with a pool of `bev.jobs` workers, handing each song
+    to the pool as soon as spotDL reports it as downloaded instead of waiting for every
+    download to finish. only to be used when there is nothing to prompt for
+    (-ud, --use-defaults and -y, --yes)
+
+    bev: Behaviour
+        behaviour object
+    opdir: Path
+        an operation directory, usually a tmpdir
+    dldir: Path
+        directory for spotDL to download songs to
+    downloads: List[Tuple[List[str], Path]]
+        spotDL invocations, see spotdl_batches()
+    console: LazyConsole
+        console used for printing
+
+    returns the outcomes of processed songs and failed downloads, and spotDL stdout and
+    stderr
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    progress = "[dim]status: processing songs ({done}/{total}){downloading}[/]"
+    futures: List["Future[SongOutcome]"] = []
+    submitted: Set[Path] = set()
+    names: Dict[str, int] = {}  # songs by output name, see unique_name()
+    settling: Dict[Path, Tuple[Tuple[int, int], float]] = {}
+    reported: List[str] = []  # spotDL lines of downloads not handed off yet
+    unnamed = 0  # downloads whose spotDL lines named none of the songs
+    downloading = len(downloads) > 0
+    lock = Lock()
+    stop = Event()
+    outcomes: List[SongOutcome] = []
+    stdout = ""
+    stderr = ""
+
+    def update(*_: object) -> None:
+        """updates the aggregate progress status"""
+        status.update(
+            progress.format(
+                done=sum(future.done() for future in futures),
+                total=len(futures),
+                downloading=", downloading songs..." if downloading else "",
+            )
+        )
+
+    def submit(songs: Iterable[Path]) -> None:
+        """hands songs to the pool"""
+        for song in songs:
+            if len(futures) == 0:
+                print_header(console, bev)
+
+            submitted.add(song)
+            futures.append(
+                pool.submit(
+                    clip_song,
+                    song,
+                    bev=bev,
+                    opdir=opdir,
+                    console=console,
+                    spinner=False,
+                    name=unique_name(song, names),
+                )
+            )
+            futures[-1].add_done_callback(update)
+
+        update()
+
+    def hand_off() -> None:
+        """
+        hands songs spotDL reported as downloaded to the pool once they haven't changed
+        for WATCH_SETTLE seconds, as spotDL downloads several songs at once. a report
+        names its song if the song's name is in it, else (e.g. with a custom -o) the
+        oldest settled song no other report names is handed off
+        """
+        nonlocal unnamed
+
+        with lock:
+            songs: Dict[Path, bool] = {}  # whether settled, by unsubmitted song
+            now = perf_counter()
+
+            for song in scan_songs(dldir):
+                if song in submitted:
+                    continue
+
+                try:
+                    stat = song.stat()
+                except OSError:  # moved or removed since scanned
+                    continue
+
+                key = (stat.st_size, stat.st_mtime_ns)
+                seen = settling.get(song)
+
+                if seen is None or seen[0] != key:
+                    settling[song] = (key, now)
+                    seen = settling[song]
+
+                songs[song] = now - seen[1] >= WATCH_SETTLE
+
+            def named(line: str) -> Optional[Path]:
+                """returns the song a report names, preferring the longest name"""
+                matches = [
+                    song for song in songs if song.stem.casefold() in line.casefold()
+                ]
+                return max(matches, key=lambda song: len(song.stem), default=None)
+
+            handed: List[Path] = []
+
+            for line in reported.copy():
+                named_song = named(line)
+
+                if named_song is None:
+                    unnamed += 1
+                    reported.remove(line)
+
+                elif songs[named_song]:
+                    handed.append(named_song)
+                    reported.remove(line)
+                    del songs[named_song]
+
+            waiting = {named(line) for line in reported}
+            oldest = sorted(
+                (
+                    song
+                    for song, settled in songs.items()
+                    if settled and song not in waiting
+                ),
+                key=lambda song: settling[song][1],
+            )[:unnamed]
+            unnamed -= len(oldest)
+            submit(handed + oldest)
+
+    def settle() -> None:
+        """hands off reported downloads as they settle, until downloads are done"""
+        while not stop.wait(WATCH_SETTLE / 4):
+            hand_off()
+
+    def on_line(line: str) -> None:
+        """records finished downloads as spotDL reports them"""
+        if line.lstrip().startswith(SPOTDL_DONE):
+            with lock:
+                reported.append(line)
+            hand_off()
+
+    def download(queries: List[str], directory: Path) -> bool:
+        """downloads songs with spotDL, handing them to the pool as they finish"""
+        nonlocal stdout, stderr
+        spotdl_proc = invocate(
+            name="spotdl",
+            args=spotdl_args(queries, bev.out, bev.sdargs),
+            cwd=directory,
+            errcode=2,
+            capture_output=True,
+            on_line=on_line,
+        )
+        stdout += spotdl_proc.stdout
+        stderr += spotdl_proc.stderr
+        return True
+
+    with console.status(
+        progress.format(done=0, total=0, downloading=""), spinner="arc"
+    ) as status, ThreadPoolExecutor(max_workers=bev.jobs) as pool:
+        settler = Thread(target=settle, name="pymtheg-settle", daemon=True)
+
+        try:
+            submit(bev.song_paths)
+
+            if downloading:
+                settler.start()
+
+            for queries, directory in downloads:
+                outcome = retried(
+                    " ".join(queries), bev, console, lambda: download(queries, directory)
+                )
+                if outcome.error is not None:
+                    outcomes.append(outcome)
+
+                # spotDL has exited, so anything it didn't report as downloaded, or
+                # downloaded before failing, is complete
+                with lock:
+                    submit(song for song in scan_songs(dldir) if song not in submitted)
+
+            stop.set()
+            downloading = False
+            update()
+
+            for future in as_completed(futures):
+                outcomes.append(future.result())
+
+        except BaseException:
+            # don't start songs that haven't been started if one of them errored, and
+            # stop those that have (programs don't get interrupts of the terminal)
+            for future in futures:
+                future.cancel()
+            terminate_programs()
+            raise
+
+        finally:
+            stop.set()
+            if settler.is_alive():
+                settler.join()
+
+    return outcomes, stdout, stderr
+
+
+def read_manifest(manifest: TextIO, name: str, bev: Behaviour) -> Iterator[ManifestRow]:
+    """
+    lazily reads and validates rows of a manifest, a csv file with a header or a jsonl
+    file (by file extension) with the fields "query", and optionally "start", "end" and
+    "out". empty or missing clip starts and ends default to -cs/-ce
+
+    manifest: TextIO
+        opened manifest file
+    name: str
+        name of manifest file
+    bev: Behaviour
+        behaviour object
+    """
+    import csv
+
+    records: Iterator[object]
+
+    if Path(name).suffix.lower() in (".jsonl", ".json", ".ndjson"):
+        records = (jsonl_record(line) for line in manifest if line.strip() != "")
+    else:
+        records = csv.DictReader(manifest)
+
+    for row, record in enumerate(records, start=1):
+        yield manifest_row(row, record, bev)
+
+
+def manifest_row(row: int, record: object, bev: Behaviour) -> ManifestRow:
+    """
+    validates a manifest row or job, see read_manifest()
+
+    row: int
+        row number
+    record: object
+        decoded row, a dictionary of fields
+    bev: Behaviour
+        behaviour object
+    """
+    if not isinstance(record, dict):
+        return ManifestRow(row, "", None, None, error="row is not a json object")
+
+    # json lists of timestamps are taken as comma-separated ones
+    fields = {
+        field: (
+            ",".join(str(value) for value in record[field])
+            if isinstance(record.get(field), list)
+            else str(record.get(field) or "")
+        ).strip()
+        for field in MANIFEST_FIELDS
+    }
+    clip_start = (
+        check_timestamps(0, fields["start"]) if fields["start"] else bev.clip_start
+    )
+    clip_end = check_timestamps(1, fields["end"]) if fields["end"] else bev.clip_end
+    windows = (
+        None
+        if clip_start is None or clip_end is None
+        else pair_timestamps(clip_start, clip_end)
+    )
+    error: Optional[str] = None
+
+    if fields["query"] == "":
+        error = "missing query"
+    elif fields["out"] != "" and (
+        Path(fields["out"]).name != fields["out"] or fields["out"] == ".."
+    ):
+        # outputs are named within the output directory, never outside of it
+        error = f'out "{fields["out"]}" must be a file name, not a path'
+    elif clip_start is None:
+        error = f'invalid clip start "{fields["start"]}"'
+    elif clip_end is None:
+        error = f'invalid clip end "{fields["end"]}"'
+    elif windows is None:
+        error = "number of clip starts and ends differ"
+    elif len(windows) > 1 and bev.no_timestamp:
+        error = "several clips need a timestamp format to be named by"
+    else:
+        try:
+            check_energetic(windows)
+        except TimestampError as err:
+            error = str(err)
+
+        for window_start, window_end in windows:
+            if (
+                window_start.random
+                or window_start.energetic
+                or window_end.random
+                or window_end.ss < 0
+            ):
+                # end-relative, random and "^" timestamps depend on the song, so only
+                # clips that are empty for every song are rejected here
+                continue
+
+            start, end = parse_timestamps(
+                window_start, window_end, duration=max(window_start.ss, window_end.ss)
+            )
+            if end <= start:
+                error = "clip end is before clip start"
+
+    return ManifestRow(
+        row=row,
+        query=fields["query"],
+        clip_start=clip_start,
+        clip_end=clip_end,
+        out=fields["out"] or None,
+        error=error,
+    )
+
+
+def jsonl_record(line: str) -> object:
+    """returns a decoded jsonl line, or None if it is not valid json"""
+    try:
+        return loads(line)
+    except ValueError:
+        return None
+
+
+def read_journal(journal_path: Path) -> Dict[int, Dict[str, object]]:
+    """
+    returns the last journal entry of every row of a manifest journal, ignoring a
+    partially written last line of an interrupted run
+    """
+    entries: Dict[int, Dict[str, object]] = {}
+
+    try:
+        with open(journal_path, "r", encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = loads(line)
+                    entries[int(entry["row"])] = entry
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    except FileNotFoundError:
+        pass
+
+    return entries
+
+
+def pymtheg_manifest(
+    bev: Behaviour,
+    manifest: Path,
+    opdir: Path,
+    store: Optional[MusicStore],
+    console: LazyConsole,
+) -> List[SongOutcome]:
+    """
+    processes every row of a manifest non-interactively with a pool of `bev.jobs`
+    workers, reading rows lazily. finished rows are appended to a journal
+    ("<manifest>.journal") so that an interrupted run resumes where it stopped, and a
+    summary with the status and timings of every row is written to
+    "<manifest>.summary.json" at the end. delete the journal to start over
+
+    bev: Behaviour
+        behaviour object
+    manifest: Path
+        path to manifest, see read_manifest()
+    opdir: Path
+        an operation directory, usually a tmpdir
+    store: Optional[MusicStore]
+        music store to serve and save songs with, if saving music
+    console: LazyConsole
+        console used for printing
+
+    returns the outcomes of processed songs and failed downloads
+    """
+    from concurrent.futures import (
+        FIRST_COMPLETED,
+        ThreadPoolExecutor,
+        as_completed,
+        wait,
+    )
+
+    journal_path = manifest.with_name(f"{manifest.name}.journal")
+    summary_path = manifest.with_name(f"{manifest.name}.summary.json")
+    done = {
+        row
+        for row, entry in read_journal(journal_path).items()
+        if entry.get("status") in MANIFEST_DONE
+    }
+    bev = bev._replace(use_defaults=True, yes=True)
+    lock = Lock()
+    outcomes: List[SongOutcome] = []
+    counts = {"rows": 0, "resumed": len(done), "failed": 0}
+    progress = "[dim]status: processing manifest (row {rows}, {failed} failed)[/]"
+    started = time()
+
+    def run(row: ManifestRow) -> Tuple[List[SongOutcome], Dict[str, object]]:
+        """processes a manifest row, returning its outcomes and journal entry"""
+        row_started = time()
+        status = "invalid"
+        error = row.error
+        row_outcomes: List[SongOutcome] = []
+
+        if row.error is None:
+            assert row.clip_start is not None and row.clip_end is not None
+            row_bev = bev._replace(clip_start=row.clip_start, clip_end=row.clip_end)
+            songs: List[Path] = []
+
+            def download() -> bool:
+                """gets the songs of the row"""
+                songs.extend(manifest_songs(row_bev, row.query, opdir, store, lock))
+                return True
+
+            outcome = retried(row.query, row_bev, console, download)
+
+            if outcome.error is not None:
+                row_outcomes.append(outcome)
+
+            for song in songs:
+                row_outcomes.append(
+                    clip_song(song, row_bev, opdir, console, spinner=False, name=row.out)
+                )
+
+            errors = [str(outcome.error) for outcome in row_outcomes if outcome.error]
+            error = "; ".join(errors) or None
+            status = (
+                "processed"
+                if any(outcome.done for outcome in row_outcomes)
+                else "failed"
+                if errors
+                else "skipped"
+            )
+
+        clips = sum(not clip.cached for outcome in row_outcomes for clip in outcome.clips)
+        return row_outcomes, {
+            "row": row.row,
+            "query": row.query,
+            "status": status,
+            "clips": clips,
+            "error": error,
+            "seconds": round(time() - row_started, 3),
+        }
+
+    with open(manifest, "r", encoding="utf-8", newline="") as manifest_file, open(
+        journal_path, "a", encoding="utf-8"
+    ) as journal, ThreadPoolExecutor(max_workers=bev.jobs) as pool, console.status(
+        progress.format(**counts), spinner="arc"
+    ) as status:
+        pending: Set["Future[Tuple[List[SongOutcome], Dict[str, object]]]"] = set()
+        submitted = False
+
+        def finish(
+            futures: Iterable["Future[Tuple[List[SongOutcome], Dict[str, object]]]"],
+        ) -> None:
+            """journals finished rows"""
+            for future in futures:
+                row_outcomes, entry = future.result()
+                outcomes.extend(row_outcomes)
+                counts["failed"] += entry["status"] == "failed"
+
+                journal.write(dumps(entry) + "\n")
+                journal.flush()
+
+                if entry["status"] == "invalid":
+                    console.print(
+                        f"{premsg_error} manifest row {entry['row']}: {entry['error']}"
+                    )
+
+            status.update(progress.format(**counts))
+
+        try:
+            for row in read_manifest(manifest_file, manifest.name, bev):
+                counts["rows"] = row.row
+
+                if row.row in done:
+                    continue
+
+                # bound the rows in flight so that the manifest is read lazily
+                if len(pending) >= bev.jobs * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    finish(finished)
+
+                if not submitted:
+                    print_header(console, bev)
+                    submitted = True
+
+                pending.add(pool.submit(run, row))
+
+            finish(as_completed(pending))
+
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            terminate_programs()
+            raise
+
+    entries = read_journal(journal_path)
+    statuses = [str(entry["status"]) for entry in entries.values()]
+    summary_path.write_text(
+        dumps(
+            {
+                "manifest": str(manifest.absolute()),
+                "rows": [entries[row] for row in sorted(entries)],
+                "totals": {status: statuses.count(status) for status in set(statuses)},
+                "seconds": round(time() - started, 3),
+            },
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+
+    console.print(
+        f"\n{premsg_info} manifest: {len(entries)} row(s), "
+        + ", ".join(
+            f"{statuses.count(status)} {status}" for status in sorted(set(statuses))
+        )
+        + (f" ({counts['resumed']} resumed)" if counts["resumed"] > 0 else "")
+        + f', see "{summary_path.name}"'
+    )
+
+    return outcomes
+
+
+def manifest_songs(
+    bev: Behaviour,
+    query: str,
+    opdir: Path,
+    store: Optional[MusicStore],
+    lock: Lock,
+) -> List[Path]:
+    """
+    returns the songs of a manifest query, downloading them with spotDL into a directory
+    of their own if they are not a path or saved music
+
+    bev: Behaviour
+        behaviour object
+    query: str
+        song query (see querying)
+    opdir: Path
+        an operation directory, usually a tmpdir
+    store: Optional[MusicStore]
+        music store to serve and save songs with, if saving music
+    lock: Lock
+        lock guarding the music store
+    """
+    if Path(query).exists():
+        return [Path(query)]
+
+    key = track_key(query) if store is not None else None
+
+    if store is not None and key is not None:
+        with lock:
+            path = store.get(key)
+
+        if path is not None:
+            return [path]
+
+    dldir = Path(mkdtemp(dir=opdir))
+    invocate(
+        name="spotdl",
+        args=spotdl_args([query], bev.out, bev.sdargs),
+        cwd=dldir,
+        errcode=2,
+        capture_output=True,
+    )
+    songs = scan_songs(dldir)
+
+    if store is None:
+        return songs
+
+    with lock:
+        if key is not None and len(songs) == 1:
+            return [store.put(key, songs[0])]
+
+        return [store.copy(song) for song in songs]
+
+
+class ServeJob:
+    """
+    serve mode job
+
+    row: ManifestRow
+        validated job settings, see manifest_row()
+    """
+
+    def __init__(self, row: ManifestRow) -> None:
+        from uuid import uuid4
+
+        self.id = uuid4().hex
+        self.row = row
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.clips: List[Path] = []
+        self.created = time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def json(self) -> Dict[str, object]:
+        """returns the public state of the job"""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "query": self.row.query,
+            "error": self.error,
+            "clips": [clip.name for clip in self.clips],
+            "queued": round((self.started or time()) - self.created, 3),
+            "seconds": round(self.finished - self.started, 3)
+            if self.finished is not None and self.started is not None
+            else None,
+        }
+
+
+class JobServer:
+    """
+    serve mode job server, jobs are queued and processed by a pool of worker threads
+    within the same process, so that caches stay warm across jobs
+
+    bev: Behaviour
+        behaviour object, job settings default to its clip options
+    opdir: Path
+        an operation directory, usually a tmpdir
+    console: LazyConsole
+        console used for printing
+    """
+
+    def __init__(self, bev: Behaviour, opdir: Path, console: LazyConsole) -> None:
+        from queue import Queue
+
+        assert bev.serve is not None
+        self.bev = bev
+        self.opdir = opdir
+        self.console = console
+        self.jobs: Dict[str, ServeJob] = {}
+        self.queue: "Queue[ServeJob]" = Queue(maxsize=bev.serve.queue_size)
+        self.lock = Lock()
+        self.store: Optional[MusicStore] = None
+
+        if bev.save_music:
+            self.store = MusicStore(bev.save_music_dir, limit=bev.save_music_limit)
+
+        for _ in range(bev.serve.workers):
+            Thread(target=self.work, daemon=True).start()
+
+    def respond(self, method: str, path: str, body: bytes) -> Tuple[int, object]:
+        """
+        responds to a request, returning a status code and either data to send as json
+        or the path of a clip to send
+
+        POST /jobs
+            queues a job from a json object with the fields "query", and optionally
+            "start", "end" and "out" (see manifests)
+        GET /jobs/<id>
+            returns the status of a job
+        GET /jobs/<id>/clip[?n=<index>]
+            returns a clip of a finished job
+        GET /status
+            returns server status
+        """
+        from queue import Full
+
+        url = urlparse(path)
+        parts = [part for part in url.path.split("/") if part != ""]
+
+        if method == "POST":
+            if parts != ["jobs"]:
+                return 404, {"error": "not found"}
+
+            try:
+                record = loads(body or b"null")
+            except ValueError:
+                return 400, {"error": "invalid json"}
+
+            try:
+                submitted = self.submit(record)
+            except Full:
+                return 503, {"error": "job queue is full"}
+
+            return 400 if submitted.status == "invalid" else 202, submitted.json()
+
+        if parts == ["status"]:
+            return 200, {
+                "queued": self.queue.qsize(),
+                "jobs": len(self.jobs),
+                "probe cache hits": _probe_cache.hits if _probe_cache else 0,
+                "probe cache misses": _probe_cache.misses if _probe_cache else 0,
+            }
+
+        job = self.jobs.get(parts[1]) if len(parts) >= 2 else None
+
+        if parts[:1] != ["jobs"] or len(parts) > 3 or job is None:
+            return 404, {"error": "not found"}
+
+        if len(parts) == 2:
+            return 200, job.json()
+
+        if parts[2] != "clip":
+            return 404, {"error": "not found"}
+
+        if job.finished is None:
+            return 409, {"error": f"job is {job.status}"}
+
+        try:
+            return 200, job.clips[int(parse_qs(url.query).get("n", ["0"])[0])]
+        except (ValueError, IndexError):
+            return 404, {"error": "no such clip"}
+
+    def submit(self, record: object) -> ServeJob:
+        """queues a job, raising queue.Full if the queue is full"""
+        job = ServeJob(manifest_row(0, record, self.bev))
+
+        if job.row.error is not None:
+            job.status = "invalid"
+            job.error = job.row.error
+            return job
+
+        with self.lock:
+            self.queue.put_nowait(job)
+            self.jobs[job.id] = job
+
+            # forget the jobs that finished first and their clips, never queued or
+            # running ones
+            finished = sorted(
+                (job for job in self.jobs.values() if job.finished is not None),
+                key=lambda job: job.finished or 0.0,
+            )
+            for old in finished[: max(len(finished) - SERVE_JOB_LIMIT, 0)]:
+                del self.jobs[old.id]
+                rmtree(self.bev.dir.joinpath(old.id), ignore_errors=True)
+
+        return job
+
+    def work(self) -> None:
+        """processes queued jobs, forever"""
+        while True:
+            job = self.queue.get()
+            job.status = "running"
+            job.started = time()
+            self.console.print(f"[dim]job {job.id}: {job.row.query}[/]")
+
+            try:
+                job.clips = self.run(job)
+                job.status = "done" if len(job.clips) > 0 else "skipped"
+
+            except PymthegError as err:
+                job.status = "failed"
+                job.error = str(err)
+
+            except Exception as err:
+                self.console.print_exception()
+                job.status = "failed"
+                job.error = f"{type(err).__name__}: {err}"
+
+            job.finished = time()
+            self.console.print(
+                f"[dim]job {job.id}: {job.status} in {job.finished - job.started:.2f}s[/]"
+            )
+
+    def run(self, job: ServeJob) -> List[Path]:
+        """processes a job, returning its clips"""
+        assert job.row.clip_start is not None and job.row.clip_end is not None
+        jobdir = self.bev.dir.joinpath(job.id)
+        jobdir.mkdir(parents=True)
+        clip_job = self.bev.job(job.row.query)._replace(
+            dir=jobdir,
+            clip_start=tuple(job.row.clip_start),
+            clip_end=tuple(job.row.clip_end),
+            name=job.row.out,
+        )
+
+        with TemporaryDirectory(dir=self.opdir) as _tmpdir:
+            tmpdir = Path(_tmpdir)
+            songs = manifest_songs(self.bev, job.row.query, tmpdir, self.store, self.lock)
+
+            for song in songs:
+                clip_job.clips(song, opdir=tmpdir)
+
+        if self.store is not None:
+            with self.lock:
+                self.store.save()
+
+        # without the build cache index of the job directory
+        return sorted(path for path in jobdir.iterdir() if path.name != BUILD_INDEX)
+
+
+def serve(console: LazyConsole, bev: Behaviour) -> None:
+    """
+    runs pymtheg as a long-running http job server until interrupted, see
+    JobServer.respond()
+
+    console: LazyConsole
+        console used for printing
+    bev: Behaviour
+        behaviour object
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from mimetypes import guess_type
+
+    assert bev.serve is not None
+    bev.dir.mkdir(parents=True, exist_ok=True)
+    set_thread_budget(bev.cpus, workers=bev.serve.workers)
+    set_timeouts(bev.download_timeout, bev.encode_timeout)
+
+    class ServeHandler(BaseHTTPRequestHandler):
+        """serve mode request handler, see JobServer.respond()"""
+
+        def do_GET(self) -> None:
+            self.reply(*jobs.respond("GET", self.path, b""))
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0) or 0)
+            self.reply(*jobs.respond("POST", self.path, self.rfile.read(length)))
+
+        def reply(self, code: int, data: object) -> None:
+            """sends json data, or a clip"""
+            if isinstance(data, Path):
+                self.send_response(code)
+                self.send_header(
+                    "Content-Type", guess_type(data.name)[0] or "application/octet-stream"
+                )
+                self.send_header("Content-Length", str(data.stat().st_size))
+                self.send_header(
+                    "Content-Disposition", f'attachment; filename="{data.name}"'
+                )
+                self.end_headers()
+
+                with open(data, "rb") as file:
+                    copyfileobj(file, self.wfile)
+
+                return
+
+            body = dumps(data).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            console.print(f"[dim]{self.address_string()} {format % args}[/]")
+
+    with TemporaryDirectory(
+        dir=work_dir(bev.workdir, ram=False)
+    ) as _tmpdir, ThreadingHTTPServer(
+        (bev.serve.host, bev.serve.port), ServeHandler
+    ) as server:
+        server.daemon_threads = True
+        jobs = JobServer(bev, Path(_tmpdir), console)
+        console.print(
+            f"{premsg_info} serving on http://{bev.serve.host}:{bev.serve.port} "
+            f'with {bev.serve.workers} worker(s), clips are written to "{bev.dir}"'
+        )
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            console.print(f"\n{premsg_info} stopping")
+            terminate_programs()
+
+
+def watch(console: LazyConsole, bev: Behaviour) -> None:
+    """
+    watches a directory (-wa, --watch) for songs until interrupted, clipping each with
+    the default timestamps once it is fully written, i.e. once its size and modification
+    time haven't changed for WATCH_SETTLE seconds. songs are recorded in an index file
+    in the directory (WATCH_INDEX) once processed, so that they are not processed again
+    after a restart unless they changed
+
+    console: LazyConsole
+        console used for printing
+    bev: Behaviour
+        behaviour object
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    assert bev.watch is not None
+    directory = bev.watch.absolute()
+    index_path = directory.joinpath(WATCH_INDEX)
+    bev = bev._replace(use_defaults=True, yes=True)
+    set_thread_budget(bev.cpus, workers=bev.jobs)
+    set_timeouts(bev.download_timeout, bev.encode_timeout)
+
+    songs: Dict[str, Dict[str, object]] = {}
+    settling: Dict[str, Tuple[Tuple[int, int], float]] = {}  # stat, and when first seen
+    processing: Set[str] = set()
+    outputs: Dict[str, Optional[str]] = {}  # output name by song, see unique_name()
+    names: Dict[str, int] = {}
+    lock = RLock()  # reentrant, as songs may finish while being submitted
+    stopping = False
+    watcher = DirectoryWatcher()
+
+    try:
+        songs = loads(index_path.read_text(encoding="utf-8"))["songs"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    # songs keep the output names they were given before a restart
+    for name, song in songs.items():
+        if "out" in song:
+            key = Path(name).stem.casefold()
+            names[key] = names.get(key, 0) + 1
+            outputs[name] = None if song["out"] is None else str(song["out"])
+
+            if song["out"] is not None:
+                names[str(song["out"]).casefold()] = 1
+
+    def finish(name: str, stat: Tuple[int, int], future: "Future[SongOutcome]") -> None:
+        """records a processed song in the index"""
+        if stopping or future.cancelled():
+            return  # interrupted songs are processed again on the next run
+
+        try:
+            outcome = future.result()
+        except Exception as err:
+            outcome = SongOutcome(source=name, done=False, error=err)
+
+        with lock:
+            processing.discard(name)
+            songs[name] = {
+                "size": stat[0],
+                "mtime": stat[1],
+                "status": "processed"
+                if outcome.done
+                else "skipped"
+                if outcome.error is None
+                else "failed",
+                "error": None if outcome.error is None else str(outcome.error),
+                "out": outputs.get(name),
+                "processed": time(),
+            }
+
+            partial_path = index_path.with_name(f"{WATCH_INDEX}.{os.getpid()}")
+            partial_path.write_text(
+                dumps({"version": 1, "songs": songs}, indent=2), encoding="utf-8"
+            )
+            os.replace(partial_path, index_path)
+
+    console.print(
+        f'{premsg_info} watching "{directory}" for songs, clips are written to '
+        f'"{bev.dir}"'
+    )
+    print_header(console, bev)
+
+    with TemporaryDirectory(
+        dir=work_dir(bev.workdir, ram=False)
+    ) as _tmpdir, ThreadPoolExecutor(max_workers=bev.jobs) as pool:
+        try:
+            while True:
+                found, directories = scan_directory(directory)
+                watcher.watch(directories)
+                now = perf_counter()
+
+                with lock:
+                    for name, stat in found.items():
+                        song = songs.get(name, {})
+
+                        if (
+                            name in processing
+                            or (
+                                song.get("size"),
+                                song.get("mtime"),
+                            )
+                            == stat
+                        ):
+                            continue
+
+                        if name not in settling or settling[name][0] != stat:
+                            settling[name] = (stat, now)
+                            continue
+
+                        if now - settling[name][1] < WATCH_SETTLE:
+                            continue
+
+                        del settling[name]
+                        processing.add(name)
+
+                        if name not in outputs:
+                            outputs[name] = unique_name(Path(name), names)
+
+                        pool.submit(
+                            clip_song,
+                            directory.joinpath(name),
+                            bev=bev,
+                            opdir=Path(_tmpdir),
+                            console=console,
+                            spinner=False,
+                            name=outputs[name],
+                        ).add_done_callback(partial(finish, name, stat))
+
+                    # forget songs removed before they were fully written
+                    for name in set(settling) - set(found):
+                        del settling[name]
+
+                watcher.wait(WATCH_SETTLE if len(settling) > 0 else None)
+
+        except KeyboardInterrupt:
+            console.print(f"\n{premsg_info} stopping")
+            stopping = True
+            terminate_programs()
+
+        finally:
+            watcher.close()
+
+
+def scan_directory(
+    directory: Path,
+) -> Tuple[Dict[str, Tuple[int, int]], List[Path]]:
+    """
+    returns the size and modification time of every song in a directory and its
+    subdirectories by relative path, ignoring hidden files and directories, along with
+    every directory scanned
+    """
+    songs: Dict[str, Tuple[int, int]] = {}
+    directories = [directory]
+
+    # directories found are appended while iterating, and scanned in turn
+    for current in directories:
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            directories.append(Path(entry.path))
+
+                        elif entry.is_file() and (
+                            os.path.splitext(entry.name)[1].lower() in SONG_SUFFIXES
+                        ):
+                            stat = entry.stat()
+                            songs[os.path.relpath(entry.path, directory)] = (
+                                stat.st_size,
+                                stat.st_mtime_ns,
+                            )
+
+                    except OSError:
+                        continue  # removed in the meantime
+
+        except OSError:
+            continue
+
+    return songs, directories
+
+
+class DirectoryWatcher:
+    """
+    waits for files to be created, written, moved or deleted in directories, with
+    inotify where it is available (linux), or for a polling interval otherwise
+    """
+
+    # IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    MASK: int = 0x008 | 0x040 | 0x080 | 0x100 | 0x200
+
+    def __init__(self) -> None:
+        self._fd: Optional[int] = None
+        self._libc: Any = None
+
+        if os.name == "nt":
+            return  # ctypes can't load the running process as a library here
+
+        try:
+            import ctypes
+
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+
+        except (OSError, AttributeError, TypeError):
+            return  # not linux
+
+        if fd >= 0:
+            self._fd = fd
+            self._libc = libc
+
+    def watch(self, directories: Iterable[Path]) -> None:
+        """watches directories, directories already watched are left as-is"""
+        if self._libc is None:
+            return
+
+        for directory in directories:
+            self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        waits for a change in a watched directory or until `timeout` seconds passed,
+        whichever is first. without inotify, waits for `timeout` seconds or the polling
+        interval (WATCH_INTERVAL), whichever is shorter
+        """
+        if self._fd is None:
+            sleep(WATCH_INTERVAL if timeout is None else min(timeout, WATCH_INTERVAL))
+            return
+
+        from select import select
+
+        if len(select([self._fd], [], [], timeout)[0]) > 0:
+            try:
+                while os.read(self._fd, 64 * 1024):
+                    pass  # events aren't looked into, directories are scanned again
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        """stops watching every directory"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._libc = None
+
+
+def stage(console: LazyConsole, message: str, spinner: bool = True) -> ContextManager:
+    """
+    returns a status spinner for a processing stage, or a no-op context manager if
+    spinners are disabled (e.g. when songs are processed concurrently)
+    """
+    if spinner:
+        return console.status(message, spinner="arc")
+    return nullcontext()
+
+
+def pymtheg(
+    song_path: Path,
+    bev: Behaviour,
+    opdir: Path,
+    console: LazyConsole,
+    spinner: bool = True,
+    name: Optional[str] = None,
+) -> List[ClipResult]:
+    """
+    where the magic happens, returning the clips of a song, empty if it was skipped
+
+    song_path: Path
+        path to song
+    bev: Behaviour
+        behaviour object
+    opdir: Path
+        an operation directory, usually a tmpdir
+    console: LazyConsole
+        console used for printing
+    spinner: bool = True
+        show status spinners for each stage
+    name: Optional[str] = None
+        output file name (without timestamp or extension), defaults to the songs name
+    """
+    with profile(song_path.stem, "song"):
+        # duration retrieval
+        with stage(console, f"[dim]status: probe song duration[/]", spinner), profile(
+            "probe", "stage"
+        ):
+            song_info = probe(
+                song_path, cache=get_probe_cache() if bev.probe_cache else None
+            )
+            song_duration = song_info.duration
+
+        # stream copy the songs audio if it is already what the clip would be encoded to
+        audio_copy = bev.stream_copy and can_copy_audio(
+            song_info.codec, bev.ffargs, bev.ext
+        )
+        audio_codec = ENCODER_CODECS.get(
+            get_arg(bev.ffargs, AUDIO_CODEC_OPTIONS) or "", ""
+        )
+
+        console.print(
+            "- [bold]{name}[/]{duration} [dim]({audio})[/]".format(
+                name=song_path.stem,
+                duration=f" ({to_timestamp(song_duration)})"
+                if not bev.use_defaults
+                else "",
+                audio=f"{song_info.codec}, copied"
+                if audio_copy
+                else f"{song_info.codec} -> {audio_codec or 'transcoded'}",
+            )
+        )
+
+        # generate query/info messages
+        _msg_format = "    {}: "
+        _query_clip_end = f"clip end ({format_timestamps(bev.clip_end)})"
+        _query_clip_start = f"clip start ({format_timestamps(bev.clip_start)})"
+        _query_new_filename = "filename"
+        _info_status = "status"
+        _info_notice = "notice"
+        _longest_msg_len = len(
+            max(
+                _query_new_filename,
+                _query_clip_end,
+                _query_clip_start,
+                _info_status,
+                _info_notice,
+                key=len,
+            )
+        )
+
+        query_clip_end = _msg_format.format(
+            _query_clip_end.rjust(_longest_msg_len),
+        )
+        query_clip_start = _msg_format.format(
+            _query_clip_start.rjust(_longest_msg_len),
+        )
+        query_new_filename = _msg_format.format(
+            _query_new_filename.rjust(_longest_msg_len),
+        )
+        info_status = _msg_format[2:].format(
+            _info_status.rjust(_longest_msg_len),
+        )
+        info_notice = _msg_format.format(_info_notice.rjust(_longest_msg_len))
+        indent = len(_msg_format) - 2 + _longest_msg_len
+
+        song_path = song_path.absolute()
+
+        # get timestamps
+        cache = get_probe_cache() if bev.probe_cache else None
+        windows = pair_timestamps(bev.clip_start, bev.clip_end)
+        assert windows is not None  # validated by get_args() and manifest_row()
+
+        with stage(
+            console,
+            f"[dim]status: find most energetic part[/]",
+            spinner and any(start.energetic for start in bev.clip_start),
+        ):
+            clips = parse_windows(windows, song_duration, song_path, cache)
+
+        if not bev.use_defaults:
+            # timestamp prompt
+            while True:
+                _start_timestamps: Optional[List[Timestamp]] = None
+                _end_timestamps: Optional[List[Timestamp]] = None
+
+                # starting timestamp
+                while True:
+                    cs_response = input(query_clip_start)
+
+                    if cs_response != "":
+                        _start_timestamps = check_timestamps(0, cs_response)
+
+                        if _start_timestamps is None:
+                            # invalid format
+                            console.print(
+                                "[dim][red]"
+                                + (" " * indent)
+                                + ("^" * len(cs_response))
+                                + "[/dim][bold] invalid timestamp",
+                            )
+
+                        else:
+                            if any(ts.ss > song_duration for ts in _start_timestamps):
+                                # invalid, timestamp >= song duration
+                                console.print(
+                                    "[dim][red]"
+                                    + (" " * indent)
+                                    + ("^" * len(cs_response))
+                                    + "[/dim][bold] timestamp exceeds song duration",
+                                )
+
+                            else:
+                                break
+
+                    else:
+                        _start_timestamps = bev.clip_start
+                        break
+
+                # ending timestamp
+                while True:
+                    ce_response = input(query_clip_end)
+
+                    if ce_response != "":
+                        _end_timestamps = check_timestamps(1, ce_response)
+
+                        if _end_timestamps is None:
+                            # invalid format
+                            console.print(
+                                "[dim][red]"
+                                + (" " * indent)
+                                + ("^" * len(cs_response))
+                                + "[/dim][bold] invalid timestamp",
+                            )
+
+                        else:
+                            break
+
+                    else:
+                        _end_timestamps = bev.clip_end
+                        break
+
+                assert _start_timestamps is not None and _end_timestamps is not None
+                _windows = pair_timestamps(_start_timestamps, _end_timestamps)
+
+                if _windows is None:
+                    console.print(
+                        "[dim][red]"
+                        + (" " * indent)
+                        + ("^" * len(ce_response))
+                        + "[/dim][bold] number of clip starts and ends differ",
+                    )
+                    continue
+
+                try:
+                    check_energetic(_windows)
+                except TimestampError as err:
+                    console.print(
+                        "[dim][red]"
+                        + (" " * indent)
+                        + ("^" * len(ce_response))
+                        + f"[/dim][bold] {err}",
+                    )
+                    continue
+
+                # parse timestamps
+                with stage(
+                    console,
+                    f"[dim]{info_status}find most energetic part[/]",
+                    spinner and any(start.energetic for start, _ in _windows),
+                ):
+                    clips = parse_windows(_windows, song_duration, song_path, cache)
+
+                # confirm timestamps
+                if bev.yes:
+                    break
+
+                # dont prompt confirmation if defaults were used
+                if not (cs_response == "" and ce_response == ""):
+                    for start_timestamp, end_timestamp in clips:
+                        console.print(
+                            "{premsg}clip duration: {start} -> {end} ({duration}s)".format(
+                                premsg=info_notice,
+                                start=to_timestamp(start_timestamp),
+                                end=to_timestamp(end_timestamp),
+                                duration=end_timestamp - start_timestamp,
+                            )
+                        )
+                    confirmation_response = input(
+                        f"{' ' * indent}confirm? [y/n] (y) "
+                    ).lower()
+
+                    if confirmation_response == "y" or confirmation_response == "":
+                        break
+
+                    else:
+                        pass
+
+                else:
+                    break
+
+        else:
+            clips = [(start, end) for start, end in clips if start <= song_duration]
+
+            if len(clips) == 0:
+                console.print(f"{info_notice}skipping song")
+                return []
+
+        # construct and confirm output paths
+        outputs: List[Tuple[int, int, Path]] = []
+        up_to_date: List[ClipResult] = []
+        job = bev.job(song_path)
+
+        for start_timestamp, end_timestamp in clips:
+            out_path = clip_path(
+                bev.dir,
+                name or song_path.stem,
+                None if bev.no_timestamp else bev.timestamp_format,
+                start_timestamp,
+                end_timestamp,
+                bev.ext,
+            )
+
+            if clip_up_to_date(job, song_path, start_timestamp, end_timestamp, out_path):
+                console.print(f'{info_notice}"{out_path.name}" is up to date, skipping')
+                up_to_date.append(
+                    ClipResult(
+                        path=out_path,
+                        song=song_path,
+                        start=start_timestamp,
+                        end=end_timestamp,
+                        audio_copied=audio_copy,
+                        cached=True,
+                    )
+                )
+                continue
+
+            if (
+                # no -o specified and out_path exists
+                out_path.exists()
+                and bev.yes is False
+            ):
+                console.print(f'{info_notice}"{out_path.name}" exists in output dir.')
+                overwrite_response = input(
+                    f"{' ' * indent}overwrite? ([y]es/[n]o/[c]hange) "
+                ).lower()
+
+                if overwrite_response == "y":
+                    pass
+
+                elif overwrite_response == "c":
+                    while True:
+                        new_filename_response = input(query_new_filename)
+                        new_out_path = Path(new_filename_response)
+                        if new_out_path.exists():
+                            console.print(
+                                (" " * indent) + ("^" * len(new_filename_response)),
+                                "file already exists",
+                            )
+                        else:
+                            out_path = new_out_path
+                            break
+
+                else:
+                    console.print(
+                        f"{info_notice}skipping {'song' if len(clips) == 1 else 'clip'}"
+                    )
+                    continue
+
+            outputs.append((start_timestamp, end_timestamp, out_path))
+
+        if len(outputs) == 0:
+            return up_to_date
+
+        spinners: List[Any] = []
+
+        def clip_status(message: str) -> ContextManager:
+            """returns the spinner of a clip creation stage"""
+            spinners.append(stage(console, f"[dim]{info_status}{message}[/]", spinner))
+            return spinners[-1]
+
+        def clip_progress(done: float, speed: Optional[float]) -> None:
+            """shows the progress of clip creation on its spinner"""
+            spinners[-1].update(
+                f"[dim]{info_status}create clip ({done:.0%}"
+                + ("" if speed is None else f", {speed:g}x")
+                + ")[/]"
+            )
+
+        return up_to_date + create_clips(
+            job,
+            song_path,
+            song_info,
+            outputs,
+            opdir,
+            status=clip_status,
+            progress=clip_progress if spinner else None,
+        )
+
+
+def clip_path(
+    directory: Path,
+    name: str,
+    timestamp_format: Optional[str],
+    start: int,
+    end: int,
+    ext: str,
+) -> Path:
+    """
+    returns the absolute output path of a clip
+
+    directory: Path
+        directory to output to
+    name: str
+        output file name, without timestamp or extension
+    timestamp_format: Optional[str]
+        timestamp format, formattable (see formatting), or None for no timestamp
+    start: int
+        clip start in seconds
+    end: int
+        clip end in seconds
+    ext: str
+        clip file extension
+    """
+    return directory.joinpath(
+        "{name}{timestamp}.{ext}".format(
+            name=name,
+            timestamp=tf_format(string=timestamp_format, clip_start=start, clip_end=end)
+            if timestamp_format is not None
+            else "",
+            ext=ext,
+        )
+    ).absolute()
+
+
+def create_clip(
+    job: ClipJob,
+    song_path: Path,
+    song_info: SongInfo,
+    start: int,
+    end: int,
+    out_path: Path,
+    opdir: Path,
+    status: Optional[Callable[[str], ContextManager]] = None,
+) -> ClipResult:
+    """creates a clip of a song, see create_clips()"""
+    return create_clips(
+        job, song_path, song_info, [(start, end, out_path)], opdir, status=status
+    )[0]
+
+
+def create_clips(
+    job: ClipJob,
+    song_path: Path,
+    song_info: SongInfo,
+    clips: List[Tuple[int, int, Path]],
+    opdir: Path,
+    status: Optional[Callable[[str], ContextManager]] = None,
+    progress: Optional[Callable[[float, Optional[float]], None]] = None,
+) -> List[ClipResult]:
+    """
+    creates clips of a song with a single ffmpeg invocation, sharing its album art
+    between them, see ClipJob.clips(). clips already created with the same fingerprint
+    are skipped unless the job is forced to create them, see BuildCache
+
+    job: ClipJob
+        clip job, for its clip creation options
+    song_path: Path
+        path to song
+    song_info: SongInfo
+        probed song information
+    clips: List[Tuple[int, int, Path]]
+        start and end in seconds, and path to write to (overwritten if it exists), of
+        every clip
+    opdir: Path
+        an operation directory for intermediates, usually a tmpdir
+    status: Optional[Callable[[str], ContextManager]] = None
+        returns a context manager to show the status of a stage with, e.g. a spinner
+    progress: Optional[Callable[[float, Optional[float]], None]] = None
+        called with the fraction of clip creation done and its speed (relative to
+        realtime, if known) as ffmpeg reports it
+    """
+    cached = [
+        clip_up_to_date(job, song_path, start, end, out_path)
+        for start, end, out_path in clips
+    ]
+    pending = [clip for clip, skip in zip(clips, cached) if not skip]
+    results = (
+        []
+        if len(pending) == 0
+        else encode_clips(
+            job, song_path, song_info, pending, opdir, status=status, progress=progress
+        )
+    )
+
+    if len(results) > 0:
+        for result in results:
+            cache = get_build_cache(result.path.parent)
+            cache.put(
+                result.path,
+                clip_fingerprint(job, file_hash(song_path), result.start, result.end),
+                song_path,
+            )
+
+        for directory in {result.path.parent for result in results}:
+            get_build_cache(directory).save()
+
+    audio_copied = job.stream_copy and can_copy_audio(
+        song_info.codec, list(job.ffargs), job.ext
+    )
+    encoded = iter(results)
+    return [
+        ClipResult(
+            path=out_path,
+            song=song_path.absolute(),
+            start=start,
+            end=end,
+            audio_copied=audio_copied,
+            cached=True,
+        )
+        if skip
+        else next(encoded)
+        for (start, end, out_path), skip in zip(clips, cached)
+    ]
+
+
+def encode_clips(
+    job: ClipJob,
+    song_path: Path,
+    song_info: SongInfo,
+    clips: List[Tuple[int, int, Path]],
+    opdir: Path,
+    status: Optional[Callable[[str], ContextManager]] = None,
+    progress: Optional[Callable[[float, Optional[float]], None]] = None,
+) -> List[ClipResult]:
+    """
+    creates clips of a song with a single ffmpeg invocation, without looking them up in
+    the build cache, see create_clips()
+    """
+
+    @contextmanager
+    def stage(message: str) -> Iterator[None]:
+        with profile(message, "stage"), (
+            nullcontext() if status is None else status(message)
+        ):
+            yield
+
+    # construct working paths, in a directory of their own so that songs with the same
+    # name don't overwrite each others intermediates, in memory if there is space left
+    parent = work_dir(job.workdir) or (opdir if has_space(opdir) else None)
+    with TemporaryDirectory(dir=parent) as _workdir, ExitStack() as held:
+        workdir = Path(_workdir)
+        song_path = song_path.absolute()
+        video_clip_paths = [
+            workdir.joinpath(f"{song_path.stem}_clip{index}.mp4").absolute()
+            for index in range(len(clips))
+        ]
+
+        if job.pipe:
+            # written beside the output paths instead, so that they are only written once
+            video_clip_paths = [
+                out_path.absolute().with_name(
+                    f".{out_path.stem}.{os.getpid()}.{get_ident()}{out_path.suffix}"
+                )
+                for _, _, out_path in clips
+            ]
+
+        ffargs = list(job.ffargs)
+        audio_copy = job.stream_copy and can_copy_audio(song_info.codec, ffargs, job.ext)
+
+        if audio_copy:
+            ffargs = set_arg(ffargs, AUDIO_CODEC_OPTIONS, "copy")
+
+        # get album art if needed
+        song_cover_path: Optional[Path] = None
+        song_cover: Optional[bytes] = None
+        video_input: List[Union[str, Path]] = []
+        video_inputs: Dict[int, List[Union[str, Path]]] = {}  # by clip duration
+
+        if job.image is not None:  # custom image was specified
+            if job.max_size <= 0:
+                song_cover_path = job.image
+
+            elif job.pipe:
+                # downscale and loop the image within clip creation itself
+                video_input = ["-i", job.image]
+                ffargs = loop_cover(ffargs, job.max_size)
+
+            else:
+                with stage("get album art"):
+                    song_cover_path = get_image(
+                        job.image, workdir, job.max_size, job.cover_cache
+                    )
+                    held.callback(release_cached, song_cover_path)
+
+        elif song_info.cover and job.single_pass:
+            # loop the songs attached picture within clip creation itself
+            video_input = ["-i", song_path]
+            ffargs = loop_cover(ffargs, job.max_size)
+
+        elif job.pipe:
+            # loop the cover as piped into clip creation, without writing it anywhere
+            with stage("get album art"):
+                song_cover = cover_data(song_path, song_info) or placeholder_data()
+
+            video_input = ["-i", "pipe:0"]
+            ffargs = loop_cover(ffargs, job.max_size)
+
+        else:
+            with stage("get album art"):
+                song_cover_path = get_cover(
+                    song_path, song_info, workdir, job.max_size, job.cover_cache
+                )
+                held.callback(release_cached, song_cover_path)
+
+        if song_cover_path is not None:
+            video_input = looped_image(song_cover_path, ffargs)
+
+            if job.video_cache and not (job.single_pass or job.pipe):
+                # reuse already encoded video tracks of the cover, only muxing them
+                with stage("encode video"):
+                    for start, end, _ in clips:
+                        if end - start in video_inputs:
+                            continue
+
+                        video_path = get_video(
+                            cover_path=song_cover_path,
+                            duration=end - start,
+                            ffargs=list(job.ffargs),
+                            ext=job.ext,
+                            workdir=workdir,
+                        )
+                        held.callback(release_cached, video_path)
+                        video_inputs[end - start] = ["-i", video_path]
+
+                    ffargs = set_arg(strip_args(ffargs, VIDEO_OPTIONS), ["-c:v"], "copy")
+
+        # create clips, seeking into the song directly rather than clipping it beforehand.
+        # every clip is an input of its own, so only the clipped parts of the song are
+        # decoded, followed by the looped cover (decoded once for every clip) or cached
+        # video tracks as inputs
+        with stage("create clip"), get_thread_budget().encode() as threads:
+            args: List[Union[str, Path]] = ["-filter_threads", str(threads)]
+            on_line: Optional[Callable[[str], None]] = None
+
+            if progress is not None:
+                args = ["-progress", "pipe:1", "-nostats", *args]
+                on_line = progress_reader(
+                    max(end - start for start, end, _ in clips), progress
+                )
+
+            for start, end, _ in clips:
+                args += ["-ss", str(start), "-to", str(end), "-i", song_path]
+
+            if len(video_inputs) > 0:
+                video_streams = {
+                    duration: len(clips) + index
+                    for index, duration in enumerate(video_inputs)
+                }
+                for inputs in video_inputs.values():
+                    args += inputs
+
+            else:
+                video_streams = {end - start: len(clips) for start, end, _ in clips}
+                args += video_input
+
+            for index, (start, end, _) in enumerate(clips):
+                args += [
+                    "-t",
+                    str(end - start),
+                    "-map",
+                    f"{index}:a:0",
+                    "-map",
+                    f"{video_streams[end - start]}:v:0",
+                    "-disposition:v",
+                    "0",
+                    "-threads",
+                    str(threads),
+                    *ffargs,
+                    "-y",
+                    video_clip_paths[index],
+                ]
+
+            try:
+                try:
+                    invocate(
+                        name="ffmpeg",
+                        args=args,
+                        errcode=3,
+                        capture_output=True,
+                        input=song_cover,
+                        on_line=on_line,
+                    )
+
+                except InvocationError:
+                    if song_cover is None or song_cover == placeholder_data():
+                        raise
+
+                    # embedded picture couldn't be decoded, so use a placeholder
+                    invocate(
+                        name="ffmpeg",
+                        args=args,
+                        errcode=3,
+                        capture_output=True,
+                        input=placeholder_data(),
+                        on_line=on_line,
+                    )
+
+            except InvocationError:
+                for video_clip_path in video_clip_paths:
+                    if video_clip_path.exists():
+                        video_clip_path.unlink()
+                raise
+
+            for video_clip_path, (_, _, out_path) in zip(video_clip_paths, clips):
+                move(str(video_clip_path), str(out_path))
+
+    return [
+        ClipResult(
+            path=out_path, song=song_path, start=start, end=end, audio_copied=audio_copy
+        )
+        for start, end, out_path in clips
+    ]
+
+
+def progress_reader(
+    duration: float, report: Callable[[float, Optional[float]], None]
+) -> Callable[[str], None]:
+    """
+    returns an on_line callback of invocate() for ffmpeg invocated with -progress pipe:1,
+    reporting every progress update of it
+
+    duration: float
+        duration of the longest output in seconds
+    report: Callable[[float, Optional[float]], None]
+        called with the fraction done (from 0 to 1) and the speed relative to realtime,
+        if known
+    """
+    values: Dict[str, str] = {}
+
+    def on_line(line: str) -> None:
+        key, _, value = line.strip().partition("=")
+        values[key] = value
+
+        if key != "progress":  # the last key of every update
+            return
+
+        try:
+            # out_time_ms is also in microseconds, and the only key of older ffmpegs
+            done = int(values.get("out_time_us", values.get("out_time_ms", ""))) / 1e6
+        except ValueError:
+            return  # "N/A" before anything was written
+
+        try:
+            speed: Optional[float] = float(values.get("speed", "").rstrip("x"))
+        except ValueError:
+            speed = None
+
+        report(1.0 if value == "end" else min(max(done / duration, 0), 1), speed)
+
+    return on_line
+
+
+def probe(song_path: Path, cache: Optional[ProbeCache] = None) -> SongInfo:
+    """
+    probes a song for its duration, audio codec and whether it has an album cover,
+    reading container headers natively and only invocating ffprobe if that fails
+
+    song_path: Path
+        path to song
+    cache: Optional[ProbeCache] = None
+        probe cache to look up and store the result in
+    """
+    if cache is not None:
+        cached = cache.get(song_path)
+        if cached is not None:
+            return cached
+
+    info = read_song_info(song_path)
+
+    if info is None:
+        info = probe_ffprobe(song_path)
+
+    if cache is not None:
+        cache.put(song_path, info)
+
+    return info
+
+
+def probe_ffprobe(song_path: Path) -> SongInfo:
+    """
+    probes a song for its duration, audio codec and whether it has an album cover using
+    ffprobe, raising ProbeError if it can't be probed
+
+    song_path: Path
+        path to song
+    """
+    try:
+        proc = invocate(
+            name="ffprobe",
+            args=[
+                "-print_format",
+                "json",
+                "-show_entries",
+                "format=duration:stream=codec_name,codec_type:stream_disposition=attached_pic",
+                song_path,
+            ],
+            capture_output=True,
+        )
+    except InvocationError as err:
+        raise ProbeError(f'could not probe "{song_path.name}"') from err
+
+    try:
+        probed = loads(proc.stdout)
+        codec = ""
+        cover = False
+
+        for stream in probed.get("streams", []):
+            if stream.get("codec_type") == "audio" and codec == "":
+                codec = stream.get("codec_name", "")
+            elif stream.get("disposition", {}).get("attached_pic", 0) == 1:
+                cover = True
+
+        return SongInfo(
+            duration=int(probed["format"]["duration"].split(".")[0]),
+            codec=codec,
+            cover=cover,
+        )
+
+    except (ValueError, KeyError, AttributeError) as err:
+        raise ProbeError(f'could not probe "{song_path.name}" ({err})') from err
+
+
+def read_song_info(song_path: Path) -> Optional[SongInfo]:
+    """
+    reads song information from container headers without spawning ffprobe or decoding
+    audio, supports mp4/m4a, mp3, flac, ogg (opus/vorbis) and wav
+
+    song_path: Path
+        path to song
+
+    returns a SongInfo object, or None if the song could not be read
+    """
+    try:
+        with open(song_path, "rb") as song:
+            magic = song.read(12)
+
+            if magic[4:8] == b"ftyp":
+                return read_mp4_info(song)
+
+            elif magic[:4] == b"fLaC":
+                return read_flac_info(song, offset=0)
+
+            elif magic[:4] == b"OggS":
+                return read_ogg_info(song)
+
+            elif magic[:4] == b"RIFF" and magic[8:12] == b"WAVE":
+                return read_wav_info(song)
+
+            elif magic[:3] == b"ID3" or (
+                len(magic) > 1 and magic[0] == 0xFF and magic[1] & 0xE0 == 0xE0
+            ):
+                return read_mp3_info(song)
+
+    except (OSError, ValueError, IndexError, struct.error):
+        pass
+
+    return None
+
+
+def _mp4_boxes(song: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """yields the type, data start and end offsets of mp4 boxes within a range"""
+    offset = start
+
+    while offset + 8 <= end:
+        song.seek(offset)
+        size, kind = struct.unpack(">I4s", song.read(8))
+        header = 8
+
+        if size == 1:
+            size = struct.unpack(">Q", song.read(8))[0]
+            header = 16
+
+        elif size == 0:
+            size = end - offset
+
+        if size < header:
+            raise ValueError("invalid mp4 box size")
+
+        yield kind, offset + header, min(offset + size, end)
+        offset += size
+
+
+def _mp4_find(
+    song: BinaryIO, start: int, end: int, *path: bytes
+) -> Optional[Tuple[int, int]]:
+    """returns the data start and end offsets of a nested mp4 box, or None if not found"""
+    for kind, box_start, box_end in _mp4_boxes(song, start, end):
+        if kind == path[0]:
+            if len(path) == 1:
+                return box_start, box_end
+
+            # meta is a full box, so its children come after its version and flags
+            return _mp4_find(
+                song, box_start + (4 if kind == b"meta" else 0), box_end, *path[1:]
+            )
+
+    return None
+
+
+def read_mp4_info(song: BinaryIO) -> Optional[SongInfo]:
+    """reads song information from the moov box of an mp4/m4a file"""
+    end = song.seek(0, os.SEEK_END)
+    moov = _mp4_find(song, 0, end, b"moov")
+
+    if moov is None:
+        return None
+
+    duration: Optional[float] = None
+    codec = ""
+    cover = False
+
+    for kind, start, stop in list(_mp4_boxes(song, *moov)):
+        if kind == b"mvhd":
+            song.seek(start)
+            if song.read(1)[0] == 1:
+                song.seek(start + 20)
+                timescale, length = struct.unpack(">IQ", song.read(12))
+            else:
+                song.seek(start + 12)
+                timescale, length = struct.unpack(">II", song.read(8))
+
+            if timescale > 0 and length > 0:
+                duration = length / timescale
+
+        elif kind == b"trak":
+            hdlr = _mp4_find(song, start, stop, b"mdia", b"hdlr")
+            stsd = _mp4_find(song, start, stop, b"mdia", b"minf", b"stbl", b"stsd")
+
+            if hdlr is None or stsd is None:
+                return None
+
+            song.seek(hdlr[0] + 8)
+            if song.read(4) != b"soun":
+                return None  # not an audio-only file
+
+            # first sample entry, after the version, flags and entry count
+            song.seek(stsd[0] + 12)
+            entry_format = song.read(4)
+            codec = codec or MP4_CODECS.get(entry_format, "")
+
+            if entry_format == b"mp4a":
+                # mp4a can hold mp3 as well as aac, so check the object type in esds
+                entry = song.read(min(stsd[1] - stsd[0], 4096))
+                esds = entry.find(b"esds")
+                object_type = _esds_object_type(entry[esds + 8 :]) if esds >= 0 else None
+
+                if object_type is None:
+                    return None
+
+                codec = "mp3" if object_type in (0x69, 0x6B) else "aac"
+
+        elif kind in (b"udta", b"meta"):
+            path = (b"meta", b"ilst", b"covr") if kind == b"udta" else (b"ilst", b"covr")
+            offset = 4 if kind == b"meta" else 0
+            if _mp4_find(song, start + offset, stop, *path) is not None:
+                cover = True
+
+    if duration is None or codec == "":
+        return None
+
+    return SongInfo(duration=int(duration), codec=codec, cover=cover)
+
+
+def _esds_object_type(data: bytes) -> Optional[int]:
+    """returns the object type indication of an esds box, after its version and flags"""
+
+    def descriptor(offset: int) -> Tuple[int, int]:
+        """returns the tag of a descriptor and the offset of its contents"""
+        tag = data[offset]
+        offset += 1
+        for _ in range(4):  # sizes are up to four bytes, with the high bit continuing
+            offset += 1
+            if data[offset - 1] & 0x80 == 0:
+                break
+        return tag, offset
+
+    tag, offset = descriptor(0)
+    if tag != 0x03:  # ES_Descriptor
+        return None
+
+    flags = data[offset + 2]
+    offset += 3
+    if flags & 0x80:  # stream dependence
+        offset += 2
+    if flags & 0x40:  # url
+        offset += 1 + data[offset]
+    if flags & 0x20:  # ocr stream
+        offset += 2
+
+    tag, offset = descriptor(offset)
+    if tag != 0x04:  # DecoderConfigDescriptor
+        return None
+
+    return data[offset]
+
+
+def _syncsafe(data: bytes) -> int:
+    """returns the integer of an id3v2 syncsafe integer"""
+    value = 0
+    for byte in data:
+        value = (value << 7) | (byte & 0x7F)
+    return value
+
+
+def _id3_frames(tag: bytes, version: int, flags: int) -> Iterator[Tuple[bytes, bytes]]:
+    """yields the ids and contents of frames in an id3v2 tag, excluding its header"""
+    if flags & 0x80 and version < 4:
+        raise ValueError("unsynchronised id3v2 tags need to be resynchronised first")
+
+    offset = 0
+    if flags & 0x40:  # extended header
+        size = int.from_bytes(tag[:4], "big")
+        offset = _syncsafe(tag[:4]) if version >= 4 else size + 4
+
+    id_length, size_length = (3, 3) if version == 2 else (4, 4)
+    header_length = id_length + size_length + (0 if version == 2 else 2)
+
+    while offset + header_length <= len(tag) and tag[offset] != 0:
+        frame_id = tag[offset : offset + id_length]
+        size_data = tag[offset + id_length : offset + id_length + size_length]
+        size = _syncsafe(size_data) if version >= 4 else int.from_bytes(size_data, "big")
+        offset += header_length
+
+        yield frame_id, tag[offset : offset + size]
+        offset += size
+
+
+def _id3_picture_data(frame_id: bytes, frame: bytes) -> bytes:
+    """returns the image data of an id3v2 APIC (or v2.2 PIC) frame"""
+    encoding = frame[0]
+
+    if frame_id == b"PIC":
+        offset = 5  # encoding, image format and picture type
+    else:
+        offset = frame.index(b"\x00", 1) + 2  # encoding, mime type and picture type
+
+    # description, terminated with two nulls if utf-16
+    if encoding in (1, 2):
+        while frame[offset : offset + 2] != b"\x00\x00":
+            offset += 2
+        return frame[offset + 2 :]
+
+    return frame[frame.index(b"\x00", offset) + 1 :]
+
+
+def _flac_picture_data(block: bytes) -> bytes:
+    """returns the image data of a flac picture metadata block"""
+    offset = 4  # picture type
+    offset += 4 + int.from_bytes(block[offset : offset + 4], "big")  # mime type
+    offset += 4 + int.from_bytes(block[offset : offset + 4], "big")  # description
+    offset += 16  # width, height, colour depth and number of colours
+    length = int.from_bytes(block[offset : offset + 4], "big")
+    return block[offset + 4 : offset + 4 + length]
+
+
+def _vorbis_comments(data: bytes) -> Iterator[Tuple[bytes, bytes]]:
+    """yields the uppercased keys and values of vorbis comments, excluding the magic"""
+    offset = 4 + int.from_bytes(data[:4], "little")  # vendor string
+    count = int.from_bytes(data[offset : offset + 4], "little")
+    offset += 4
+
+    for _ in range(count):
+        length = int.from_bytes(data[offset : offset + 4], "little")
+        key, _, value = data[offset + 4 : offset + 4 + length].partition(b"=")
+        yield key.upper(), value
+        offset += 4 + length
+
+
+def read_mp3_info(song: BinaryIO) -> Optional[SongInfo]:
+    """
+    reads song information from the id3v2 tags and first frame of an mp3 file, using its
+    xing/info (lame) or vbri header if it has one, else assuming a constant bitrate
+    """
+    end = song.seek(0, os.SEEK_END)
+    offset = 0
+    cover = False
+
+    song.seek(0)
+    header = song.read(10)
+
+    while header[:3] == b"ID3" and len(header) == 10:
+        size = _syncsafe(header[6:10])
+        tag = _id3_frames(song.read(size), header[3], header[5])
+        cover = cover or any(frame_id in (b"APIC", b"PIC") for frame_id, _ in tag)
+        offset += 10 + size + (10 if header[5] & 0x10 else 0)  # footer
+        song.seek(offset)
+        header = song.read(10)
+
+    if header[:4] == b"fLaC":
+        info = read_flac_info(song, offset=offset)
+        return info._replace(cover=info.cover or cover) if info is not None else None
+
+    song.seek(offset)
+    data = song.read(65536)
+
+    for pos in range(len(data) - 4):
+        if data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+            continue
+
+        version = (data[pos + 1] >> 3) & 0x03  # 3: mpeg 1, 2: mpeg 2, 0: mpeg 2.5
+        layer = (data[pos + 1] >> 1) & 0x03  # 1: layer iii
+        bitrate_index = data[pos + 2] >> 4
+        rate_index = (data[pos + 2] >> 2) & 0x03
+
+        if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+
+        mpeg1 = version == 3
+        bitrate = MP3_BITRATES[0 if mpeg1 else 1][bitrate_index] * 1000
+        rate = MP3_SAMPLE_RATES[version][rate_index]
+        samples = 1152 if mpeg1 else 576
+        length = samples // 8 * bitrate // rate + ((data[pos + 2] >> 1) & 0x01)
+
+        # make sure this isn't a false sync by checking for the next frame
+        if pos + length + 1 < len(data) and (
+            data[pos + length] != 0xFF or data[pos + length + 1] & 0xE0 != 0xE0
+        ):
+            continue
+
+        mono = data[pos + 3] >> 6 == 3
+        xing = pos + 4 + (32 if mpeg1 and not mono else 9 if mono and not mpeg1 else 17)
+        frames: Optional[int] = None
+
+        if data[xing : xing + 4] in (b"Xing", b"Info"):
+            if int.from_bytes(data[xing + 4 : xing + 8], "big") & 0x01:
+                frames = int.from_bytes(data[xing + 8 : xing + 12], "big")
+
+        elif data[pos + 36 : pos + 40] == b"VBRI":
+            frames = int.from_bytes(data[pos + 50 : pos + 54], "big")
+
+        if frames is not None:
+            duration = frames * samples / rate
+
+        else:
+            audio_end = end
+            song.seek(max(0, end - 128))
+            if song.read(3) == b"TAG":  # id3v1
+                audio_end -= 128
+            duration = (audio_end - offset - pos) * 8 / bitrate
+
+        return SongInfo(duration=int(duration), codec="mp3", cover=cover)
+
+    return None
+
+
+def read_flac_info(song: BinaryIO, offset: int) -> Optional[SongInfo]:
+    """reads song information from the streaminfo and picture blocks of a flac file"""
+    song.seek(offset + 4)
+    rate = 0
+    total_samples = 0
+    cover = False
+    last = False
+
+    while not last:
+        header = song.read(4)
+        if len(header) < 4 or header[0] & 0x7F == 127:
+            return None
+
+        last = header[0] & 0x80 != 0
+        kind = header[0] & 0x7F
+        size = int.from_bytes(header[1:4], "big")
+
+        if kind == 0:  # streaminfo
+            data = song.read(size)
+            rate = int.from_bytes(data[10:13], "big") >> 4
+            total_samples = int.from_bytes(data[13:18], "big") & 0xFFFFFFFFF
+
+        else:
+            cover = cover or kind == 6  # picture
+            song.seek(size, os.SEEK_CUR)
+
+    if rate == 0 or total_samples == 0:
+        return None
+
+    return SongInfo(duration=int(total_samples / rate), codec="flac", cover=cover)
+
+
+def _ogg_packets(song: BinaryIO) -> Iterator[bytes]:
+    """yields packets of the first logical stream in an ogg file"""
+    song.seek(0)
+    serial: Optional[bytes] = None
+    packet = b""
+
+    while True:
+        header = song.read(27)
+        if len(header) < 27 or header[:4] != b"OggS":
+            return
+
+        table = song.read(header[26])
+        data = song.read(sum(table))
+
+        if serial is None:
+            serial = header[14:18]
+
+        if header[14:18] != serial:
+            continue
+
+        pos = 0
+        for lacing in table:
+            packet += data[pos : pos + lacing]
+            pos += lacing
+            if lacing < 255:
+                yield packet
+                packet = b""
+
+
+def read_ogg_info(song: BinaryIO) -> Optional[SongInfo]:
+    """
+    reads song information from the identification and comment headers and the granule
+    position of the last page of an ogg opus/vorbis file
+    """
+    packets = _ogg_packets(song)
+    identification = next(packets, b"")
+    comments = next(packets, b"")
+    preskip = 0
+
+    if identification[:8] == b"OpusHead":
+        codec, rate = "opus", 48000
+        preskip = int.from_bytes(identification[10:12], "little")
+        comments = comments[8:] if comments[:8] == b"OpusTags" else b""
+
+    elif identification[:7] == b"\x01vorbis":
+        codec, rate = "vorbis", int.from_bytes(identification[12:16], "little")
+        comments = comments[7:] if comments[:7] == b"\x03vorbis" else b""
+
+    else:
+        return None
+
+    if comments == b"" or rate == 0:
+        return None
+
+    # pictures are stored as base64 encoded flac picture blocks in comments
+    cover = any(key == b"METADATA_BLOCK_PICTURE" for key, _ in _vorbis_comments(comments))
+
+    # granule position of the last page in the stream
+    song.seek(0)
+    serial = song.read(18)[14:18]
+    end = song.seek(0, os.SEEK_END)
+    song.seek(max(0, end - 65536))
+    tail = song.read()
+    pos = len(tail)
+
+    while True:
+        pos = tail.rfind(b"OggS", 0, pos)
+        if pos < 0:
+            return None
+
+        granule = int.from_bytes(tail[pos + 6 : pos + 14], "little", signed=True)
+        if tail[pos + 14 : pos + 18] == serial and granule >= 0:
+            break
+
+    return SongInfo(duration=int((granule - preskip) / rate), codec=codec, cover=cover)
+
+
+def read_wav_info(song: BinaryIO) -> Optional[SongInfo]:
+    """reads song information from the fmt and data chunks of a riff wav file"""
+    end = song.seek(0, os.SEEK_END)
+    song.seek(12)
+    codec = ""
+    byte_rate = 0
+    data_size = -1
+
+    while True:
+        header = song.read(8)
+        if len(header) < 8:
+            break
+
+        kind, size = struct.unpack("<4sI", header)
+
+        if kind == b"fmt ":
+            fmt = song.read(size)
+            tag, _, _, byte_rate, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+
+            if tag == 0xFFFE and size >= 26:  # extensible, format is in the subformat
+                tag = int.from_bytes(fmt[24:26], "little")
+
+            codec = WAV_CODECS.get((tag, bits), "")
+            song.seek(size & 1, os.SEEK_CUR)
+
+        elif kind == b"data":
+            data_size = min(size, end - song.tell())
+            song.seek(size + (size & 1), os.SEEK_CUR)
+
+        elif kind.lower() == b"id3 ":
+            return None  # may have an attached picture, leave it to ffprobe
+
+        else:
+            song.seek(size + (size & 1), os.SEEK_CUR)
+
+    if codec == "" or byte_rate == 0 or data_size < 0:
+        return None
+
+    return SongInfo(duration=int(data_size / byte_rate), codec=codec, cover=False)
+
+
+def read_cover(song_path: Path) -> Optional[bytes]:
+    """
+    reads the image data of the attached picture (album cover) of a song from its container
+    without spawning ffmpeg, supports the same formats as read_song_info()
+
+    song_path: Path
+        path to song
+
+    returns the image data as stored in the song, or None if it could not be read
+    """
+    try:
+        with open(song_path, "rb") as song:
+            magic = song.read(12)
+            end = song.seek(0, os.SEEK_END)
+
+            if magic[4:8] == b"ftyp":
+                covr = b"moov", b"udta", b"meta", b"ilst", b"covr", b"data"
+                data = _mp4_find(song, 0, end, *covr)
+                if data is not None:
+                    song.seek(data[0] + 8)  # data type and locale
+                    return song.read(data[1] - data[0] - 8)
+
+            elif magic[:4] == b"OggS":
+                packets = _ogg_packets(song)
+                next(packets, b"")
+                comments = next(packets, b"")
+                comments = comments[8:] if comments[:8] == b"OpusTags" else comments[7:]
+
+                for key, value in _vorbis_comments(comments):
+                    if key == b"METADATA_BLOCK_PICTURE":
+                        from base64 import b64decode
+
+                        return _flac_picture_data(b64decode(value))
+
+            else:
+                offset = 0
+                song.seek(0)
+                header = song.read(10)
+
+                while header[:3] == b"ID3" and len(header) == 10:
+                    size = _syncsafe(header[6:10])
+
+                    for frame_id, frame in _id3_frames(
+                        song.read(size), header[3], header[5]
+                    ):
+                        if frame_id in (b"APIC", b"PIC"):
+                            return _id3_picture_data(frame_id, frame)
+
+                    offset += 10 + size + (10 if header[5] & 0x10 else 0)
+                    song.seek(offset)
+                    header = song.read(10)
+
+                if header[:4] == b"fLaC":
+                    song.seek(offset + 4)
+                    last = False
+
+                    while not last:
+                        block = song.read(4)
+                        last = block[0] & 0x80 != 0
+                        size = int.from_bytes(block[1:4], "big")
+
+                        if block[0] & 0x7F == 6:  # picture
+                            return _flac_picture_data(song.read(size))
+
+                        song.seek(size, os.SEEK_CUR)
+
+    except (OSError, ValueError, IndexError, struct.error):
+        pass
+
+    return None
+
+
+def get_cover(
+    song_path: Path,
+    song_info: SongInfo,
+    workdir: Path,
+    max_size: int = 0,
+    cache: bool = True,
+) -> Path:
+    """
+    returns the path to a png album cover for a song, extracted and normalised once per
+    unique embedded picture and maximum size and kept in the cover cache, or the
+    placeholder cover if the song has none. the cover is held (see hold_cached()) until
+    release_cached() is called
+
+    song_path: Path
+        path to song
+    song_info: SongInfo
+        probed song information
+    workdir: Path
+        directory to use if the cover cache directory can't be used
+    max_size: int = 0
+        largest width and height of the cover, 0 for no limit
+    cache: bool = True
+        whether to use the cover cache, else workdir is used
+    """
+    covers = cover_cache(workdir) if cache else workdir
+    data = cover_data(song_path, song_info)
+
+    if data is not None:
+        try:
+            return normalise_cover(data, covers, max_size)
+        except InvocationError:
+            pass  # embedded picture couldn't be decoded, so use a placeholder
+
+    if max_size > 0:
+        return normalise_cover(placeholder_data(), covers, max_size)
+
+    return placeholder_cover(covers)
+
+
+def get_image(image_path: Path, workdir: Path, max_size: int, cache: bool = True) -> Path:
+    """
+    returns the path to a custom image normalised to a png within a maximum size once per
+    unique image and kept in the cover cache, raising InvocationError if it couldn't be
+    decoded. the image is held (see hold_cached()) until release_cached() is called
+
+    image_path: Path
+        path to image
+    workdir: Path
+        directory to use if the cover cache directory can't be used
+    max_size: int
+        largest width and height of the image, 0 for no limit
+    cache: bool = True
+        whether to use the cover cache, else workdir is used
+    """
+    covers = cover_cache(workdir) if cache else workdir
+    return normalise_cover(image_path.read_bytes(), covers, max_size)
+
+
+def cover_cache(workdir: Path) -> Path:
+    """returns the cover cache directory, or workdir if it can't be used"""
+    try:
+        covers = cache_dir().joinpath("covers")
+        covers.mkdir(exist_ok=True)
+    except OSError:
+        covers = workdir
+
+    return covers
+
+
+def normalise_cover(data: bytes, covers: Path, max_size: int) -> Path:
+    """
+    returns the path to an image normalised to a png, downscaled once to fit within a
+    maximum size (see COVER_SCALE_FILTER), raising InvocationError if it couldn't be
+    decoded. the image is held (see hold_cached()) until release_cached() is called
+
+    data: bytes
+        image data, e.g. an embedded picture
+    covers: Path
+        directory to keep normalised images in, usually the cover cache
+    max_size: int
+        largest width and height of the image, 0 for no limit
+    """
+    from hashlib import sha256
+
+    cover_path = covers.joinpath(f"{sha256(data).hexdigest()}-{max_size}.png")
+
+    if hold_cached(cover_path):
+        return cover_path
+
+    # written under a temporary name so that concurrent songs or processes never see a
+    # partially written cover
+    partial_path = covers.joinpath(f".{cover_path.stem}.{os.getpid()}.{get_ident()}.png")
+    args: List[Union[str, Path]] = ["-i", "pipe:0", "-frames:v", "1"]
+
+    if max_size > 0:
+        args += ["-vf", COVER_SCALE_FILTER.format(size=max_size)]
+
+    try:
+        invocate(
+            name="ffmpeg",
+            args=[*args, "-y", partial_path],
+            errcode=3,
+            capture_output=True,
+            input=data,
+        )
+    except InvocationError:
+        if partial_path.exists():
+            partial_path.unlink()
+        raise
+
+    hold_cached(cover_path, partial_path)
+    evict(covers, COVER_CACHE_LIMIT)
+    return cover_path
+
+
+def cover_data(song_path: Path, song_info: SongInfo) -> Optional[bytes]:
+    """
+    returns the embedded album cover of a song as-is, without decoding it, or None if the
+    song has none
+
+    song_path: Path
+        path to song
+    song_info: SongInfo
+        probed song information
+    """
+    if not song_info.cover:
+        return None
+
+    data = read_cover(song_path)
+
+    if data is None:
+        # copy the picture out over a pipe
+        try:
+            data = invocate(
+                name="ffmpeg",
+                args=[
+                    "-i",
+                    song_path,
+                    "-map",
+                    "0:v:0",
+                    "-c:v",
+                    "copy",
+                    "-frames:v",
+                    "1",
+                    "-f",
+                    "image2pipe",
+                    "pipe:1",
+                ],
+                capture_output=True,
+                binary=True,
+            ).stdout
+        except InvocationError:
+            pass
+
+    return data or None
+
+
+def get_video(
+    cover_path: Path,
+    duration: int,
+    ffargs: List[str],
+    ext: str,
+    workdir: Path,
+) -> Path:
+    """
+    returns the path to a video-only clip of a looped cover, encoded once per unique
+    cover, duration, ffmpeg arguments and file extension, and kept in the video cache.
+    the video is held (see hold_cached()) until release_cached() is called
+
+    cover_path: Path
+        path to cover image
+    duration: int
+        video duration in seconds
+    ffargs: List[str]
+        ffmpeg arguments used for clip creation
+    ext: str
+        clip file extension
+    workdir: Path
+        directory to use if the video cache directory can't be used
+    """
+    try:
+        videos = cache_dir().joinpath("videos")
+        videos.mkdir(exist_ok=True)
+    except OSError:
+        videos = workdir
+
+    from hashlib import sha256
+
+    key = sha256(
+        dumps([file_hash(cover_path), duration, ffargs, ext]).encode()
+    ).hexdigest()
+    video_path = videos.joinpath(f"{key}.{ext}")
+
+    with _video_locks_lock:
+        lock = _video_locks.setdefault(key, Lock())
+
+    # songs sharing a cover are encoded once, even when processed concurrently
+    with lock:
+        if hold_cached(video_path):
+            return video_path
+
+        partial_path = videos.joinpath(f".{key}.{os.getpid()}.{get_ident()}.{ext}")
+
+        with get_thread_budget().encode() as threads:
+            invocate(
+                name="ffmpeg",
+                args=[
+                    "-filter_threads",
+                    str(threads),
+                    *looped_image(cover_path, ffargs),
+                    "-t",
+                    str(duration),
+                    "-an",
+                    "-threads",
+                    str(threads),
+                    *ffargs,
+                    "-y",
+                    partial_path,
+                ],
+                errcode=3,
+                capture_output=True,
+            )
+
+        hold_cached(video_path, partial_path)
+
+    evict(videos, VIDEO_CACHE_LIMIT)
+    return video_path
+
+
+_video_locks: Dict[str, Lock] = {}
+_video_locks_lock = Lock()
+
+
+def frame_rate(ffargs: List[str]) -> str:
+    """returns the output frame rate (-r) of ffmpeg arguments, COVER_FRAME_RATE if unset"""
+    return get_arg(ffargs, ["-r"]) or COVER_FRAME_RATE
+
+
+def looped_image(image_path: Path, ffargs: List[str]) -> List[Union[str, Path]]:
+    """
+    returns ffmpeg input arguments looping an image at the output frame rate, so that
+    frames dropped by a lower output frame rate (-r) aren't read and decoded at all
+
+    image_path: Path
+        path to image
+    ffargs: List[str]
+        ffmpeg arguments used for clip creation
+    """
+    return ["-loop", "1", "-framerate", frame_rate(ffargs), "-i", image_path]
+
+
+def loop_cover(ffargs: List[str], max_size: int) -> List[str]:
+    """
+    returns a copy of ffmpeg arguments looping a single frame cover input at the output
+    frame rate, downscaling it to fit within a maximum size once before it is looped
+
+    ffargs: List[str]
+        ffmpeg arguments used for clip creation
+    max_size: int
+        largest width and height of the cover, 0 for no limit
+    """
+    ffargs = prepend_filter(ffargs, COVER_LOOP_FILTER.format(rate=frame_rate(ffargs)))
+
+    if max_size > 0:
+        ffargs = prepend_filter(ffargs, COVER_SCALE_FILTER.format(size=max_size))
+
+    return ffargs
+
+
+def encode_profile(name: str) -> str:
+    """returns the ffmpeg arguments of an encode profile, see ENCODE_PROFILES"""
+    return f"{FFARGS} {ENCODE_PROFILES[name]}".strip()
+
+
+def file_hash(path: Path) -> str:
+    """returns the sha256 hash of a file, memoised by path, size and modification time"""
+    stat = path.stat()
+    return _file_hash(str(path.absolute()), stat.st_size, stat.st_mtime_ns)
+
+
+def file_stat(path: Path) -> List[Union[str, int]]:
+    """returns the absolute path, size and modification time of a file, as json"""
+    stat = path.stat()
+    return [str(path.absolute()), stat.st_size, stat.st_mtime_ns]
+
+
+@lru_cache(maxsize=1024)
+def _file_hash(path: str, size: int, mtime: int) -> str:
+    """returns the sha256 hash of a file, see file_hash()"""
+    from hashlib import sha256
+
+    digest = sha256()
+
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def placeholder_data() -> bytes:
+    """
+    returns the decoded placeholder cover, imported and decoded once per process, as
+    most runs never need it
+    """
+    from base64 import b85decode
+    from pymtheg_placeholder import COVER_IMAGE_DATA
+
+    return b85decode(COVER_IMAGE_DATA.replace(b"\n", b""))
+
+
+def placeholder_cover(directory: Path) -> Path:
+    """
+    returns the path to the placeholder cover in a directory, writing it if needed. the
+    cover is held (see hold_cached()) until release_cached() is called
+    """
+    cover_path = directory.joinpath("placeholder.png")
+
+    if not hold_cached(cover_path):
+        partial_path = directory.joinpath(f".placeholder.{os.getpid()}.{get_ident()}.png")
+        partial_path.write_bytes(placeholder_data())
+        hold_cached(cover_path, partial_path)
+
+    return cover_path
+
+
+def hold_cached(path: Path, partial_path: Optional[Path] = None) -> bool:
+    """
+    marks a cached file as recently used and holds it, so that evict() doesn't delete it
+    while it is used (e.g. by a concurrent song) until release_cached() is called.
+    returns False, without holding it, if it doesn't exist
+
+    path: Path
+        path to cached file
+    partial_path: Optional[Path] = None
+        partially written file to move to path before holding it
+    """
+    with _cache_holds_lock:
+        if partial_path is not None:
+            os.replace(partial_path, path)
+
+        elif path.exists():
+            os.utime(path)  # mark as recently used
+
+        else:
+            return False
+
+        key = os.fspath(path)
+        _cache_holds[key] = _cache_holds.get(key, 0) + 1
+        return True
+
+
+def release_cached(path: Path) -> None:
+    """releases a cached file held with hold_cached()"""
+    key = os.fspath(path)
+
+    with _cache_holds_lock:
+        _cache_holds[key] -= 1
+
+        if _cache_holds[key] == 0:
+            del _cache_holds[key]
 
-        for song in tmpdir.rglob("*"):
-            # ensure that file was export of spotDL (list from spotdl -h)
-            if song.suffix not in [".m4a", ".ogg", ".flac", ".mp3", ".wav", ".opus"]:
-                continue
 
-            if pymtheg(song, bev=bev, opdir=tmpdir, pp=processed, console=console):
-                processed += 1
+_cache_holds: Dict[str, int] = {}  # number of holds by path, see hold_cached()
+_cache_holds_lock = Lock()
 
-        for song in bev.song_paths:
-            if pymtheg(song, bev=bev, opdir=tmpdir, pp=processed, console=console):
-                processed += 1
 
-    if processed > 0:
-        console.print(
-            f"\n{premsg_info} all operations successful. have a great {part_of_day()}."
-        )
+def evict(directory: Path, limit: int) -> None:
+    """
+    deletes the least recently used files in a directory until it is under a size limit,
+    leaving files held with hold_cached() and hidden (partially written) files alone
 
-    else:
-        error = False
-        if stdout != "":
-            console.print(f"\n{premsg_error} invocation stdout:\n{stdout}")
-            error = True
-        if stderr != "":
-            console.print(f"\n{premsg_error} invocation stderr:\n{stderr}")
-            error = True
+    directory: Path
+        directory of cached files
+    limit: int
+        size limit in bytes
+    """
+    entries = []
+    total = 0
+
+    with os.scandir(directory) as scan:
+        for entry in scan:
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+    with _cache_holds_lock:
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
 
-        if error:
-            console.print(
-                f"{premsg_error} invalid link/query, nothing to do. (see above for more information)"
-            )
-            exit(1)
+            if path in _cache_holds:
+                continue
 
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
 
-def pymtheg(
-    song_path: Path, bev: Behaviour, opdir: Path, pp: int, console: Console
-) -> bool:
-    """
-    where the magic happens
 
-    song_path: Path
-        path to song
-    bev: Behaviour
-        behaviour object
-    opdir: Path
-        an operation directory, usually a tmpdir
-    pp: int
-        number of already processed songs
-    console: rich.console.Console
-        rich console object used for printing
+def cache_dir() -> Path:
     """
-    # duration retrieval
-    with console.status(f"[dim]status: probe song duration[/]", spinner="arc"):
-        proc = invocate(
-            console=console,
-            name="ffprobe",
-            args=[
-                "-print_format",
-                "json",
-                "-show_entries",
-                "format=duration",
-                song_path,
-            ],
-            capture_output=True,
-        )
-        song_duration: int = int(loads(proc.stdout)["format"]["duration"].split(".")[0])
+    returns the pymtheg cache directory, creating it if needed
 
-    if pp == 0:
-        # print timestamp format/using default message on first song
-        if bev.use_defaults:
-            console.print(
-                f'{premsg_info} using defaults, clip start is "{bev.clip_start}"'
-                f' and clip end is "{bev.clip_end}"\n'
-            )
+    can be set with the PYMTHEG_CACHE_DIR environment variable, else a pymtheg directory in
+    the platforms user cache directory is used
+    """
+    if "PYMTHEG_CACHE_DIR" in os.environ:
+        path = Path(os.environ["PYMTHEG_CACHE_DIR"])
 
-        else:
-            console.print(f"{premsg_info} enter timestamps in format \[hh:mm:]ss")
-            console.print('               timestamps can be "*" for random')
-            console.print(
-                '               timestamps can be end-relative, prefix with "-"'
-            )
-            console.print(
-                '               end timestamp can be start-relative, prefix with "+"'
-            )
-            console.print(
-                f"               press enter to use given defaults "
-                f'("{bev.clip_start}", "{bev.clip_end}")\n'
-            )
+    elif "XDG_CACHE_HOME" in os.environ:
+        path = Path(os.environ["XDG_CACHE_HOME"]).joinpath("pymtheg")
 
-    console.print(
-        "- [bold]{name}[/]{duration}".format(
-            name=song_path.stem,
-            duration=f" ({to_timestamp(song_duration)})" if not bev.use_defaults else "",
+    elif os.name == "nt":
+        path = Path(os.environ.get("LOCALAPPDATA", Path.home())).joinpath(
+            "pymtheg", "Cache"
         )
-    )
 
-    # generate query/info messages
-    _msg_format = "    {}: "
-    _query_clip_end = f"clip end ({bev.clip_end})"
-    _query_clip_start = f"clip start ({bev.clip_start})"
-    _query_new_filename = "filename"
-    _info_status = "status"
-    _info_notice = "notice"
-    _longest_msg_len = len(
-        max(
-            _query_new_filename,
-            _query_clip_end,
-            _query_clip_start,
-            _info_status,
-            _info_notice,
-            key=len,
-        )
-    )
+    elif sys.platform == "darwin":
+        path = Path.home().joinpath("Library", "Caches", "pymtheg")
 
-    query_clip_end = _msg_format.format(
-        _query_clip_end.rjust(_longest_msg_len),
-    )
-    query_clip_start = _msg_format.format(
-        _query_clip_start.rjust(_longest_msg_len),
-    )
-    query_new_filename = _msg_format.format(
-        _query_new_filename.rjust(_longest_msg_len),
-    )
-    info_status = _msg_format[2:].format(
-        _info_status.rjust(_longest_msg_len),
-    )
-    info_notice = _msg_format.format(_info_notice.rjust(_longest_msg_len))
-    indent = len(_msg_format) - 2 + _longest_msg_len
-
-    # construct working paths
-    song_path = song_path.absolute()
-    song_clip_path = opdir.joinpath(f"{song_path.stem}_clip.mp3").absolute()
-    song_cover_path = opdir.joinpath(f"{song_path.stem}_cover.png").absolute()
-    video_clip_path = opdir.joinpath(f"{song_path.stem}_clip.mp4").absolute()
-
-    # get timestamps
-    start_timestamp, end_timestamp = parse_timestamps(
-        bev.clip_start, bev.clip_end, duration=song_duration
-    )
+    else:
+        path = Path.home().joinpath(".cache", "pymtheg")
 
-    if not bev.use_defaults:
-        # timestamp prompt
-        while True:
-            _start_timestamp: Optional[Timestamp] = None
-            _end_timestamp: Optional[Timestamp] = None
+    path.mkdir(parents=True, exist_ok=True)
+    return path
 
-            # starting timestamp
-            while True:
-                cs_response = input(query_clip_start)
 
-                if cs_response != "":
-                    _start_timestamp = check_timestamp(0, cs_response)
+def work_dir(requested: Optional[Path] = None, ram: bool = True) -> Optional[Path]:
+    """
+    returns the directory to make temporary directories in, or None for the platforms
+    default temporary directory. the first directory with enough free space (see
+    has_space()) out of the requested one and WORKDIR_RAM is used, so that short-lived
+    intermediates stay in memory on systems with a ram-backed /dev/shm. free space is
+    checked on every call, so call it for every song rather than once per run
+
+    requested: Optional[Path] = None
+        preferred directory, see -wd, --workdir
+    ram: bool = True
+        whether WORKDIR_RAM can be used, False for operation directories that hold
+        downloads for the whole run
+    """
+    for directory in (requested, WORKDIR_RAM if ram else None):
+        if (
+            directory is not None
+            and directory.is_dir()
+            and os.access(directory, os.W_OK | os.X_OK)
+            and has_space(directory)
+        ):
+            return directory
 
-                    if _start_timestamp is None:
-                        # invalid format
-                        console.print(
-                            "[dim][red]"
-                            + (" " * indent)
-                            + ("^" * len(cs_response))
-                            + "[/dim][bold] invalid timestamp",
-                        )
+    return None
 
-                    else:
-                        if _start_timestamp.ss > song_duration:
-                            # invalid, timestamp >= song duration
-                            console.print(
-                                "[dim][red]"
-                                + (" " * indent)
-                                + ("^" * len(cs_response))
-                                + "[/dim][bold] timestamp exceeds song duration",
-                            )
 
-                        else:
-                            break
+def has_space(directory: Path, size: int = WORKDIR_MIN_FREE) -> bool:
+    """returns whether a directory has at least size bytes of free space"""
+    try:
+        return disk_usage(directory).free >= size
+    except OSError:
+        return False
 
-                else:
-                    _start_timestamp = bev.clip_start
-                    break
 
-            # ending timestamp
-            while True:
-                ce_response = input(query_clip_end)
+def get_arg(ffargs: List[str], options: Iterable[str]) -> Optional[str]:
+    """
+    returns the value of the last given option in ffmpeg arguments, or None if the option
+    was not given
 
-                if ce_response != "":
-                    _end_timestamp = check_timestamp(1, ce_response)
+    ffargs: List[str]
+        ffmpeg arguments
+    options: Iterable[str]
+        option and its aliases, e.g. ("-c:a", "-acodec")
+    """
+    value: Optional[str] = None
 
-                    if _end_timestamp is None:
-                        # invalid format
-                        console.print(
-                            "[dim][red]"
-                            + (" " * indent)
-                            + ("^" * len(cs_response))
-                            + "[/dim][bold] invalid timestamp",
-                        )
+    for index, arg in enumerate(ffargs[:-1]):
+        if arg in options:
+            value = ffargs[index + 1]
 
-                    else:
-                        break
+    return value
 
-                else:
-                    _end_timestamp = bev.clip_end
-                    break
 
-            assert isinstance(_start_timestamp, Timestamp)  # type: ignore
-            assert isinstance(_end_timestamp, Timestamp)  # type: ignore
+def set_arg(ffargs: List[str], options: Iterable[str], value: str) -> List[str]:
+    """
+    returns a copy of ffmpeg arguments with the values of an option set to `value`,
+    adding the option if it was not given
 
-            # parse timestamps
-            start_timestamp, end_timestamp = parse_timestamps(
-                _start_timestamp, _end_timestamp, duration=song_duration
-            )
+    ffargs: List[str]
+        ffmpeg arguments
+    options: Iterable[str]
+        option and its aliases, the first being used if the option is added
+    value: str
+        value of option
+    """
+    ffargs = ffargs.copy()
+    options = tuple(options)
+    found = False
 
-            # confirm timestamps
-            if bev.yes:
-                break
+    for index, arg in enumerate(ffargs[:-1]):
+        if arg in options:
+            ffargs[index + 1] = value
+            found = True
 
-            # dont prompt confirmation if defaults were used
-            if not (cs_response == "" and ce_response == ""):
-                console.print(
-                    "{premsg}clip duration: {start} -> {end} ({duration}s)".format(
-                        premsg=info_notice,
-                        start=to_timestamp(start_timestamp),
-                        end=to_timestamp(end_timestamp),
-                        duration=end_timestamp - start_timestamp,
-                    )
-                )
-                confirmation_response = input(
-                    f"{' ' * indent}confirm? [y/n] (y) "
-                ).lower()
+    return ffargs if found else ffargs + [options[0], value]
 
-                if confirmation_response == "y" or confirmation_response == "":
-                    break
 
-                else:
-                    pass
+def can_copy_audio(codec: str, ffargs: List[str], ext: str) -> bool:
+    """
+    checks if a songs audio can be stream copied into a clip instead of being transcoded
 
-            else:
-                break
+    codec: str
+        codec name of the songs audio, e.g. "aac"
+    ffargs: List[str]
+        ffmpeg arguments used for clip creation
+    ext: str
+        clip file extension
+    """
+    if get_arg(ffargs, AUDIO_FILTER_OPTIONS) is not None:
+        return False  # filters can't be used when stream copying
 
-    elif start_timestamp > song_duration:
-        console.print(f"{info_notice}skipping song")
-        return False
+    if get_arg(ffargs, AUDIO_ENCODE_OPTIONS) is not None:
+        return False  # a bitrate, quality, sample rate or channel count was asked for
 
-    # construct and confirm output path
-    out_path: Path = bev.dir.joinpath(
-        "{name}{timestamp}.{ext}".format(
-            name=song_path.stem,
-            timestamp=tf_format(
-                string=bev.timestamp_format,
-                clip_start=start_timestamp,
-                clip_end=end_timestamp,
-            )
-            if not bev.no_timestamp
-            else "",
-            ext=bev.ext,
-        )
-    ).absolute()
+    encoder = get_arg(ffargs, AUDIO_CODEC_OPTIONS)
 
-    if (
-        # no -o specified and out_path exists
-        out_path.exists()
-        and bev.yes is False
-    ):
-        console.print(f'{info_notice}"{out_path.name}" exists in output dir.')
-        overwrite_response = input(
-            f"{' ' * indent}overwrite? ([y]es/[n]o/[c]hange) "
-        ).lower()
+    if encoder is not None and encoder != "copy" and ENCODER_CODECS.get(encoder) != codec:
+        return False  # a different codec was asked for
 
-        if overwrite_response == "y":
-            pass
+    return codec in CONTAINER_CODECS.get(ext.lower(), ())
 
-        elif overwrite_response == "c":
-            while True:
-                new_filename_response = input(query_new_filename)
-                new_out_path = Path(new_filename_response)
-                if new_out_path.exists():
-                    console.print(
-                        (" " * indent) + ("^" * len(new_filename_response)),
-                        "file already exists",
-                    )
-                else:
-                    out_path = new_out_path
-                    break
 
-        else:
-            console.print(f"{info_notice}skipping song")
-            return False
+def strip_args(ffargs: List[str], options: Iterable[str]) -> List[str]:
+    """
+    returns a copy of ffmpeg arguments without the given options and their values
 
-    # clip audio
-    with console.status(f"[dim]{info_status}clip audio[/]", spinner="arc"):
-        invocate(
-            console=console,
-            name="ffmpeg",
-            args=[
-                "-ss",
-                str(start_timestamp),
-                "-to",
-                str(end_timestamp),
-                "-i",
-                song_path,
-                song_clip_path,
-            ],
-            cwd=opdir,
-            errcode=3,
-            capture_output=True,
-        )
+    ffargs: List[str]
+        ffmpeg arguments
+    options: Iterable[str]
+        options to remove, e.g. ("-vf", "-tune")
+    """
+    options = tuple(options)
+    stripped: List[str] = []
+    skip = False
+
+    for arg in ffargs:
+        if skip:
+            skip = False
+        elif arg in options:
+            skip = True
+        else:
+            stripped.append(arg)
 
-    # get album art if needed
-    if bev.image is None:  # no custom image was specified
-        with console.status(f"[dim]{info_status}get album art[/]", spinner="arc"):
-            try:
-                invocate(
-                    console=console,
-                    name="ffmpeg",
-                    args=[
-                        "-i",
-                        song_path,
-                        "-an",
-                        song_cover_path,
-                    ],
-                    cwd=opdir,
-                    errcode=3,
-                    capture_output=True,
-                    raise_illreturn=True,
-                )
+    return stripped
 
-            except ChildProcessError:
-                # file has no cover image, so use a placeholder
-                with open(song_cover_path, "wb") as cv:
-                    cv.write(b85decode(COVER_IMAGE_DATA.replace(b"\n", b"")))
 
-    else:
-        song_cover_path = bev.image
+def prepend_filter(ffargs: List[str], vfilter: str) -> List[str]:
+    """
+    returns a copy of ffmpeg arguments with a video filter prepended to the existing
+    video filter chain, or added as one if there is none
 
-    # create clip
-    with console.status(f"[dim]{info_status}create clip[/]", spinner="arc"):
-        invocate(
-            console=console,
-            name="ffmpeg",
-            args=[
-                "-loop",
-                "1",
-                "-i",
-                song_cover_path,
-                "-i",
-                song_clip_path,
-                "-t",
-                str(end_timestamp - start_timestamp),
-                *bev.ffargs,
-                video_clip_path,
-            ],
-            errcode=3,
-        )
+    ffargs: List[str]
+        ffmpeg arguments
+    vfilter: str
+        video filter to prepend, e.g. "fps=25"
+    """
+    ffargs = ffargs.copy()
 
-        move(str(video_clip_path), str(out_path))
+    for index, arg in enumerate(ffargs[:-1]):
+        if arg in ("-vf", "-filter:v"):
+            ffargs[index + 1] = f"{vfilter},{ffargs[index + 1]}"
+            return ffargs
 
-    return True
+    return ffargs + ["-vf", vfilter]
 
 
 def part_of_day() -> str:
@@ -487,6 +5104,8 @@ def part_of_day() -> str:
 
     call it bloat or whatever, i like it
     """
+    from datetime import datetime
+
     hh = datetime.now().hour
     return (
         "morning ahead"
@@ -515,6 +5134,11 @@ def check_timestamp(type: Union[Literal[0], Literal[1]], ts: str) -> Optional[Ti
     if ts == "*":
         return Timestamp(type=type, ss=0, random=True)
 
+    elif ts == "^":
+        if type == 1:  # only clip starts can be found by energy
+            return None
+        return Timestamp(type=type, ss=0, energetic=True)
+
     elif ts.startswith("-"):
         if type == 0:
             return None
@@ -556,7 +5180,115 @@ def check_timestamp(type: Union[Literal[0], Literal[1]], ts: str) -> Optional[Ti
             return None
 
 
-def parse_timestamps(start: Timestamp, end: Timestamp, duration: int) -> Tuple[int, int]:
+def check_timestamps(
+    type: Union[Literal[0], Literal[1]], ts: str
+) -> Optional[List[Timestamp]]:
+    """
+    checks comma-separated lists of timestamps, see check_timestamp()
+
+    ts: str
+        timestamp string, e.g. "0:30,1:10,2:00"
+    type: Literal[0] | Literal[1]
+        0 if start timestamps; 1 if end timestamps
+
+    returns a list of Timestamp objects if every check was successful else None
+    """
+    timestamps: List[Timestamp] = []
+
+    for part in ts.split(","):
+        timestamp = check_timestamp(type, part)
+
+        if timestamp is None:
+            return None
+
+        timestamps.append(timestamp)
+
+    return timestamps
+
+
+def pair_timestamps(
+    starts: Sequence[Timestamp], ends: Sequence[Timestamp]
+) -> Optional[List[Tuple[Timestamp, Timestamp]]]:
+    """
+    pairs clip starts with clip ends into the windows of clips to create, a single clip
+    start or end being paired with every end or start
+
+    starts: Sequence[Timestamp]
+        clip starts
+    ends: Sequence[Timestamp]
+        clip ends
+
+    returns a list of (start, end) tuples, or None if the number of starts and ends differ
+    """
+    if len(starts) == 1:
+        starts = [starts[0]] * len(ends)
+
+    elif len(ends) == 1:
+        ends = [ends[0]] * len(starts)
+
+    if len(starts) != len(ends):
+        return None
+
+    return list(zip(starts, ends))
+
+
+def check_energetic(windows: List[Tuple[Timestamp, Timestamp]]) -> None:
+    """
+    raises TimestampError if a "^" clip start is paired with a clip end that isn't
+    start-relative, as only those give the length of the clip to find
+
+    windows: List[Tuple[Timestamp, Timestamp]]
+        clip starts and ends, see pair_timestamps()
+    """
+    for start, end in windows:
+        if start.energetic and not (end.relative and not end.random):
+            raise TimestampError(
+                f'"^" clip starts need a start-relative clip end, e.g. "+15", not "{end}"'
+            )
+
+
+def format_timestamps(timestamps: Sequence[Timestamp]) -> str:
+    """returns timestamps as a comma-separated list, as given to check_timestamps()"""
+    return ",".join(str(timestamp) for timestamp in timestamps)
+
+
+def parse_windows(
+    windows: List[Tuple[Timestamp, Timestamp]],
+    duration: int,
+    song_path: Optional[Path] = None,
+    cache: Optional[ProbeCache] = None,
+) -> List[Tuple[int, int]]:
+    """
+    parses clip windows into absolute seconds, leaving out repeated ones, see
+    parse_timestamps()
+
+    windows: List[Tuple[Timestamp, Timestamp]]
+        clip starts and ends, see pair_timestamps()
+    duration: int
+        song duration in seconds
+    song_path: Optional[Path] = None
+        path to song, needed to find "^" start timestamps
+    cache: Optional[ProbeCache] = None
+        probe cache to look up and store the energy envelope of the song in
+    """
+    parsed: List[Tuple[int, int]] = []
+
+    for start, end in windows:
+        window = parse_timestamps(start, end, duration, song_path=song_path, cache=cache)
+
+        if window not in parsed:
+            parsed.append(window)
+
+    return parsed
+
+
+def parse_timestamps(
+    start: Timestamp,
+    end: Timestamp,
+    duration: int,
+    song_path: Optional[Path] = None,
+    cache: Optional[ProbeCache] = None,
+) -> Tuple[int, int]:
     """
     parses start timestamp and end timestamp into absolute seconds
 
@@ -566,22 +5298,47 @@ def parse_timestamps(start: Timestamp, end: Timestamp, duration: int) -> Tuple[i
         end timestamp
     duration: int
         song duration in seconds
+    song_path: Optional[Path] = None
+        path to song, needed to find "^" start timestamps
+    cache: Optional[ProbeCache] = None
+        probe cache to look up and store the energy envelope of the song in
 
     returns song start and song end respectively, in seconds
     """
+    from random import randint
+
     ts_start: int
     ts_end: int
 
-    if start.random and end.random:
+    if start.energetic:
+        if song_path is None:
+            raise TimestampError('"^" clip starts need a song to be found in')
+
+        check_energetic([(start, end)])
+        length = end.ss
+        ts_start = best_window(energy_envelope(song_path, cache), length, duration)
+        ts_end = ts_start + length
+
+    elif start.random and end.random:
+        if duration < 1:
+            raise TimestampError("random clips need a song at least a second long")
+
         ts_start = randint(0, duration - 1)
         ts_end = randint(ts_start + 1, duration)
 
     elif start.random:
+        # songs shorter than a relative end are clipped from their start
         ensure_random = end.ss if end.relative else 0
-        ts_start = randint(0, duration - ensure_random)
+        ts_start = randint(0, max(0, duration - ensure_random))
         ts_end = ts_start + end.ss
 
     elif end.random:
+        if start.ss > duration:
+            raise TimestampError(
+                f"clip start {to_timestamp(start.ss)} is after the songs end "
+                f"({to_timestamp(duration)})"
+            )
+
         ts_start = start.ss
         ts_end = randint(start.ss, duration)
 
@@ -592,7 +5349,151 @@ def parse_timestamps(start: Timestamp, end: Timestamp, duration: int) -> Tuple[i
     if ts_end < 0:
         ts_end = duration - abs(ts_end) + 1
 
-    return (ts_start, ts_end)
+    return (ts_start, ts_end)
+
+
+def energy_envelope(song_path: Path, cache: Optional[ProbeCache] = None) -> List[float]:
+    """
+    returns the rms energy of every 1/ENERGY_FRAME_RATE seconds of a song, streaming
+    its audio from ffmpeg as low sample rate pcm and reducing it as it is decoded
+
+    song_path: Path
+        path to song
+    cache: Optional[ProbeCache] = None
+        probe cache to look up and store the envelope in
+    """
+    if cache is not None:
+        cached = cache.get_envelope(song_path)
+        if cached is not None:
+            return cached
+
+    frame_size = 2 * ENERGY_SAMPLE_RATE // ENERGY_FRAME_RATE  # bytes of s16 samples
+    envelope: List[float] = []
+    pending = bytearray()
+
+    def on_chunk(chunk: bytes) -> None:
+        pending.extend(chunk)
+        whole = len(pending) - len(pending) % frame_size
+
+        if whole > 0:
+            envelope.extend(frame_energies(bytes(pending[:whole]), frame_size))
+            del pending[:whole]
+
+    with profile("analyse energy", "stage"):
+        invocate(
+            name="ffmpeg",
+            args=[
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-i",
+                song_path,
+                "-map",
+                "0:a:0",
+                "-ac",
+                "1",
+                "-ar",
+                str(ENERGY_SAMPLE_RATE),
+                "-f",
+                "s16le",
+                "pipe:1",
+            ],
+            errcode=3,
+            capture_output=True,
+            on_chunk=on_chunk,
+        )
+
+    if cache is not None:
+        cache.put_envelope(song_path, envelope)
+
+    return envelope
+
+
+def frame_energies(data: bytes, frame_size: int) -> List[float]:
+    """
+    returns the rms of every frame of signed 16-bit little-endian samples, vectorised
+    with numpy if it is installed
+
+    data: bytes
+        samples, a whole number of frames long
+    frame_size: int
+        frame size in bytes
+    """
+    numpy = numpy_module()
+
+    if numpy is not None:
+        frames = numpy.frombuffer(data, dtype="<i2").reshape(-1, frame_size // 2)
+        frames = frames.astype(numpy.float64)
+        return numpy.sqrt(numpy.mean(frames * frames, axis=1)).tolist()
+
+    from array import array
+    from math import sqrt
+    from operator import mul
+
+    samples = array("h", data)
+    count = frame_size // 2
+
+    if sys.byteorder == "big":
+        samples.byteswap()
+
+    return [
+        sqrt(sum(map(mul, frame, frame)) / count)
+        for frame in (
+            samples[index : index + count] for index in range(0, len(samples), count)
+        )
+    ]
+
+
+@lru_cache(maxsize=None)
+def numpy_module() -> Any:
+    """returns numpy if it is installed, else None"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+
+    return numpy
+
+
+def best_window(envelope: List[float], length: int, duration: int) -> int:
+    """
+    returns the start in seconds of the window of a song with the most energy and onsets
+    (rises in energy), which is usually its chorus or drop rather than an intro or outro
+
+    envelope: List[float]
+        energy envelope of the song, see energy_envelope()
+    length: int
+        window length in seconds
+    duration: int
+        song duration in seconds
+    """
+    from itertools import accumulate
+
+    last = min(duration, len(envelope) // ENERGY_FRAME_RATE) - length
+
+    if last <= 0:
+        return 0
+
+    onsets = [0.0] + [
+        max(after - before, 0.0) for before, after in zip(envelope, envelope[1:])
+    ]
+    mean_energy = sum(envelope) / len(envelope) or 1.0
+    mean_onset = sum(onsets) / len(onsets) or 1.0
+
+    # scores are sums of frames of the energy and onsets, relative to their song means
+    sums = [0.0] + list(
+        accumulate(
+            energy / mean_energy + ENERGY_ONSET_WEIGHT * onset / mean_onset
+            for energy, onset in zip(envelope, onsets)
+        )
+    )
+    frames = length * ENERGY_FRAME_RATE
+
+    return max(
+        range(last + 1),
+        key=lambda start: sums[start * ENERGY_FRAME_RATE + frames]
+        - sums[start * ENERGY_FRAME_RATE],
+    )
 
 
 def to_timestamp(ts: int) -> str:
@@ -653,16 +5554,20 @@ def tf_format(string: str, clip_start: int, clip_end: int) -> str:
 
 
 def invocate(
-    console: Console,
     name: str,
     args: Iterable[Optional[Union[str, Path]]] = [],
     cwd: Optional[Path] = None,
     errcode: int = -1,
     capture_output: bool = False,
-    raise_illreturn: bool = False,
+    binary: bool = False,
+    input: Optional[bytes] = None,
+    on_line: Optional[Callable[[str], None]] = None,
+    on_chunk: Optional[Callable[[bytes], None]] = None,
+    timeout: Optional[float] = None,
 ) -> subprocess.CompletedProcess:
     """
-    invocates command using subprocess.run
+    invocates command with the process runner (see ProcessRunner), raising
+    InvocationError if the program could not be invocated, returned non-zero or timed out
 
     name: str,
         name of program
@@ -671,12 +5576,25 @@ def invocate(
     cwd: Optional[Path] = None,
         working directory for process to be run
     errcode: int = -1,
-        exit code for if the process returns non-zero
+        exit code for the command line to use if the program could not be invocated
     capture_output: bool = False,
-        maps to subprocess.run(capture_output=); captures stdout and stderr
-    raise_illreturn: bool = False
-        raises a ChildProcessError if the process returns non-zero
+        maps to subprocess.run(capture_output=); captures stdout and stderr, keeping only
+        the last OUTPUT_LIMIT bytes of text
+    binary: bool = False
+        captures stdout and stderr as bytes instead of text
+    input: Optional[bytes] = None
+        data to write to the processes stdin, implies binary
+    on_line: Optional[Callable[[str], None]] = None
+        called with every line of stdout as it is written, implies capture_output
+    on_chunk: Optional[Callable[[bytes], None]] = None
+        called with every chunk of stdout as it is read instead of capturing it, implies
+        binary and capture_output
+    timeout: Optional[float] = None
+        seconds the program may go without writing output before it is killed, defaults
+        to the process-wide timeout of the program (see set_timeouts()). ffmpeg is given
+        -progress if it doesn't write to stdout, implying capture_output
     """
+    binary = binary or input is not None or on_chunk is not None
 
     invocation: List[Union[str, Path]] = [name]
 
@@ -684,64 +5602,527 @@ def invocate(
         if arg is not None:
             invocation.append(arg)
 
-    try:
-        proc = subprocess.run(
-            invocation,
-            cwd=cwd,
-            universal_newlines=True,
-            capture_output=capture_output,
-        )
-
-        if proc.returncode != 0:
-            if raise_illreturn:
-                raise ChildProcessError(proc.returncode)
-            if capture_output:
-                if proc.stdout != "":
-                    console.print(f"\n{premsg_error} invocation stdout:\n{proc.stdout}")
-                if proc.stderr != "":
-                    console.print(f"\n{premsg_error} invocation stderr:\n{proc.stderr}")
+    if timeout is None:
+        timeout = get_timeout(name)
 
-            console.print(
-                f"\n{premsg_error} error during invocation of "
-                f'"{" ".join([str(p) for p in invocation])}", returned non-zero exit '
-                f"code {proc.returncode}, see above for details"
+    if (
+        name == "ffmpeg"
+        and timeout is not None
+        and "-progress" not in invocation
+        and not any(arg in ("pipe:1", "pipe:", "-") for arg in invocation)
+    ):
+        # ffmpeg writes nothing while it encodes unless asked to, so have it report its
+        # progress to tell a long encode apart from a stalled one
+        invocation[1:1] = ["-progress", "pipe:1", "-nostats"]
+        capture_output = True
+
+    with profile(name, "invocation") as usage:
+        try:
+            proc, rusage = get_runner().run(
+                invocation,
+                cwd=cwd,
+                binary=binary,
+                capture_output=capture_output,
+                input=input,
+                on_line=on_line,
+                on_chunk=on_chunk,
+                timeout=timeout,
             )
-            exit(proc.returncode)
 
-    except FileNotFoundError as err:
-        console.print(
-            f'\n[bold red]invocation:[/] "{" ".join([str(p) for p in invocation])}"'
+        except OSError as err:
+            raise InvocationError(
+                f"could not invocate {name} ({err})",
+                invocation=[str(arg) for arg in invocation],
+                errcode=errcode,
+            ) from err
+
+        except subprocess.TimeoutExpired as err:
+            raise InvocationError(
+                f"{name} timed out, writing nothing for {err.timeout:g}s",
+                invocation=[str(arg) for arg in invocation],
+                stdout=output_text(err.output),
+                stderr=output_text(err.stderr),
+                errcode=errcode,
+            ) from err
+
+        if usage is not None and rusage is not None:
+            usage["cpu"], usage["rss"] = rusage
+
+    if proc.returncode != 0:
+        raise InvocationError(
+            f"{name} returned non-zero exit code {proc.returncode}",
+            invocation=[str(arg) for arg in invocation],
+            returncode=proc.returncode,
+            stdout=output_text(proc.stdout),
+            stderr=output_text(proc.stderr),
+            errcode=errcode,
         )
-        console.print_exception()
-        console.print(f"\n{premsg_error} could not invocate {name}, see details")
-        exit(errcode)
 
-    except ChildProcessError as err:
-        raise err
+    return proc
 
-    except Exception as err:
-        console.print(
-            f'\n[bold red]invocation:[/] "{" ".join([str(p) for p in invocation])}"'
+
+def output_text(output: Union[str, bytes, None]) -> str:
+    """returns captured program output as text"""
+    if output is None:
+        return ""
+    return output if isinstance(output, str) else output.decode(errors="replace")
+
+
+_timeouts: Dict[str, Optional[float]] = {
+    "download": DOWNLOAD_TIMEOUT,
+    "encode": ENCODE_TIMEOUT,
+}
+
+
+def get_timeout(name: str) -> Optional[float]:
+    """returns the process-wide timeout of a program, see set_timeouts()"""
+    return _timeouts["download" if name == "spotdl" else "encode"]
+
+
+def set_timeouts(download: Optional[float], encode: Optional[float]) -> None:
+    """
+    sets the process-wide timeouts of programs, in seconds they may go without writing
+    output before they are killed
+
+    download: Optional[float]
+        timeout of spotDL, or None for no timeout
+    encode: Optional[float]
+        timeout of ffmpeg and ffprobe, or None for no timeout
+    """
+    _timeouts.update(download=download, encode=encode)
+
+
+class OutputBuffer:
+    """
+    buffer of program output, keeping only the last `limit` bytes written to it if given
+
+    limit: Optional[int] = None
+        number of bytes to keep, or None to keep everything
+    """
+
+    def __init__(self, limit: Optional[int] = None) -> None:
+        self.limit = limit
+        self.size = 0
+        self.dropped = 0
+        self._chunks: Deque[bytes] = deque()
+
+    def write(self, data: bytes) -> None:
+        """appends data to the buffer, dropping the oldest chunks past the limit"""
+        self._chunks.append(data)
+        self.size += len(data)
+
+        while self.limit is not None and self.size - len(self._chunks[0]) >= self.limit:
+            self.size -= len(self._chunks[0])
+            self.dropped += len(self._chunks.popleft())
+
+    def getvalue(self) -> bytes:
+        """returns the buffered data, noting how much was dropped if any was"""
+        data = b"".join(self._chunks)
+        dropped = self.dropped
+
+        if self.limit is not None and len(data) > self.limit:
+            dropped += len(data) - self.limit
+            data = data[-self.limit :]
+
+        if dropped == 0:
+            return data
+        return f"[{dropped} bytes of output left out]\n".encode() + data
+
+
+def text_decoder() -> Any:
+    """
+    returns an incremental decoder of program output to text, translating newlines like
+    subprocess.run(universal_newlines=True)
+    """
+    from codecs import getincrementaldecoder
+    from io import IncrementalNewlineDecoder
+    from locale import getpreferredencoding
+
+    return IncrementalNewlineDecoder(
+        getincrementaldecoder(getpreferredencoding(False))(errors="replace"),
+        translate=True,
+    )
+
+
+class ProcessRunner:
+    """
+    runs programs as child processes of an asyncio event loop in a thread of its own, so
+    that any number of them can run at once without threads for their pipes. output is
+    streamed to callbacks as it is written or kept in bounded buffers, and programs that
+    time out or are abandoned are killed along with their process group
+    """
+
+    def __init__(self) -> None:
+        import asyncio
+        import atexit
+
+        # windows event loops only support subprocess pipes as proactor event loops
+        self._loop = (
+            getattr(asyncio, "ProactorEventLoop")()
+            if os.name == "nt"
+            else asyncio.new_event_loop()
         )
-        console.print_exception()
-        console.print(
-            f"\n{premsg_error} unknown error during invocation of {name}, see details"
+        self._children: Set[subprocess.Popen] = set()
+        Thread(target=self._loop.run_forever, name="pymtheg-runner", daemon=True).start()
+
+        # the event loop stops with the interpreter, possibly before killing programs
+        atexit.register(self.terminate)
+
+    def run(
+        self,
+        invocation: List[Union[str, Path]],
+        cwd: Optional[Path] = None,
+        binary: bool = False,
+        capture_output: bool = False,
+        input: Optional[bytes] = None,
+        on_line: Optional[Callable[[str], None]] = None,
+        on_chunk: Optional[Callable[[bytes], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[subprocess.CompletedProcess, Optional[Tuple[float, int]]]:
+        """
+        runs a command like subprocess.run, blocking the calling thread until it exits,
+        see invocate(). `on_line` and `on_chunk` are called from the calling thread.
+        where os.wait4 is available, the cpu time (user and system, in seconds) and peak
+        resident set size (in bytes) of the command are returned alongside it. raises
+        subprocess.TimeoutExpired if it was killed after `timeout` seconds without output
+        """
+        import asyncio
+        from queue import Queue
+
+        capture = capture_output or on_line is not None or on_chunk is not None
+        stdout = OutputBuffer(None if binary else OUTPUT_LIMIT)
+        stderr = OutputBuffer(None if binary else OUTPUT_LIMIT)
+        chunks: Optional["Queue[Optional[bytes]]"] = None
+
+        if on_line is not None or on_chunk is not None:
+            chunks = Queue()
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._run(invocation, cwd, capture, input, timeout, stdout, stderr, chunks),
+            self._loop,
+        )
+
+        try:
+            if chunks is not None:
+                decoder = text_decoder()
+                line = ""
+
+                for chunk in iter(chunks.get, None):
+                    if on_chunk is not None:
+                        on_chunk(chunk)
+                        continue
+
+                    stdout.write(chunk)
+                    *lines, line = (line + decoder.decode(chunk)).split("\n")
+                    for complete in lines:
+                        if on_line is not None:
+                            on_line(complete + "\n")
+
+                line += decoder.decode(b"", final=True)
+                if on_line is not None and line != "":
+                    on_line(line)
+
+            returncode, usage, timed_out = future.result()
+
+        except BaseException:
+            # e.g. KeyboardInterrupt, the program is then killed
+            future.cancel()
+            raise
+
+        output: Any = stdout.getvalue()
+        errors: Any = stderr.getvalue()
+
+        if not binary:
+            output = text_decoder().decode(output, final=True)
+            errors = text_decoder().decode(errors, final=True)
+
+        if timed_out:
+            raise subprocess.TimeoutExpired(invocation, timeout or 0, output, errors)
+
+        return (
+            subprocess.CompletedProcess(
+                invocation,
+                returncode,
+                output if capture else None,
+                errors if capture else None,
+            ),
+            usage,
         )
-        exit(errcode)
+
+    async def _run(
+        self,
+        invocation: List[Union[str, Path]],
+        cwd: Optional[Path],
+        capture: bool,
+        input: Optional[bytes],
+        timeout: Optional[float],
+        stdout: OutputBuffer,
+        stderr: OutputBuffer,
+        chunks: Optional["Queue[Optional[bytes]]"],
+    ) -> Tuple[int, Optional[Tuple[float, int]], bool]:
+        """
+        runs a command, writing its stdout to `chunks` if given (followed by None once
+        it is closed) or else to `stdout`, returning its exit code, resource usage (see
+        reap_process()) and whether it timed out, see run()
+        """
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        written = loop.time()
+
+        def sink(into: Callable[[bytes], None]) -> Callable[[bytes], None]:
+            """returns a pipe reader callback, noting when output was last written"""
+
+            def write(chunk: bytes) -> None:
+                nonlocal written
+                written = loop.time()
+                into(chunk)
+
+            return write
+
+        try:
+            popen = subprocess.Popen(
+                invocation,
+                cwd=cwd,
+                stdin=subprocess.PIPE if input is not None else None,
+                stdout=subprocess.PIPE if capture else None,
+                stderr=subprocess.PIPE if capture else None,
+                # in a session of its own so that it can be killed with its children
+                start_new_session=True,
+            )
+
+        except BaseException:
+            if chunks is not None:
+                chunks.put(None)
+            raise
+
+        self._children.add(popen)
+        pipes = []
+
+        if popen.stdin is not None and input is not None:
+            pipes.append(write_pipe(popen.stdin, input))
+        if popen.stdout is not None:
+            pipes.append(
+                read_pipe(
+                    popen.stdout, sink(stdout.write if chunks is None else chunks.put)
+                )
+            )
+        if popen.stderr is not None:
+            pipes.append(read_pipe(popen.stderr, sink(stderr.write)))
+
+        # shielded, so that waiting for it to finish can time out without cancelling it
+        communicate = asyncio.ensure_future(asyncio.gather(reap_process(popen), *pipes))
+        timed_out = False
+
+        try:
+            while not communicate.done():
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(communicate),
+                        None if timeout is None else written + timeout - loop.time(),
+                    )
+
+                except asyncio.TimeoutError:
+                    if loop.time() - written < (timeout or 0):
+                        continue  # output was written since
+
+                    timed_out = True
+                    kill_process(popen)
+
+                    try:
+                        await asyncio.wait_for(asyncio.shield(communicate), KILL_GRACE)
+                    except asyncio.TimeoutError:
+                        kill_process(popen, force=True)
+
+                    await communicate
+
+            usage = communicate.result()[0]
+
+        finally:
+            if popen.returncode is None:
+                # cancelled or errored, so don't leave the program running
+                kill_process(popen)
+                loop.call_later(KILL_GRACE, kill_process, popen, True)
+
+            self._children.discard(popen)
+
+            if chunks is not None:
+                chunks.put(None)
+
+        return popen.returncode, usage, timed_out
+
+    def terminate(self) -> None:
+        """kills every running program, e.g. when interrupted"""
+        for popen in list(self._children):
+            kill_process(popen)
+            self._loop.call_soon_threadsafe(
+                self._loop.call_later, KILL_GRACE, kill_process, popen, True
+            )
+
+
+_runner: Optional[ProcessRunner] = None
+_runner_lock = Lock()
+
+
+def get_runner() -> ProcessRunner:
+    """returns the process-wide process runner, starting it if needed"""
+    global _runner
+
+    with _runner_lock:
+        if _runner is None:
+            _runner = ProcessRunner()
+
+    return _runner
+
+
+def terminate_programs() -> None:
+    """kills every program running from the process runner, if it was started"""
+    if _runner is not None:
+        _runner.terminate()
+
+
+def kill_process(popen: subprocess.Popen, force: bool = False) -> None:
+    """
+    kills a child process started in a session of its own with its process group, unless
+    it has already been reaped
+
+    popen: subprocess.Popen
+        child process
+    force: bool = False
+        send SIGKILL instead of SIGTERM
+    """
+    import signal
+
+    if popen.returncode is not None:
+        return
+
+    try:
+        if os.name == "nt":
+            popen.kill()
+        else:
+            os.killpg(popen.pid, signal.SIGKILL if force else signal.SIGTERM)
+
+    except OSError:
+        pass  # exited in the meantime
+
+
+async def reap_process(popen: subprocess.Popen) -> Optional[Tuple[float, int]]:
+    """
+    waits for a child process to exit, setting its returncode. where os.wait4 is
+    available, its cpu time (user and system, in seconds) and peak resident set size (in
+    bytes) are returned
+    """
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+
+    if not hasattr(os, "wait4"):
+        await loop.run_in_executor(None, popen.wait)
+        return None
+
+    if hasattr(os, "pidfd_open"):
+        # wait for the process to exit on the event loop itself, without a thread
+        exited = loop.create_future()
+        pidfd = os.pidfd_open(popen.pid)
+
+        def on_exit() -> None:
+            if not exited.done():
+                exited.set_result(None)
+
+        loop.add_reader(pidfd, on_exit)
+
+        try:
+            await exited
+        finally:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+
+        _, status, rusage = os.wait4(popen.pid, 0)
 
     else:
-        return proc
+        _, status, rusage = await loop.run_in_executor(None, os.wait4, popen.pid, 0)
 
+    popen.returncode = (
+        -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    )
+    return (
+        rusage.ru_utime + rusage.ru_stime,
+        # ru_maxrss is in bytes on macos, and kibibytes elsewhere
+        rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024),
+    )
 
-def get_args(console: Console) -> Behaviour:
-    """parse and validate arguments"""
-    # parse
-    parser = ArgumentParser(
-        prog="pymtheg",
-        description=(
-            "a python script to share songs from Spotify/YouTube as a 15 second clip"
-        ),
-        epilog=f"""querying:
+
+async def read_pipe(pipe: IO[bytes], sink: Callable[[bytes], None]) -> None:
+    """reads a pipe of a child process until it is closed, passing on every chunk read"""
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+
+    if os.name == "nt":
+        # windows pipes can't be waited on by event loops, so they are read in threads
+        while True:
+            chunk = await loop.run_in_executor(
+                None, os.read, pipe.fileno(), PIPE_CHUNK_SIZE
+            )
+            if chunk == b"":
+                return
+            sink(chunk)
+
+    reader = asyncio.StreamReader(limit=PIPE_CHUNK_SIZE)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+
+    while True:
+        chunk = await reader.read(PIPE_CHUNK_SIZE)
+        if chunk == b"":
+            return
+        sink(chunk)
+
+
+async def write_pipe(pipe: IO[bytes], data: bytes) -> None:
+    """writes data to a pipe of a child process and closes it"""
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+
+    if os.name == "nt":
+        await loop.run_in_executor(None, _write_pipe, pipe, data)
+        return
+
+    # the transport writes what it can't write at once as the pipe is read from, and
+    # closes the pipe once everything was written (or the program exited)
+    transport, _ = await loop.connect_write_pipe(asyncio.Protocol, pipe)
+    transport.write(data)
+    transport.close()
+
+
+def _write_pipe(pipe: IO[bytes], data: bytes) -> None:
+    """writes data to a pipe and closes it, see write_pipe()"""
+    try:
+        pipe.write(data)
+    except BrokenPipeError:
+        pass  # the program exited without reading everything
+
+    try:
+        pipe.close()
+    except BrokenPipeError:
+        pass
+
+
+class HelpParser(ArgumentParser):
+    """argument parser that only builds its epilog when help is shown"""
+
+    def format_help(self) -> str:
+        self.epilog = help_epilog()
+        return super().format_help()
+
+
+def help_epilog() -> str:
+    """returns the help epilog"""
+    profiles = "\n".join(
+        f'    {name}: "{args}"' if args else f"    {name}: (default ffargs)"
+        for name, args in ENCODE_PROFILES.items()
+    )
+    return f"""querying:
   queries must be any one of the following:
     1. text
       "<query>"
@@ -755,15 +6136,23 @@ def get_args(console: Console) -> Behaviour:
     4. a path
       "<path>"
       e.g. "06 VERTIGO.flac"
+  "pymtheg serve" runs the job server instead (see `pymtheg serve -h`), so a
+  first query that is literally "serve" must follow "--" (after any options),
+  e.g. pymtheg -ud -- serve
 
 argument defaults:
-  -f, --ffargs:
+  -ffa, --ffargs:
     "{FFARGS}"
   -o, --out:
     "{OUT}"
-  -t, --timestamp-format:
+  -tf, --timestamp-format:
     "{TIMESTAMP_FORMAT}"
 
+encode profiles:
+  -pe, --profile-encode adds to the default ffargs, and can't be used with -ffa.
+  all but compatible encode the cover at a low frame rate, which is much faster.
+{profiles}
+
 formatting:
   available placeholders:
     from spotdl:
@@ -792,6 +6181,42 @@ formatting:
            hours can be represented by any number of characters.
            e.g. "138:02:09", "1:59:08", "2:05", "6"
 
+manifests:
+  a csv file with a header, or a jsonl file of objects, with the fields:
+    query (required), start, end, out
+  empty starts/ends default to -cs/-ce, and out (a file name, not a path)
+  replaces the songs name.
+  like -cs/-ce, starts/ends can be comma-separated lists (or json lists) to
+  create a clip of each.
+  finished rows are journalled to "<manifest>.journal" so that interrupted
+  runs resume where they stopped, and a summary of every row is written to
+  "<manifest>.summary.json". delete the journal to start over.
+  e.g.
+    query,start,end,out
+    "https://open.spotify.com/track/...",1:02,+15,
+    "thundercat - them changes",*,+10,changes
+    "thundercat - them changes","0:30,1:10,^",+10,teaser
+
+watching:
+  -wa/--watch clips songs ({", ".join(SONG_SUFFIXES)}) as they
+  appear in a directory or its subdirectories, using inotify where available
+  and polling every {WATCH_INTERVAL:g}s otherwise. songs are clipped with -cs/-ce once they
+  haven't changed for {WATCH_SETTLE:g}s, and recorded in "{WATCH_INDEX}" in the
+  directory so that they aren't processed again after a restart unless they
+  changed. hidden files and directories are ignored.
+
+caching:
+  pymtheg keeps caches in "$PYMTHEG_CACHE_DIR", else "$XDG_CACHE_HOME/pymtheg",
+  "~/.cache/pymtheg" (or "~/Library/Caches/pymtheg" on macOS and
+  "%LOCALAPPDATA%\\pymtheg\\Cache" on Windows), each capped by evicting the least
+  recently used entries:
+    probes.sqlite3: probed songs (up to {PROBE_CACHE_LIMIT}) and energy envelopes
+      for "^" clip starts (up to {ENVELOPE_CACHE_LIMIT // 1024 // 1024} MiB)
+    covers/: normalised album art (up to {COVER_CACHE_LIMIT // 1024 // 1024} MiB)
+    videos/: encoded video tracks of covers (up to {VIDEO_CACHE_LIMIT // 1024 // 1024} MiB)
+  -nc/--no-cache turns all of them off, and deleting the directory clears them.
+  pymtheg serve also keeps the clips of its jobs in "jobs/" unless -d is given.
+
 examples:
   1. get a song through a spotify link
     pymtheg "https://open.spotify.com/track/..."
@@ -801,13 +6226,45 @@ examples:
     pymtheg "https://open.spotify.com/track/..." "<query 2>"
   4. get a random 15s clip of a song
     pymtheg "<query>" -cs "*" -ce "+15" -ud
+  5. get the most energetic 15s of a song, usually its chorus ("^" clip starts
+     need a start-relative clip end, the length of the clip)
+    pymtheg "<query>" -cs "^" -ce "+15" -ud
+  6. get three 15s teasers of a song
+    pymtheg "<query>" -cs "0:30,1:10,2:00" -ce "+15" -ud
+  7. clip every song in a manifest, four at a time
+    pymtheg -m songs.csv -j 4
+  8. run a local job server (see `pymtheg serve -h`)
+    pymtheg serve --port 8461 -w 2
+    curl -d '{{"query": "<query>", "start": "*"}}' localhost:8461/jobs
+    curl localhost:8461/jobs/<id>
+    curl -OJ localhost:8461/jobs/<id>/clip
+  9. clip songs dropped into a shared folder, two at a time
+    pymtheg -wa /srv/incoming -d /srv/clips -j 2
 
   note: see querying for more information on queries
-""",
+"""
+
+
+def get_args(console: LazyConsole, serve: bool = False) -> Behaviour:
+    """
+    parse and validate arguments
+
+    console: LazyConsole
+        console used for printing
+    serve: bool = False
+        parse `pymtheg serve` arguments instead
+    """
+    # parse
+    parser = HelpParser(
+        prog="pymtheg serve" if serve else "pymtheg",
+        description=(
+            "a python script to share songs from Spotify/YouTube as a 15 second clip"
+        ),
         formatter_class=RawTextHelpFormatter,
     )
 
-    parser.add_argument("queries", help="song queries (see querying)", nargs="+")
+    if not serve:
+        parser.add_argument("queries", help="song queries (see querying)", nargs="*")
 
     cargs = parser.add_argument_group("clip options")
     oargs = parser.add_argument_group("output options")
@@ -831,6 +6288,16 @@ examples:
     cargs.add_argument(
         "-i", "--image", help="specify custom image", type=Path, default=None
     )
+    cargs.add_argument(
+        "-ms",
+        "--max-size",
+        help=(
+            "largest width and height of covers and images, downscaled once\n"
+            "to fit, e.g. 1080 (default 0, no limit)"
+        ),
+        type=int,
+        default=MAX_SIZE,
+    )
 
     oargs.add_argument(
         "-d",
@@ -860,6 +6327,20 @@ examples:
         help=f"directory for downloaded music, defaults to -d/--dir",
         default="",
     )
+    oargs.add_argument(
+        "-sml",
+        "--save-music-limit",
+        type=int,
+        help="size limit of saved music in MiB, evicting least recently used songs",
+        default=0,
+    )
+    oargs.add_argument(
+        "-smv",
+        "--save-music-verify",
+        help="verify saved music and prune missing or changed songs, used with -sm",
+        action="store_true",
+        default=False,
+    )
     oargs.add_argument(
         "-nt",
         "--no-timestamp",
@@ -887,7 +6368,14 @@ examples:
         "-ffa",
         "--ffargs",
         help="args to pass to ffmpeg for clip creation",
-        default=FFARGS,
+        default=None,
+    )
+    targs.add_argument(
+        "-pe",
+        "--profile-encode",
+        help="ffmpeg args to use by name (see encode profiles)",
+        choices=list(ENCODE_PROFILES),
+        default=None,
     )
 
     pargs.add_argument(
@@ -904,12 +6392,217 @@ examples:
         action="store_true",
         default=False,
     )
+    pargs.add_argument(
+        "-sp",
+        "--single-pass",
+        help="create clips using a single ffmpeg invocation per song",
+        action="store_true",
+        default=False,
+    )
+    pargs.add_argument(
+        "-f",
+        "--force",
+        help=(
+            "create clips even if they were already created from the same song,\n"
+            f'timestamps and options (see the "{BUILD_INDEX}" of the output dir)'
+        ),
+        action="store_true",
+        default=False,
+    )
+    pargs.add_argument(
+        "-nsc",
+        "--no-stream-copy",
+        help="always transcode audio, even if it could be stream copied",
+        action="store_true",
+        default=False,
+    )
+    pargs.add_argument(
+        "-npc",
+        "--no-probe-cache",
+        help="don't use or update the song probe cache",
+        action="store_true",
+        default=False,
+    )
+    pargs.add_argument(
+        "-nvc",
+        "--no-video-cache",
+        help="encode the video track of every clip instead of reusing cached ones",
+        action="store_true",
+        default=False,
+    )
+    pargs.add_argument(
+        "-nc",
+        "--no-cache",
+        help="don't use or update any cache (implies -npc and -nvc), see caching below",
+        action="store_true",
+        default=False,
+    )
+    pargs.add_argument(
+        "-pi",
+        "--pipe",
+        help=(
+            "pipe covers into clip creation and write clips beside their outputs,\n"
+            "without cover, video or clip intermediates (implies -nvc)"
+        ),
+        action="store_true",
+        default=False,
+    )
+    pargs.add_argument(
+        "-wd",
+        "--workdir",
+        help=(
+            "directory for downloads and intermediates, by default downloads are kept\n"
+            f'in the temporary directory and the intermediates of each song in "{WORKDIR_RAM}"\n'
+            "if it has space, falling back when short on space"
+        ),
+        type=Path,
+        default=None,
+    )
+    pargs.add_argument(
+        "-dt",
+        "--download-timeout",
+        help=(
+            "seconds spotDL may go without writing output before it is killed\n"
+            f"(default {DOWNLOAD_TIMEOUT:g}, 0 for none)"
+        ),
+        type=float,
+        default=DOWNLOAD_TIMEOUT,
+    )
+    pargs.add_argument(
+        "-et",
+        "--encode-timeout",
+        help=(
+            "seconds ffmpeg may go without writing output or progress before it is\n"
+            f"killed (default {ENCODE_TIMEOUT:g}, 0 for none)"
+        ),
+        type=float,
+        default=ENCODE_TIMEOUT,
+    )
+    pargs.add_argument(
+        "-rt",
+        "--retries",
+        help=(
+            "number of times to retry songs and downloads whose programs failed or\n"
+            "timed out (default 0), songs that still fail are reported at the end"
+        ),
+        type=int,
+        default=0,
+    )
+    pargs.add_argument(
+        "-rb",
+        "--retry-backoff",
+        help=(
+            "seconds to wait before the first retry, doubled for every retry\n"
+            f"(default {RETRY_BACKOFF:g})"
+        ),
+        type=float,
+        default=RETRY_BACKOFF,
+    )
+    pargs.add_argument(
+        "-m",
+        "--manifest",
+        help=(
+            "process a csv/jsonl manifest of queries non-interactively, resuming if\n"
+            "interrupted (see manifests)"
+        ),
+        type=Path,
+        default=None,
+    )
+    if not serve:
+        pargs.add_argument(
+            "-wa",
+            "--watch",
+            help=(
+                "watch a directory for songs until interrupted, clipping each with\n"
+                "the default timestamps once it is fully written (see watching)"
+            ),
+            type=Path,
+            default=None,
+        )
+        pargs.add_argument(
+            "-tr",
+            "--trace",
+            help="write a chrome trace of every song, stage and program to a json file",
+            type=Path,
+            default=None,
+        )
+    pargs.add_argument(
+        "-j",
+        "--jobs",
+        help="number of songs to process at once when using -ud and -y (default 1)",
+        type=int,
+        default=1,
+    )
+    pargs.add_argument(
+        "-cpu",
+        "--cpus",
+        help=(
+            "number of cpus to share between ffmpeg encodes, defaults to those\n"
+            "available (respecting cpu affinity and cgroup limits)"
+        ),
+        type=int,
+        default=None,
+    )
+
+    if serve:
+        sargs = parser.add_argument_group("serve options")
+        sargs.add_argument(
+            "--host",
+            help='address to listen on (default "127.0.0.1")',
+            default="127.0.0.1",
+        )
+        sargs.add_argument(
+            "--port", help="port to listen on (default 8461)", type=int, default=8461
+        )
+        sargs.add_argument(
+            "-w",
+            "--workers",
+            help="number of jobs to process at once (default 1)",
+            type=int,
+            default=1,
+        )
+        sargs.add_argument(
+            "-qs",
+            "--queue-size",
+            help="maximum number of queued jobs (default 64)",
+            type=int,
+            default=64,
+        )
+
+    args = parser.parse_args(sys.argv[2:] if serve else None)
 
-    args = parser.parse_args()
+    if serve and args.manifest is not None:
+        parser.error("-m/--manifest can't be given with serve")
+
+    if serve:
+        args.queries = []
+        args.use_defaults = args.yes = True
+        args.trace = args.watch = None
+
+        if args.dir == Path(""):
+            args.dir = cache_dir().joinpath("jobs")
+            args.dir.mkdir(exist_ok=True)
+
+    if args.ffargs is not None and args.profile_encode is not None:
+        parser.error("-ffa/--ffargs can't be given with -pe/--profile-encode")
+
+    if args.manifest is not None and len(args.queries) > 0:
+        parser.error("queries can't be given with -m/--manifest")
+
+    if args.watch is not None and (len(args.queries) > 0 or args.manifest is not None):
+        parser.error("queries and -m/--manifest can't be given with -wa/--watch")
+
+    if len(args.queries) == 0 and not (
+        serve
+        or args.manifest is not None
+        or args.watch is not None
+        or (args.save_music and args.save_music_verify)
+    ):
+        parser.error("the following arguments are required: queries")
 
     # validate clip start/end
-    start_timestamp = check_timestamp(0, args.clip_start)
-    end_timestamp = check_timestamp(1, args.clip_end)
+    start_timestamp = check_timestamps(0, args.clip_start)
+    end_timestamp = check_timestamps(1, args.clip_end)
 
     if start_timestamp is None:
         console.print(f"{premsg_error} invalid clip start (format: \[hh:mm:]ss)")
@@ -922,6 +6615,25 @@ examples:
         )
         exit(1)
 
+    windows = pair_timestamps(start_timestamp, end_timestamp)
+
+    if windows is None:
+        console.print(f"{premsg_error} number of clip starts and clip ends differ")
+        exit(1)
+
+    if len(windows) > 1 and args.no_timestamp:
+        console.print(
+            f"{premsg_error} several clips need a timestamp format to be named by, "
+            "so -nt can't be used"
+        )
+        exit(1)
+
+    try:
+        check_energetic(windows)
+    except TimestampError as err:
+        console.print(f"{premsg_error} {err}")
+        exit(1)
+
     # validate formattables to make sure they dont contain illegal placeholders
     spotdl_replaceables = (
         "{artist}",
@@ -972,18 +6684,54 @@ examples:
         save_music_dir=args.dir
         if args.save_music_dir == Path("")
         else args.save_music_dir,
+        save_music_limit=max(args.save_music_limit, 0) * 1024 * 1024,
+        save_music_verify=args.save_music_verify,
         no_timestamp=args.no_timestamp,
         timestamp_format=args.timestamp_format,
         ext=args.ext,
         sdargs=args.sdargs.split(),
-        ffargs=args.ffargs.split(),
+        ffargs=(
+            args.ffargs or encode_profile(args.profile_encode or "compatible")
+        ).split(),
         clip_start=start_timestamp,
         clip_end=end_timestamp,
         image=args.image,
+        max_size=args.max_size,
         use_defaults=args.use_defaults,
         yes=args.yes,
+        jobs=args.jobs,
+        single_pass=args.single_pass,
+        stream_copy=not args.no_stream_copy,
+        probe_cache=not (args.no_probe_cache or args.no_cache),
+        video_cache=not (args.no_video_cache or args.no_cache),
+        cover_cache=not args.no_cache,
+        manifest=args.manifest,
+        cpus=args.cpus,
+        workdir=args.workdir,
+        pipe=args.pipe,
+        download_timeout=args.download_timeout or None,
+        encode_timeout=args.encode_timeout or None,
+        retries=args.retries,
+        retry_backoff=args.retry_backoff,
+        force=args.force,
+        watch=args.watch,
+        trace=args.trace,
+        serve=ServeOptions(
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            queue_size=args.queue_size,
+        )
+        if serve
+        else None,
     )
 
+    if serve and (args.workers < 1 or args.queue_size < 1):
+        console.print(
+            f"{premsg_error} number of workers and queue size must be at least 1"
+        )
+        exit(1)
+
     if not bev.dir.exists():
         console.print(f"{premsg_error} output directory is non-existent")
         exit(1)
@@ -992,6 +6740,48 @@ examples:
         console.print(f"{premsg_error} output directory is not a directory")
         exit(1)
 
+    if bev.save_music and not bev.save_music_dir.is_dir():
+        console.print(
+            f"{premsg_error} music directory is non-existent or not a directory"
+        )
+        exit(1)
+
+    if bev.jobs < 1:
+        console.print(f"{premsg_error} number of jobs must be at least 1")
+        exit(1)
+
+    if bev.cpus is not None and bev.cpus < 1:
+        console.print(f"{premsg_error} number of cpus must be at least 1")
+        exit(1)
+
+    if args.download_timeout < 0 or args.encode_timeout < 0:
+        console.print(f"{premsg_error} timeouts can't be negative")
+        exit(1)
+
+    if bev.max_size < 0 or bev.max_size == 1:
+        console.print(f"{premsg_error} maximum cover size must be 0 or at least 2")
+        exit(1)
+
+    if bev.retries < 0 or bev.retry_backoff < 0:
+        console.print(f"{premsg_error} retries and retry backoff can't be negative")
+        exit(1)
+
+    if bev.workdir is not None and not bev.workdir.is_dir():
+        console.print(
+            f"{premsg_error} working directory is non-existent or not a directory"
+        )
+        exit(1)
+
+    if bev.watch is not None and not bev.watch.is_dir():
+        console.print(
+            f"{premsg_error} watched directory is non-existent or not a directory"
+        )
+        exit(1)
+
+    if bev.manifest is not None and not bev.manifest.is_file():
+        console.print(f"{premsg_error} specified manifest is non-existent")
+        exit(1)
+
     if bev.image is not None and not bev.image.exists():
         console.print(f"{premsg_error} specified image is non-existent")
         exit(1)
@@ -999,48 +6789,5 @@ examples:
     return bev
 
 
-# before you start panicking, this is simply a base85 encoded image file used when custom
-# files are specified as queries but they do not have album covers
-COVER_IMAGE_DATA = b"""
-iBL{Q4GJ0x0000DNk~Le0006U0006U2nGNE0KNWqd;kCd32;bRa{vGU000000RV(~7jpmr3QS2vK~#9!?cL8Sd}|!Q
-aX-ed!LYP2r4&0QC3gN7Nq)qVjjW{D*(v{ng-FfLQdUxy3Slij2Jw7*d^flIy~db($GJJLSDlT;nR=%5?#y$ZPfY*-
-sInSM000OM06=g600<5MKyUy6f&&0RZ~y>;0{}p9004pm01zAi0D=Pm5F7x2-~a#+8~}je000mi0D#~C00ajBfZzZC
-1P1^hH~;_y2LK>A000CB03bL30KowOAUFU3!2tjW4gdhb0RRXN006-O00<5MKyUy62o3;1Z~y>;0{}p9004pm06=g6
-0D=Pm5F7vif&%~$8~}je000mi0D#~C01zAifZzZC1P1_s-~a#w2LK>A000CB03bL300ajBAUFU3!2tjuH~;{_0RRXN
-006-O00<5M0KowO2o3;1Z~y=Z4gf%K004pm06=g60D=PmKyUy6f&%~$8~^}<0{{>l0D#~C01zAifZzZC5F7x2-~a#w
-2LOQJ000CB03bL300ajBAUFU31P1^hH~;{_0RSL4006-O00<5M0KowO2o3-M!2tjW4gf%K000OM06=g60D=PmKyUy6
-f&&0RZ~y>;0{{>l004pm01zAifZzZC5F7x2-~a#+8~}je000CB0D#~C00ajBAUFU31P1^hH~;_y2LK>A006-O03bL3
-0KowO2o3-M!2tjW4gdhb0RRXN06=g600<5MKyUy62o3;1Z~y>;0{}p9004pm01zAi0D=Pm5F7vif&%~$8~}je000mi
-0D#~C00ajBfZzZC1P1_s-~a#w2LK>A000CB03bL30KowOAUFU3!2tjuH~;{_0RRXN006-O00<5MKyUy62o3;1Z~y=Z
-4gf%K004pm06=g60D=Pm5F7vif&%~$8~^}<0{{>l0D#~C01zAifZzZC1P1_s-~a#w2LOQJ000CB03bL300ajBAUFU3
-!2tjuH~;{_0RSL4006-O00<5M0KowO2o3;1Z~y=Z4gf%K000OM06=g60D=PmKyUy6f&%~$8~^}<0{{>l004pm01zAi
-fZzZC5F7x2-~a#w2LOQJ000CB0D#~C00ajBAUFU31P1^hH~;{_0RSL4006-O03bL30KowO2o3-M!2tjW4gf%K000OM
-06=g600<5MKyUy6f&&0RZ~y>;1Nce*IBIIDdI5q1KyUzp1E{{*+FHQ@2o6AS0D=P$9D)M`2Y}!J1P73?y1F{S0SFF2
-Z~%e>5FCO71P6fN00ak+u=@IX!2t*kKyUzp0}vd70|W<v-~a>%kg!Z9BRBxT0SFF2Z~#9%H~<6(AUFWQ0sQ|pG&Bef
-KyUzp0}vd5-~a>%fZzZG2avGF#zw&b2o6AS0D=P$9Dv{e5FCKu00ajhIDnt7si{eD0D=P$9Dv{e1P35E00ajhIDmvT
-H#Z9oKyUzp0}vd5-~a>%fZzZG2avFqmKMPQ2o6AS0D=P$9Dv{e5FCKu01}qXW(5ZzIDqmzKR<^;p%7+gXT#XoSm^8P
-3%Oh_)YsRCo}QjCJUkrc=jX%r_I4;1i-H3X96<SQZf?TN%*=aSlnRHxUY(ttVQy|NTwPrW4nS}KAB#^ZmY0`9TU%S%
-q4D=Cp21O9S0^|C!2$f~`uaMIj*eCw8eh2p1P7$h@$qr!?(Y7U*bp3m;DD4q*~sVf-xeE!0}vdLGI7tw$jHdI#)jYk
-1P7$d($dnm$A;hl1P7!@{3)fiwY983i05ytudj!blap|JdmHZV?!xKmY1r7<2m=EHf&&m7z(1Rsn));hGMP+RTU!e+
-FE1b7=k@h9Y;JCTI+9*+0D=Qj=IQAvbaZr-jDmQY=+4eg+4np+I4C<h00al5!2bUJr%|xFy87k&Zf$J|4nS}KzfDh1
-mkfg5-rn~)Dqr>X_7;YQh6D#7IDqgzh^<r*tgNh5eDAoQLvR3s0|@>7{Uw9o@bIwWd!L=12@XJT03o!ux0eipI4!nP
-@r@S4+W^4<BpMv?vjGGLq(G8Csl-FX00al5K$4qA<7Wd14oHC{UyF?=oB{|ANP#2|{@UBy^92Bc1JWR=qs`-n(PFXa
-3jhQMq(u_L+a@L^EIc4MAWgn|JbgBs4VRaf79J2BkTy$8OJ$Fg|F_rT;-Uoy1P7#1+)ptwGE()}h;ObuJUm!%KyW}>
-#h+I4`Fz!4qpPbcTwGjOXh3j4+8rMshwkp~s>H_8(UAoP1PAb2e9|#GI{Kf*#^B(fCmVp^0R9yBbSy6~hqku1ibEs5
-9=oux5bp2qEhr#3fRDv#u`@F>A(zXQ9UAc!+wt-7aDIMn0Rh1QlrPRxDHIA}c6RoC=vq9FBSuJ!i#Ts3{%vw{GVJc|
-hR4T83kC=d06=g60D=PmKyUy6f&&0RZ~y>;0{{>l004pm01zAifZzZC5F7x2-~a#+8~}je000CB0D#~C00ajBAUFU3
-1P1^hH~;_y2LK>A006-O03bL30KowO2o6gC00<5MKyUy62o3;1Z~y>;0{}p9004pm06=g60D=Pm5F7vif&%~$8~}je
-000mi0D#~C01zAifZzZC1P1_s-~a#w2LK>A000CB03bL300ajBAUFU3!2tjuH~;{_0RRXN006-O00<5M0KowO2o3;1
-Z~y=Z4gf%K004pm06=g60D=PmKyUy6f&%~$8~^}<0{{>l0D#~C01zAifZzZC5F7x2-~a#w2LOQJ000CB03bL300ajB
-AUFU31P1^hH~;{_0RSL4006-O00<5M0KowO2o3-M!2tjW4gf%K000OM06=g60D=PmKyUy6f&&0RZ~y>;0{{>l004pm
-01zAifZzZC5F7x2-~a#+8~}je000CB0D#~C00ajBAUFU31P1^hH~;_y2LK>A006-O03bL30KowO2o3-M!2tjW4gdhb
-0RRXN06=g600<5MKyUy6f&&0RZ~y>;0{}p9004pm01zAi0D=Pm5F7x2-~a#+8~}je000mi0D#~C00ajBfZzZC1P1^h
-H~;_y2LK>A000CB03bL30KowOAUFU3!2tjW4gdhb0RRXN006-O00<5MKyUy62o3;1Z~y=Z4gf%K004pm06=g60D=Pm
-5F7vif&%~$8~^}<0{{>l0D#~C01zAifZzZC1P1_s-~a#w2LOQJ000CB03bL300ajBAUFU3!2tjuH~;{_0RSL4006-O
-00<5M0KowO2o3;1Z~y=Z4gf%K000OM06=g60D=PmKyUy6f&%~$8~^}<0{{>l004pm01zAifZzZC5F7x2-~a#w2LOQJ
-000CB0D#~C00ajBAUFU31P1^hH~;{_0RSL4006-O03bL30KowO2o3-M!2tjW4gf%K000OM06=g600<5MKyUy6f&&0R
-Z~y>;0{{>l004pm01zAi0D=Pm5F7x2-~a%qz%RDyFKU20J8A#`002ovPDHLkV1f"""
-
-
 if __name__ == "__main__":
     main()